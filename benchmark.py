@@ -0,0 +1,450 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from gmgn import MockTransport, Response, Transport
+from synthetic import SyntheticGmgn
+
+
+class StageTimer:
+    """Collects wall-clock durations per named stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj, method: str, stage: Optional[str] = None) -> None:
+        """Time every call of obj.method under the given stage name."""
+        func = getattr(obj, method)
+        stage = stage or method
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(obj, method, timed)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {stage: summarize(samples) for stage, samples in sorted(self.samples.items())}
+
+
+class TimedTransport(Transport):
+    """Wraps a transport and records the latency of every request under 'request:<endpoint>'."""
+
+    def __init__(self, inner: Transport, timer: StageTimer):
+        self.inner = inner
+        self.timer = timer
+
+    def get(self, url: str, endpoint: str = None) -> Response:
+        started = time.perf_counter()
+        try:
+            return self.inner.get(url, endpoint)
+        finally:
+            self.timer.record(f"request:{endpoint}", time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return self.inner.stats()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, math.ceil(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'total_ms': round(sum(ordered) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3)
+    }
+
+
+def bench_wallet_analyzer(dataset: SyntheticGmgn, transport: MockTransport, timer: StageTimer) -> None:
+    """One WalletAnalyzer run: rank fetch, filtering, display and JSON export."""
+    from wallet import WalletAnalyzer
+
+    analyzer = WalletAnalyzer(transport=TimedTransport(transport, timer))
+    timer.wrap(analyzer, 'get_trending_wallets')
+    timer.wrap(analyzer, 'display_wallet_analysis')
+    wallets = analyzer.get_trending_wallets()
+    analyzer.display_wallet_analysis(wallets)
+
+
+def bench_smart_money(dataset: SyntheticGmgn, transport: MockTransport, timer: StageTimer,
+                      workers: int = 1, pipeline: bool = False, stream: bool = False) -> None:
+    """One SmartMoneyFollower.run_strategy run."""
+    from smartMoney import SmartMoneyFollower
+
+    follower = SmartMoneyFollower(max_workers=workers, requests_per_second=1e9, transport=TimedTransport(transport, timer))
+    for method in ('get_top_wallets', 'analyze_wallet_activity', 'evaluate_token', 'print_analysis_output'):
+        timer.wrap(follower, method)
+    follower.run_strategy(pipeline=pipeline, stream=stream)
+
+
+def run_scenario(name: str, bench: Callable, dataset: SyntheticGmgn, latency: float, jitter: float,
+                 repeat: int = 1, memory: bool = True, **kwargs) -> Dict:
+    """Run a benchmark repeatedly in a scratch directory and aggregate its numbers."""
+    walls, requests = [], []
+    timer = StageTimer()
+    peak = None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(scratch)
+        try:
+            for _ in range(repeat):
+                transport = dataset.transport(latency=latency, jitter=jitter)
+                started = time.perf_counter()
+                bench(dataset, transport, timer, **kwargs)
+                walls.append(time.perf_counter() - started)
+                requests.append(transport.requests)
+
+            if memory:
+                tracemalloc.start()
+                bench(dataset, dataset.transport(latency=latency, jitter=jitter), StageTimer(), **kwargs)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+
+    wall = sum(walls) / len(walls)
+    return {
+        'name': name,
+        'config': kwargs,
+        'wall_s': round(wall, 4),
+        'wallets_per_s': round(dataset.wallets / wall, 2) if wall else 0.0,
+        'requests': requests[-1],
+        'stages': timer.summary(),
+        'peak_memory_bytes': peak
+    }
+
+
+def bench_shards(dataset: SyntheticGmgn, shard_counts: List[int], latency: float, jitter: float) -> List[Dict]:
+    """
+    Wallets/sec of SmartMoneyFollower.run_sharded per worker process count, every worker with its own mock transport.
+    """
+    from smartMoney import SmartMoneyFollower
+
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(scratch)
+        try:
+            for shards in shard_counts:
+                follower = SmartMoneyFollower(requests_per_second=1e9, transport=dataset.transport())
+                started = time.perf_counter()
+                follower.run_sharded(shards, os.path.join(scratch, f"queue-{shards}.sqlite"),
+                                     transport_factory=functools.partial(dataset.transport, latency=latency, jitter=jitter))
+                wall = time.perf_counter() - started
+                stats = follower.shard_stats
+                results.append({
+                    'shards': shards,
+                    'wall_s': round(wall, 4),
+                    'wallets_per_s': round(dataset.wallets / wall, 2) if wall else 0.0,
+                    'queue_wallets_per_s': stats['wallets_per_s'],
+                    'crashes': stats['crashes'],
+                    'done_by_worker': sorted(stats['done_by_worker'].values(), reverse=True)
+                })
+        finally:
+            os.chdir(cwd)
+
+    base = results[0]['wallets_per_s'] if results else 0.0
+    for result in results:
+        result['speedup'] = round(result['wallets_per_s'] / base, 2) if base else None
+    return results
+
+
+def bench_render(dataset: SyntheticGmgn, limit: int = 50) -> Dict:
+    """
+    Time to first row and total time of displaying every wallet: one tabulate grid, the progressive
+    table, and the progressive table limited to `limit` rows.
+    """
+    from wallet import WalletAnalyzer
+
+    class FirstRow(io.StringIO):
+        first = None
+
+        def write(self, text):
+            if self.first is None and text.startswith('|') and text.count('=') == 0 and 'Wallet Address' not in text:
+                self.first = time.perf_counter()
+            return super().write(text)
+
+    wallets = WalletAnalyzer(transport=dataset.transport(), json_export=False).get_trending_wallets()
+    results = {'wallets': len(wallets)}
+    for name, options in (('tabulate', {}), ('progressive', {'progressive': True}),
+                          (f'progressive[rows={limit}]', {'progressive': True, 'display_limit': limit})):
+        analyzer = WalletAnalyzer(transport=dataset.transport(), json_export=False, **options)
+        out = FirstRow()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            analyzer.display_wallet_analysis(wallets)
+        ended = time.perf_counter()
+        results[name] = {
+            'first_row_ms': round(((out.first or ended) - started) * 1000, 3),
+            'total_ms': round((ended - started) * 1000, 3)
+        }
+    return results
+
+
+def retained_bytes(build: Callable) -> int:
+    """Memory still allocated by the object build() returns."""
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def bench_record_memory(dataset: SyntheticGmgn) -> Dict:
+    """Memory of the nested dict representation versus the slotted records, for the whole dataset."""
+    from records import WalletRecord
+
+    rank_route = next(route for route in dataset.routes if '/rank/sol/wallets/1d?tag=smart_degen' in route)
+    rank = json.loads(dataset.routes[rank_route])['data']['rank']
+    infos = [(route.rsplit('/', 1)[1].split('?')[0], body) for route, body in dataset.routes.items() if '/walletNew/' in route]
+
+    def rank_dicts():
+        return [WalletRecord.from_rank_entry(entry).to_dict() for entry in rank]
+
+    def rank_records():
+        return [WalletRecord.from_rank_entry(entry) for entry in rank]
+
+    def info_dicts():
+        return [json.loads(body)['data'] for _, body in infos]
+
+    def info_records():
+        return [WalletRecord.from_wallet_info(address, json.loads(body)['data']) for address, body in infos]
+
+    results = {}
+    for name, dicts, records in (('rank', rank_dicts, rank_records), ('wallet_info', info_dicts, info_records)):
+        dict_bytes, record_bytes = retained_bytes(dicts), retained_bytes(records)
+        results[name] = {
+            'dict_bytes': dict_bytes,
+            'record_bytes': record_bytes,
+            'reduction': round(1 - record_bytes / dict_bytes, 3) if dict_bytes else 0.0
+        }
+    return results
+
+
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import wallet
+imported = time.perf_counter()
+analyzer = wallet.WalletAnalyzer(base_url=sys.argv[1])
+built = time.perf_counter()
+analyzer.gmgn.getTrendingWallets(timeframe="1d", walletTag="smart_degen")
+answered = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - started,
+    'init_s': built - imported,
+    'first_request_s': answered - built,
+    'modules': sorted(name for name in ('tls_client', 'fake_useragent', 'tabulate', 'numpy', 'httpx') if name in sys.modules)
+}))
+"""
+
+
+def bench_startup(dataset: SyntheticGmgn, repeat: int = 5) -> Dict:
+    """
+    Cold start of wallet.py in fresh interpreters: import time, client construction and the
+    first request over the live tls_client transport, against a local gmgn.server stand-in.
+    """
+    from gmgn.server import StandInServer
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    samples = {'interpreter_s': [], 'process_s': [], 'import_s': [], 'init_s': [], 'first_request_s': []}
+    modules = []
+    with StandInServer(dataset.transport()) as server, tempfile.TemporaryDirectory() as scratch:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+            samples['interpreter_s'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            probe = subprocess.run([sys.executable, '-c', STARTUP_PROBE, server.baseUrl], cwd=scratch, env=env,
+                                   capture_output=True, text=True, check=True)
+            samples['process_s'].append(time.perf_counter() - started)
+            result = json.loads(probe.stdout.strip().splitlines()[-1])
+            for key in ('import_s', 'init_s', 'first_request_s'):
+                samples[key].append(result[key])
+            modules = result['modules']
+
+        importtime = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import wallet'], cwd=scratch, env=env,
+                                    capture_output=True, text=True)
+
+    # Modules imported directly by wallet.py (deeper imports are indented further)
+    slowest = []
+    for line in importtime.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit() and parts[2].startswith('   ') and not parts[2].startswith('     '):
+            slowest.append((int(parts[1]), parts[2].strip()))
+    slowest = sorted(slowest, reverse=True)[:8]
+
+    return {
+        'repeat': repeat,
+        'median_ms': {key: round(sorted(values)[len(values) // 2] * 1000, 2) for key, values in samples.items()},
+        'loaded_after_first_request': modules,
+        'slowest_imports_ms': {name: round(us / 1000, 2) for us, name in slowest}
+    }
+
+
+def bench_decode(dataset: SyntheticGmgn, repeat: int = 5) -> Dict:
+    """
+    CPU time and retained memory of decoding the rank list and every wallet info payload:
+    the legacy stdlib path, the fast backend, and the fast backend with DEFAULT_PROJECTIONS.
+    """
+    from gmgn import decode as decoding
+
+    rank_route = next(route for route in dataset.routes if '/rank/sol/wallets/1d?tag=smart_degen' in route)
+    payloads = {
+        'getTrendingWallets': [dataset.routes[rank_route]],
+        'getWalletInfo': [body for route, body in dataset.routes.items() if '/walletNew/' in route]
+    }
+    paths = {
+        'stdlib': lambda endpoint, body: json.loads(body),
+        decoding.backend(): lambda endpoint, body: decoding.decode(body),
+        decoding.backend() + '+projection': lambda endpoint, body: decoding.decode(body, decoding.DEFAULT_PROJECTIONS[endpoint]),
+    }
+
+    results = {}
+    for endpoint, bodies in payloads.items():
+        results[endpoint] = {'payload_bytes': sum(len(body) for body in bodies)}
+        for name, path in paths.items():
+            cpu = []
+            for _ in range(repeat):
+                started = time.process_time()
+                for body in bodies:
+                    path(endpoint, body)
+                cpu.append(time.process_time() - started)
+            retained = retained_bytes(lambda: [path(endpoint, body) for body in bodies])
+            results[endpoint][name] = {'cpu_ms': round(min(cpu) * 1000, 3), 'retained_bytes': retained}
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_results(results: List[Dict]) -> None:
+    print(f"{'Scenario':<36}{'Wall (s)':>10}{'Wallets/s':>12}{'Requests':>10}{'Peak MiB':>10}")
+    for result in results:
+        peak = result['peak_memory_bytes']
+        peak = f"{peak / 2 ** 20:.1f}" if peak is not None else "-"
+        print(f"{result['name']:<36}{result['wall_s']:>10.3f}{result['wallets_per_s']:>12.1f}{result['requests']:>10}{peak:>10}")
+        for stage, stats in result['stages'].items():
+            print(f"    {stage:<32} n={stats['count']:<6} p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the wallet analysis pipelines against synthetic GMGN responses.")
+    parser.add_argument("--wallets", type=int, default=200, help="Wallets in the rank list")
+    parser.add_argument("--trades", type=int, default=10, help="Trades per wallet")
+    parser.add_argument("--overlap", type=float, default=0.5, help="Token overlap ratio between wallets (0-1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated endpoint latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random endpoint latency in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8], help="run_strategy worker counts to try")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per scenario")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory pass")
+    parser.add_argument("--output", default="benchmark_results.json", help="Machine-readable results file")
+    parser.add_argument("--startup", action="store_true", help="Only measure cold start (import and first request time)")
+    parser.add_argument("--shards", type=int, nargs="*", default=[], help="run_sharded worker process counts to try")
+    parser.add_argument("--extra-fields", action="store_true", help="Pad payloads with the unused fields of the live API")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    dataset = SyntheticGmgn(wallets=args.wallets, trades_per_wallet=args.trades, token_overlap=args.overlap,
+                            extra_fields=args.extra_fields)
+
+    if args.startup:
+        startup = bench_startup(dataset, repeat=max(args.repeat, 5))
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(), 'timestamp': datetime.now().isoformat(timespec='seconds'), 'startup': startup}, f, indent=2)
+        for key, value in startup['median_ms'].items():
+            print(f"{key:<20}{value:>10.1f} ms")
+        print(f"Loaded after the first request: {', '.join(startup['loaded_after_first_request'])}")
+        print(f"Slowest imports: {startup['slowest_imports_ms']}")
+        print(f"\nResults written to {args.output}")
+        return
+
+    common = dict(dataset=dataset, latency=args.latency, jitter=args.jitter, repeat=args.repeat, memory=not args.no_memory)
+
+    results = [run_scenario("wallet_analyzer", bench_wallet_analyzer, **common)]
+    for workers in args.workers:
+        for pipeline in (False, True):
+            name = f"smart_money[workers={workers}{',pipeline' if pipeline else ''}]"
+            results.append(run_scenario(name, bench_smart_money, workers=workers, pipeline=pipeline, **common))
+        results.append(run_scenario(f"smart_money[workers={workers},stream]", bench_smart_money, workers=workers, stream=True, **common))
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'params': {
+            'wallets': args.wallets,
+            'trades_per_wallet': args.trades,
+            'token_overlap': args.overlap,
+            'distinct_tokens': len(dataset.tokens),
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'repeat': args.repeat,
+            'extra_fields': args.extra_fields
+        },
+        'results': results,
+        'record_memory': bench_record_memory(dataset),
+        'decode': bench_decode(dataset, repeat=max(args.repeat, 5)),
+        'shards': bench_shards(dataset, args.shards, args.latency, args.jitter),
+        'render': bench_render(dataset)
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results)
+    for name, memory in report['record_memory'].items():
+        print(f"\n{name} representation: dicts {memory['dict_bytes'] / 2 ** 20:.2f} MiB, "
+              f"records {memory['record_bytes'] / 2 ** 20:.2f} MiB ({memory['reduction']:.0%} less)")
+    for endpoint, decoded in report['decode'].items():
+        paths = ", ".join(f"{name} {stats['cpu_ms']:.1f} ms / {stats['retained_bytes'] / 2 ** 20:.2f} MiB"
+                          for name, stats in decoded.items() if name != 'payload_bytes')
+        print(f"{endpoint} decode ({decoded['payload_bytes'] / 2 ** 20:.2f} MiB): {paths}")
+    render = report['render']
+    print(f"display of {render['wallets']} wallets: " + ", ".join(
+        f"{name} first row {stats['first_row_ms']:.1f} ms / total {stats['total_ms']:.1f} ms"
+        for name, stats in render.items() if name != 'wallets'))
+    for result in report['shards']:
+        print(f"run_sharded[shards={result['shards']}]: {result['wall_s']:.3f} s, {result['wallets_per_s']:.1f} wallets/s "
+              f"(x{result['speedup']}), wallets per worker {result['done_by_worker']}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import logging
+import os
+import sys
+from typing import Optional
+from gmgn import Metrics, ReplayTransport, Transport, startQueueLogging
+from profiling import Profiler
+from scan import TIMEFRAMES, WALLET_TAGS
+
+
+def build_transport(args) -> Optional[Transport]:
+    """The offline transport selected on the command line, None for the live one."""
+    if args.replay:
+        return ReplayTransport(args.replay, latency=args.latency, seed=args.seed)
+    if args.synthetic:
+        from synthetic import SyntheticGmgn
+        dataset = SyntheticGmgn(wallets=args.synthetic, trades_per_wallet=args.trades, token_overlap=args.overlap, seed=args.seed)
+        return dataset.transport(latency=args.latency, seed=args.seed)
+    return None
+
+
+def run_wallet(args, transport: Optional[Transport], metrics: Metrics) -> None:
+    from wallet import WalletAnalyzer
+
+    analyzer = WalletAnalyzer(transport=transport, base_url=args.base_url, cache_path=args.cache_path, engine=args.engine,
+                              json_export=not args.no_json, metrics=metrics, progressive=args.progressive, display_limit=args.rows)
+    try:
+        if len(args.timeframes) * len(args.tags) > 1:
+            wallets = analyzer.scan_trending_wallets(args.timeframes, args.tags, top_k=args.top_k)
+        else:
+            wallets = analyzer.get_trending_wallets(args.timeframes[0], args.tags[0], top_k=args.top_k)
+        analyzer.display_wallet_analysis(wallets)
+    finally:
+        analyzer.gmgn.close()
+
+
+def run_smart_money(args, transport: Optional[Transport], metrics: Metrics) -> None:
+    from smartMoney import SmartMoneyFollower
+    from consensus import ConsensusDetector
+
+    # Offline responses are not throttled, a limiter would only profile its own waits
+    rate = args.rate if args.rate is not None else (1e9 if transport is not None else 5.0)
+    follower = SmartMoneyFollower(max_workers=args.workers, requests_per_second=rate, transport=transport,
+                                  base_url=args.base_url, cache_path=args.cache_path, metrics=metrics,
+                                  consensus=ConsensusDetector(args.consensus) if args.consensus else None,
+                                  vetting=args.vetting, progressive=args.progressive, display_limit=args.rows)
+    try:
+        scan = len(args.timeframes) * len(args.tags) > 1
+        follower.run_strategy(pipeline=args.pipeline, timeframes=args.timeframes if scan else None,
+                              wallet_tags=args.tags if scan else None, stream=args.stream)
+    finally:
+        follower.gmgn.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run wallet.py or smartMoney.py analyses, optionally profiled.")
+
+    source = parser.add_argument_group("responses")
+    source.add_argument("--replay", default=None, help="Serve the responses of this recordings file instead of gmgn.ai")
+    source.add_argument("--synthetic", type=int, default=None, metavar="WALLETS", help="Serve a synthetic dataset with this many wallets")
+    source.add_argument("--trades", type=int, default=10, help="Trades per wallet of the synthetic dataset")
+    source.add_argument("--overlap", type=float, default=0.5, help="Token overlap of the synthetic dataset (0-1)")
+    source.add_argument("--seed", type=int, default=42, help="Seed of the synthetic dataset and of the simulated latency")
+    source.add_argument("--latency", type=float, default=0.0, help="Simulated latency of the offline responses in seconds")
+    source.add_argument("--base-url", default=None, help="gmgn base URL override (e.g. a local gmgn.server stand-in)")
+    source.add_argument("--cache-path", default=os.environ.get('GMGN_CACHE_PATH'), help="SQLite response cache")
+
+    profile = parser.add_argument_group("profiling")
+    profile.add_argument("--profile", choices=["cprofile", "sample"], default=None,
+                         help="cProfile every call of every thread, or sample the stacks of every thread")
+    profile.add_argument("--sample-interval", type=float, default=0.005, help="Seconds between two stack samples")
+    profile.add_argument("--timers", action="store_true", help="Report per-stage wall and CPU time")
+    profile.add_argument("--tracemalloc", type=int, default=0, metavar="N", help="Report the N allocation sites holding the most memory")
+    profile.add_argument("--profile-out", default="gmgn_profile", help="Prefix of the profile files (.prof/.folded and .json)")
+    profile.add_argument("--top", type=int, default=10, help="Functions and allocation sites listed in the summary")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, description in (("wallet", "Analyze the trending wallets (wallet.py)"),
+                       ("smart-money", "Follow the smart money wallets and evaluate their tokens (smartMoney.py)")):
+        command = commands.add_parser(name, help=description)
+        command.add_argument("--timeframes", nargs="+", default=["1d"], choices=TIMEFRAMES, help="Rank list timeframes")
+        command.add_argument("--tags", nargs="+", default=["smart_degen"], choices=WALLET_TAGS, help="Rank list wallet tags")
+        command.add_argument("--progressive", action="store_true", help="Print rows as they are ready, with running totals")
+        command.add_argument("--rows", type=int, default=None, help="Print at most this many rows")
+        if name == "wallet":
+            command.add_argument("--engine", default="python", choices=["python", "numpy"])
+            command.add_argument("--top-k", type=int, default=None, help="Keep only the most profitable wallets")
+            command.add_argument("--no-json", action="store_true", help="Skip rewriting wallet_analysis.json")
+        else:
+            command.add_argument("--workers", type=int, default=4, help="Wallets analyzed in parallel")
+            command.add_argument("--rate", type=float, default=None,
+                                 help="Requests per second (default 5 against gmgn.ai, unlimited with --replay/--synthetic)")
+            command.add_argument("--pipeline", action="store_true", help="Evaluate each distinct token once, after every wallet")
+            command.add_argument("--stream", action="store_true", help="Analyze the wallets through the bounded-memory stream")
+            command.add_argument("--vetting", action="store_true", help="Vet tokens through the staged checks first")
+            command.add_argument("--consensus", type=int, default=0, help="Wallets buying the same token that fire a signal (0 disables)")
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    listener = startQueueLogging(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+    metrics = Metrics()
+    profiler = Profiler(args.profile, output=args.profile_out, interval=args.sample_interval,
+                        tracemalloc_top=args.tracemalloc, top=args.top)
+    run = run_wallet if args.command == "wallet" else run_smart_money
+    transport = build_transport(args)
+    try:
+        with profiler:
+            run(args, transport, metrics)
+    except KeyboardInterrupt:
+        print("\nAnalysis interrupted by user")
+    finally:
+        if args.profile or args.timers or args.tracemalloc:
+            summary = profiler.report(metrics if args.timers or args.profile else None)
+            Profiler.print_summary(summary, top=args.top)
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+import bisect
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from records import TradeRecord, WalletRecord
+
+BUY_SIDES = ('buy',)
+
+
+class ConsensusDetector:
+    """
+    Spot tokens bought by several tracked wallets within a short time.
+
+    Trades are added incrementally to an inverted index token -> [(timestamp, wallet, side, tx_hash)]
+    covering the last `window_minutes`. A signal fires when `min_wallets` distinct wallets
+    have bought the same token inside the window, once per episode: the token fires again
+    only after its buyer count fell below the threshold as trades expired.
+    """
+
+    def __init__(self, min_wallets: int = 3, window_minutes: float = 30.0,
+                 on_signal: Optional[Callable[[Dict], None]] = None, clock: Callable[[], float] = time.time):
+        """
+        Initialize the detector.
+
+        Args:
+            min_wallets: Distinct wallets that have to buy the same token.
+            window_minutes: Length of the sliding window.
+            on_signal: Optional callback receiving every signal.
+            clock: Current time, replace it to replay historical trades.
+        """
+        if min_wallets < 2:
+            raise ValueError("A consensus needs at least 2 wallets.")
+        self.min_wallets = min_wallets
+        self.window = window_minutes * 60
+        self.on_signal = on_signal
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self.index: Dict[str, List[Tuple[float, str, str, str]]] = {}
+        self.buyers: Dict[str, Dict[str, int]] = {}
+        self.active = set()
+        self._expiry: List[Tuple[float, str]] = []
+        self._seen = set()
+
+        self.trades = 0
+        self.stale = 0
+        self.signals = 0
+
+    def _horizon(self, now: Optional[float] = None) -> float:
+        return (self.clock() if now is None else now) - self.window
+
+    def add_trade(self, wallet_address: str, token_address: str, timestamp: float, side: Optional[str],
+                  now: Optional[float] = None, tx_hash: Optional[str] = None) -> Optional[Dict]:
+        """
+        Index one trade.
+
+        Returns:
+            A consensus signal if this trade completed one, otherwise None.
+        """
+        if not token_address or not wallet_address:
+            return None
+        side = side or ''
+        tx_hash = tx_hash or ''
+        with self._lock:
+            key = (wallet_address, token_address, timestamp, side, tx_hash)
+            if key in self._seen:
+                return None
+            horizon = self._horizon(now)
+            self._expire(horizon)
+            if timestamp < horizon:
+                self.stale += 1
+                return None
+
+            self._seen.add(key)
+            self.trades += 1
+            entries = self.index.setdefault(token_address, [])
+            if not entries or timestamp < entries[0][0]:
+                heapq.heappush(self._expiry, (timestamp, token_address))
+            bisect.insort(entries, (timestamp, wallet_address, side, tx_hash))
+
+            if side not in BUY_SIDES:
+                return None
+            buyers = self.buyers.setdefault(token_address, {})
+            buyers[wallet_address] = buyers.get(wallet_address, 0) + 1
+            if len(buyers) < self.min_wallets or token_address in self.active:
+                return None
+
+            self.active.add(token_address)
+            self.signals += 1
+            signal = self._signal(token_address)
+
+        if self.on_signal is not None:
+            self.on_signal(signal)
+        return signal
+
+    def _signal(self, token_address: str) -> Dict:
+        buys = [(timestamp, wallet) for timestamp, wallet, side, _ in self.index[token_address] if side in BUY_SIDES]
+        first_buy = {}
+        for timestamp, wallet in buys:
+            first_buy.setdefault(wallet, timestamp)
+        return {
+            'type': 'consensus',
+            'token_address': token_address,
+            'wallets': sorted(first_buy, key=first_buy.get),
+            'first_buy': buys[0][0],
+            'last_buy': buys[-1][0],
+            'window_minutes': self.window / 60
+        }
+
+    def add_record(self, record: WalletRecord, now: Optional[float] = None) -> List[Dict]:
+        """Index every trade of a wallet record and return the signals they completed."""
+        return self.add_trades(record.wallet_address, record.trades, now)
+
+    def add_trades(self, wallet_address: str, trades: List[TradeRecord], now: Optional[float] = None) -> List[Dict]:
+        signals = []
+        for trade in trades:
+            signal = self.add_trade(wallet_address, trade.token_address, trade.timestamp or 0, trade.event_type, now,
+                                    trade.tx_hash)
+            if signal is not None:
+                signals.append(signal)
+        return signals
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Drop the trades that left the window, visiting only the tokens that have some.
+
+        Returns:
+            The number of trades dropped.
+        """
+        with self._lock:
+            return self._expire(self._horizon(now))
+
+    def _expire(self, horizon: float) -> int:
+        dropped = 0
+        while self._expiry and self._expiry[0][0] < horizon:
+            _, token_address = heapq.heappop(self._expiry)
+            entries = self.index.get(token_address)
+            if not entries or entries[0][0] >= horizon:
+                continue
+            cut = bisect.bisect_left(entries, (horizon,))
+            buyers = self.buyers.get(token_address, {})
+            for timestamp, wallet, side, tx_hash in entries[:cut]:
+                self._seen.discard((wallet, token_address, timestamp, side, tx_hash))
+                if side in BUY_SIDES:
+                    buyers[wallet] -= 1
+                    if not buyers[wallet]:
+                        del buyers[wallet]
+            del entries[:cut]
+            dropped += cut
+
+            if len(buyers) < self.min_wallets:
+                self.active.discard(token_address)
+            if entries:
+                heapq.heappush(self._expiry, (entries[0][0], token_address))
+            else:
+                del self.index[token_address]
+                self.buyers.pop(token_address, None)
+        return dropped
+
+    def leaders(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Tokens with the most distinct buyers in the window."""
+        with self._lock:
+            counts = [(token_address, len(buyers)) for token_address, buyers in self.buyers.items() if buyers]
+        return sorted(counts, key=lambda item: item[1], reverse=True)[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'tokens': len(self.index),
+                'indexed_trades': sum(len(entries) for entries in self.index.values()),
+                'trades': self.trades,
+                'stale': self.stale,
+                'signals': self.signals,
+                'active': len(self.active)
+            }
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+from records import WalletRecord
+
+# Columns of the snapshot, in order (last_active is kept as a timestamp)
+SNAPSHOT_COLUMNS = ('wallet_address', 'realized_profit', 'win_rate', 'buy', 'sell', 'last_active',
+                    'honeypot_ratio', 'fast_tx_ratio')
+
+
+def atomic_write(path: str, data: str) -> None:
+    """Write a file through a temporary file and a rename, so readers never see it half written."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private, keep the permissions of the file we replace
+        os.chmod(temp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class NdjsonWriter:
+    """
+    Appends one JSON document per line and flushes it right away, so the file can be tailed.
+
+    When the file grows past max_bytes it is rotated atomically (path -> path.1 -> path.2 ...),
+    keeping `backups` old files; `tail -F` follows the new file.
+    """
+
+    def __init__(self, path: str = "wallet_analysis.ndjson", max_bytes: int = 64 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+        self._size = self._file.tell()
+
+    def write(self, document: Dict) -> None:
+        line = json.dumps(document, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+            self.written += 1
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+        self._file = open(self.path, 'a', buffering=1)
+        self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def write_snapshot(path: str, records: List[WalletRecord], run_id: Optional[str] = None) -> None:
+    """
+    Write records as a compact columnar JSON document: one list per column instead of one object per wallet.
+    """
+    columns = {column: [getattr(record, column) for record in records] for column in SNAPSHOT_COLUMNS}
+    document = {'run_id': run_id, 'rows': len(records), 'columns': list(SNAPSHOT_COLUMNS), 'data': columns}
+    atomic_write(path, json.dumps(document, separators=(',', ':')))
+
+
+def read_snapshot(path: str) -> List[WalletRecord]:
+    """Load a columnar snapshot back into records."""
+    with open(path) as f:
+        document = json.load(f)
+    data = document['data']
+    return [
+        WalletRecord(**{column: data[column][index] for column in document['columns']})
+        for index in range(document['rows'])
+    ]
+
+
+class StreamingExporter:
+    """
+    Export sink of WalletAnalyzer: every record is appended to an NDJSON file as soon as it is produced,
+    and/or gathered into a columnar snapshot written when the run finishes (path None skips the NDJSON file).
+    """
+
+    def __init__(self, path: Optional[str] = "wallet_analysis.ndjson", snapshot_path: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 * 1024, backups: int = 5):
+        self.run_id = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.writer = NdjsonWriter(path, max_bytes=max_bytes, backups=backups) if path else None
+        self.snapshot_path = snapshot_path
+        self._snapshot: List[WalletRecord] = []
+
+    def __call__(self, record: WalletRecord) -> None:
+        if self.writer is not None:
+            document = record.to_dict()
+            document['run_id'] = self.run_id
+            self.writer.write(document)
+        if self.snapshot_path:
+            self._snapshot.append(record)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        if self.snapshot_path:
+            write_snapshot(self.snapshot_path, self._snapshot, self.run_id)
+            self._snapshot = []
@@ -1 +1,10 @@
 from gmgn.client import gmgn
+from gmgn.pool import SessionPool
+from gmgn.ratelimit import TokenBucket
+from gmgn.cache import TTLCache
+from gmgn.transport import Transport, TlsClientTransport, RecordingTransport, MockTransport, ReplayTransport, Response
+from gmgn.diskcache import SQLiteCache
+from gmgn.metrics import Metrics
+from gmgn.logqueue import startQueueLogging
+from gmgn.resilience import Resilience, RetryPolicy, CircuitBreaker, AdaptiveRate, GmgnError, RateLimitedError, ChallengeError, ServerError, CircuitOpenError
+from gmgn.decode import DEFAULT_PROJECTIONS
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a response stays fresh, per endpoint. Endpoints that are not listed are never cached.
+ENDPOINT_TTLS = {
+    'getTokenInfo': 6 * 3600,
+    'getSecurityInfo': 3600,
+    'getTopBuyers': 60,
+    'getTokenUsdPrice': 5,
+}
+
+_MISSING = object()
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Concurrent callers of getOrLoad asking for the same key share a single
+    call to the loader instead of each fetching it.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if expires <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value, ttl: float, now: float) -> None:
+        self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl, time.monotonic())
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def getOrLoad(self, key, loader, ttl: float = None, cacheable=None):
+        """
+        Returns the cached value for key, calling loader() once on a miss.
+
+        Cacheable - Optional predicate, values it rejects are handed back but not stored.
+        """
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._inflight[key] = _InFlight()
+                owner = True
+            else:
+                self.shared += 1
+                owner = False
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = loader()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if pending.error is None and (cacheable is None or cacheable(pending.value)):
+                    self._store(key, pending.value, ttl, time.monotonic())
+                del self._inflight[key]
+            pending.event.set()
+
+        return pending.value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'shared_inflight': self.shared,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -1,6 +1,13 @@
 import random
-import tls_client
-from fake_useragent import UserAgent
+import time
+from gmgn.pool import ROTATE_ROUND_ROBIN, browserIdentifiers, buildHeaders
+from gmgn.ratelimit import TokenBucket
+from gmgn.cache import TTLCache, ENDPOINT_TTLS
+from gmgn.transport import Transport, TlsClientTransport
+from gmgn.diskcache import SQLiteCache
+from gmgn.metrics import Metrics
+from gmgn.resilience import Resilience
+from gmgn.decode import decode
 
 # author - 1f1n
 # date - 05/06/2024
@@ -8,50 +15,139 @@ from fake_useragent import UserAgent
 class gmgn:
     BASE_URL = "https://gmgn.ai/defi/quotation"
 
-    def __init__(self):
-        pass
+    def __init__(self, poolSize: int = 4, rotation: str = ROTATE_ROUND_ROBIN, rotateEvery: int = 10, rateLimiter: TokenBucket = None, cache: TTLCache = None, cacheTtls: dict = None, transport: Transport = None, baseUrl: str = None, diskCache: SQLiteCache = None, metrics: Metrics = None, resilience: Resilience = None, projections: dict = None):
+        """
+        PoolSize - How many warm sessions (each with its own fingerprint) are kept alive.
+        Rotation - round_robin, every_n or on_failure, see SessionPool.
+        RotateEvery - Requests served by a session before moving on with the every_n policy.
+        Transport - Sends the requests, defaults to the live TlsClientTransport built from the pool settings.
+        BaseUrl - Overrides BASE_URL, e.g. to point at a local gmgn.server stand-in.
+        RateLimiter - Optional TokenBucket every request has to take a token from.
+        Cache - Optional TTLCache shared by the token endpoints listed in cacheTtls.
+        CacheTtls - Seconds a response stays fresh per endpoint, defaults to ENDPOINT_TTLS.
+        DiskCache - Optional SQLiteCache persisting responses between runs, consulted after the in-memory cache.
+        Metrics - Optional Metrics recording call counts and the latency, size and status of every request sent.
+        Resilience - Retries, circuit breakers and adaptive rate of the requests, defaults to a Resilience adapting rateLimiter.
+        Projections - Fields to keep per endpoint (e.g. DEFAULT_PROJECTIONS), the rest of the payload is dropped once decoded.
+        """
+        if transport is None:
+            transport = TlsClientTransport(poolSize=poolSize, rotation=rotation, rotateEvery=rotateEvery)
+        self.transport = transport
+        if baseUrl:
+            self.BASE_URL = baseUrl.rstrip('/')
+        self.rateLimiter = rateLimiter
+        self.cache = cache
+        self.cacheTtls = dict(ENDPOINT_TTLS if cacheTtls is None else cacheTtls)
+        self.diskCache = diskCache
+        self.metrics = metrics
+        self.resilience = resilience if resilience is not None else Resilience(rateLimiter=rateLimiter)
+        self.projections = projections or {}
 
     def randomiseRequest(self):
-        self.identifier = random.choice([browser for browser in tls_client.settings.ClientIdentifiers.__args__ if browser.startswith(('chrome', 'safari', 'firefox', 'opera'))])
+        """
+        Builds a one-off session with a random fingerprint.
+
+        Requests no longer go through this, they are served by the session pool.
+        """
+        import tls_client
+        self.identifier = random.choice(browserIdentifiers())
         self.sendRequest = tls_client.Session(random_tls_extension_order=True, client_identifier=self.identifier)
+        self.headers = buildHeaders(self.identifier)
+        self.user_agent = self.headers['user-agent']
 
-        parts = self.identifier.split('_')
-        identifier, version, *rest = parts
-        other = rest[0] if rest else None
+    def _get(self, endpoint: str, url: str):
+        """
+        Gets a response from the cache if the endpoint is cacheable, otherwise sends the request.
+        """
+        if self.metrics is not None:
+            self.metrics.observeCall(endpoint)
 
-        os = 'windows'
-        if identifier == 'opera':
-            identifier = 'chrome'
-        elif version == 'ios':
-            os = 'ios'
-        else:
-            os = 'windows'
-
-        self.user_agent = UserAgent(browsers=[identifier], os=[os]).random
-
-        self.headers = {
-            'Host': 'gmgn.ai',
-            'accept': 'application/json, text/plain, */*',
-            'accept-language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
-            'dnt': '1',
-            'priority': 'u=1, i',
-            'referer': 'https://gmgn.ai/?chain=sol',
-            'user-agent': self.user_agent
-        }
-        
+        ttl = self.cacheTtls.get(endpoint)
+        if self.cache is None or ttl is None:
+            return self._fetch(endpoint, url)
+
+        return self.cache.getOrLoad(url, lambda: self._fetch(endpoint, url), ttl=ttl, cacheable=lambda request: request.status_code == 200)
+
+    def _fetch(self, endpoint: str, url: str):
+        """
+        Gets a response from the persistent cache if there is one, otherwise sends the request.
+        """
+        if self.diskCache is None:
+            return self._send(endpoint, url)
+
+        return self.diskCache.fetch(endpoint, url, lambda: self._send(endpoint, url))
+
+    def _send(self, endpoint: str, url: str):
+        """
+        Sends a GET request, retrying transient failures and failing fast while the endpoint is down.
+        """
+        return self.resilience.call(endpoint, lambda: self._sendOnce(endpoint, url))
+
+    def _sendOnce(self, endpoint: str, url: str):
+        """
+        Sends a single GET request through the transport.
+        """
+        if self.rateLimiter is not None:
+            self.rateLimiter.acquire()
+
+        if self.metrics is None:
+            return self.transport.get(url, endpoint)
+
+        started = time.perf_counter()
+        try:
+            response = self.transport.get(url, endpoint)
+        except Exception as e:
+            self.metrics.observeRequest(endpoint, time.perf_counter() - started, error=type(e).__name__)
+            raise
+        self.metrics.observeRequest(endpoint, time.perf_counter() - started, len(response.content or b''), response.status_code)
+        return response
+
+    def _decode(self, endpoint: str, request):
+        """
+        Decodes a response from its bytes (orjson when installed), keeping only the projected fields of the endpoint.
+        """
+        return decode(request.content, self.projections.get(endpoint))
+
+    def poolStats(self) -> dict:
+        """
+        Gets the counters of the transport (reuse/handshake counters for the live session pool).
+        """
+        return self.transport.stats()
+
+    def cacheStats(self) -> dict:
+        """
+        Gets the hit/miss/eviction counters of the response cache.
+        """
+        return self.cache.stats() if self.cache is not None else {}
+
+    def diskCacheStats(self) -> dict:
+        """
+        Gets the hit/bytes saved/entry age counters of the persistent cache.
+        """
+        return self.diskCache.stats() if self.diskCache is not None else {}
+
+    def resilienceStats(self) -> dict:
+        """
+        Gets the retry/outcome counters, the state of every circuit breaker and the adapted rate.
+        """
+        return self.resilience.stats()
+
+    def close(self):
+        if self.diskCache is not None:
+            self.diskCache.close()
+        self.transport.close()
 
     def getTokenInfo(self, contractAddress: str) -> dict:
         """
         Gets info on a token.
         """
-        self.randomiseRequest()
         if not contractAddress:
             return "You must input a contract address."
         url = f"{self.BASE_URL}/v1/tokens/sol/{contractAddress}"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTokenInfo", url)
 
-        jsonResponse = request.json()
+        jsonResponse = self._decode("getTokenInfo", request)
 
         return jsonResponse
     
@@ -59,7 +155,6 @@ class gmgn:
         """
         Limit - Limits how many tokens are in the response.
         """
-        self.randomiseRequest()
         if not limit:
             limit = 50
         elif limit > 50:
@@ -67,9 +162,9 @@ class gmgn:
         
         url = f"{self.BASE_URL}/v1/pairs/sol/new_pairs?limit={limit}&orderby=open_timestamp&direction=desc&filters[]=not_honeypot"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getNewPairs", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getNewPairs", request)['data']
 
         return jsonResponse
     
@@ -91,7 +186,6 @@ class gmgn:
         snipe_bot = Snipe Bot\n
 
         """
-        self.randomiseRequest()
         if not timeframe:
             timeframe = "7d"
         if not walletTag:
@@ -99,9 +193,9 @@ class gmgn:
         
         url = f"{self.BASE_URL}/v1/rank/sol/wallets/{timeframe}?tag={walletTag}&orderby=pnl_{timeframe}&direction=desc"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTrendingWallets", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getTrendingWallets", request)['data']
 
         return jsonResponse
     
@@ -117,7 +211,6 @@ class gmgn:
         24h = 24 Hours\n
         """
         timeframes = ["1m", "5m", "1h", "6h", "24h"]
-        self.randomiseRequest()
         if timeframe not in timeframes:
             return "Not a valid timeframe."
 
@@ -129,9 +222,9 @@ class gmgn:
         else:
             url = f"{self.BASE_URL}/v1/rank/sol/swaps/{timeframe}?orderby=swaps&direction=desc"
         
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTrendingTokens", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getTrendingTokens", request)['data']
 
         return jsonResponse
 
@@ -141,7 +234,6 @@ class gmgn:
 
         Limit - Limits how many tokens in the response.
         """
-        self.randomiseRequest()
         if not limit:
             limit = 50
         elif limit > 50:
@@ -149,9 +241,9 @@ class gmgn:
 
         url = f"{self.BASE_URL}/v1/rank/sol/pump?limit={limit}&orderby=progress&direction=desc&pump=true"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTokensByCompletion", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getTokensByCompletion", request)['data']
 
         return jsonResponse
     
@@ -161,7 +253,6 @@ class gmgn:
 
         Size - The amount of tokens in the response
         """
-        self.randomiseRequest()
         if not size:
             size = 10
         elif size > 39:
@@ -169,9 +260,9 @@ class gmgn:
         
         url = f"{self.BASE_URL}/v1/signals/sol/snipe_new?size={size}&is_show_alert=false&featured=false"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("findSnipedTokens", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("findSnipedTokens", request)['data']
 
         return jsonResponse
 
@@ -179,12 +270,11 @@ class gmgn:
         """
         Get the current gas fee price.
         """
-        self.randomiseRequest()
         url = f"{self.BASE_URL}/v1/chains/sol/gas_price"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getGasFee", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getGasFee", request)['data']
 
         return jsonResponse
     
@@ -192,15 +282,14 @@ class gmgn:
         """
         Get the realtime USD price of the token.
         """
-        self.randomiseRequest()
         if not contractAddress:
             return "You must input a contract address."
         
         url = f"{self.BASE_URL}/v1/sol/tokens/realtime_token_price?address={contractAddress}"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTokenUsdPrice", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getTokenUsdPrice", request)['data']
 
         return jsonResponse
 
@@ -208,15 +297,14 @@ class gmgn:
         """
         Get the top buyers of a token.
         """
-        self.randomiseRequest()
         if not contractAddress:
             return "You must input a contract address."
         
         url = f"{self.BASE_URL}/v1/tokens/top_buyers/sol/{contractAddress}"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getTopBuyers", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getTopBuyers", request)['data']
 
         return jsonResponse
 
@@ -224,15 +312,14 @@ class gmgn:
         """
         Gets security info about the token.
         """
-        self.randomiseRequest()
         if not contractAddress:
             return "You must input a contract address."
         
         url = f"{self.BASE_URL}/v1/tokens/security/sol/{contractAddress}"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getSecurityInfo", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getSecurityInfo", request)['data']
 
         return jsonResponse
     
@@ -242,7 +329,6 @@ class gmgn:
 
         Period - 7d, 30d - The timeframe of the wallet you're checking.
         """
-        self.randomiseRequest()
         periods = ["7d", "30d"]
 
         if not walletAddress:
@@ -252,8 +338,8 @@ class gmgn:
         
         url = f"{self.BASE_URL}/v1/smartmoney/sol/walletNew/{walletAddress}?period={period}"
 
-        request = self.sendRequest.get(url, headers=self.headers)
+        request = self._get("getWalletInfo", url)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = self._decode("getWalletInfo", request)['data']
 
         return jsonResponse
@@ -0,0 +1,115 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib decoder is used instead
+    orjson = None
+
+# Fields the analyzers read, per endpoint, applied to the "data" payload of the response.
+# A key maps to None (keep the value as is) or to a nested projection; lists are projected item by item.
+RANK_ENTRY = {
+    'wallet_address': None,
+    'realized_profit': None,
+    'winrate_7d': None,
+    'buy': None,
+    'sell': None,
+    'last_active': None,
+    'risk': {'token_honeypot_ratio': None, 'fast_tx_ratio': None},
+}
+
+DEFAULT_PROJECTIONS = {
+    'getTrendingWallets': {'rank': RANK_ENTRY},
+    'getWalletInfo': {
+        'wallet_address': None,
+        'winrate': None,
+        'realized_profit': None,
+        'buy': None,
+        'sell': None,
+        'last_active_timestamp': None,
+        # trades are compacted into TradeRecord slots anyway, projecting every item would cost more than it saves
+        'trades': None,
+    },
+    'getTokenInfo': {'token': {
+        'address': None,
+        'symbol': None,
+        'price': None,
+        'liquidity': None,
+        'holder_count': None,
+        'market_cap': None,
+    }},
+    'getSecurityInfo': {
+        'address': None,
+        'is_honeypot': None,
+        'renounced_mint': None,
+        'renounced_freeze_account': None,
+        'top_10_holder_rate': None,
+    },
+}
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def loads(content: bytes):
+    """
+    Decodes JSON straight from the response bytes, with orjson when it is installed.
+
+    Falls back to the stdlib for what orjson refuses (e.g. integers beyond 64 bits).
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content)
+
+
+def compileProjection(projection):
+    """
+    Turns a projection into a function applying it.
+
+    Flat levels become a single dict comprehension, which is what keeps projecting cheaper than keeping the full payload.
+    """
+    if projection is None:
+        return None
+    flat = tuple(key for key, sub in projection.items() if sub is None)
+    nested = tuple((key, compileProjection(sub)) for key, sub in projection.items() if sub is not None)
+
+    def apply(value):
+        if isinstance(value, list):
+            return [apply(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        projected = {key: value[key] for key in flat if key in value}
+        for key, sub in nested:
+            if key in value:
+                projected[key] = sub(value[key])
+        return projected
+
+    return apply
+
+
+_compiled = {}
+
+
+def project(value, projection):
+    """
+    Keeps only the projected fields of a decoded value, recursively.
+    """
+    if projection is None:
+        return value
+    apply = _compiled.get(id(projection))
+    if apply is None or apply[0] is not projection:
+        apply = _compiled[id(projection)] = (projection, compileProjection(projection))
+    return apply[1](value)
+
+
+def decode(content: bytes, projection: dict = None):
+    """
+    Decodes a gmgn response and projects its "data" payload.
+    """
+    document = loads(content)
+    if projection is not None and isinstance(document, dict) and 'data' in document:
+        document['data'] = project(document['data'], projection)
+    return document
@@ -0,0 +1,204 @@
+import sqlite3
+import threading
+import time
+from gmgn.transport import Response
+
+# (fresh, stale) seconds per endpoint. A fresh entry is served as is, a stale one is served
+# while a background request refreshes it, anything older is refetched.
+ENDPOINT_FRESHNESS = {
+    'getTrendingWallets': (120, 900),
+    'getWalletInfo': (300, 3600),
+    'getTokenInfo': (6 * 3600, 24 * 3600),
+    'getSecurityInfo': (3600, 6 * 3600),
+    'getTopBuyers': (60, 600),
+    'getTokenUsdPrice': (5, 30),
+    'getNewPairs': (30, 120),
+    'getTrendingTokens': (60, 300),
+    'getTokensByCompletion': (30, 120),
+    'findSnipedTokens': (30, 120),
+    'getGasFee': (30, 120),
+}
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class SQLiteCache:
+    """
+    A persistent response cache backed by a local SQLite file.
+
+    Entries are keyed by url (i.e. endpoint and parameters) and survive between runs.
+    The file is kept under `maxBytes` by evicting the least recently used entries.
+
+    Usage\n
+    client = gmgn(diskCache=SQLiteCache("gmgn_cache.sqlite"))\n
+    """
+
+    def __init__(self, path: str = "gmgn_cache.sqlite", maxBytes: int = 64 * 1024 * 1024, freshness: dict = None, staleWhileRevalidate: bool = True):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.freshness = dict(ENDPOINT_FRESHNESS if freshness is None else freshness)
+        self.staleWhileRevalidate = staleWhileRevalidate
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._lock = threading.Lock()
+        self._refreshing = {}
+        self._totalBytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        self.hits = 0
+        self.staleHits = 0
+        self.misses = 0
+        self.bytesSaved = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._hitAgeTotal = 0.0
+        self._hitAgeMax = 0.0
+
+    def lookup(self, endpoint: str, key: str):
+        """
+        Returns (response, age, state) for a cached entry, state being fresh or stale, or None.
+        """
+        fresh, stale = self.freshness.get(endpoint, (0, 0))
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT status, body, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            status, body, storedAt = row
+            age = now - storedAt
+            if age > fresh + stale:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        return Response(status, bytes(body), url=key), age, FRESH if age <= fresh else STALE
+
+    def store(self, endpoint: str, key: str, response: Response) -> None:
+        body = response.content
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, status, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, response.status_code, sqlite3.Binary(body), len(body), now, now)
+            )
+            self._totalBytes += len(body) - (previous[0] if previous else 0)
+            if self._totalBytes > self.maxBytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until we are back under 90% of the budget
+        target = self.maxBytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._totalBytes <= target:
+                break
+            doomed.append((key,))
+            self._totalBytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def fetch(self, endpoint: str, key: str, loader):
+        """
+        Returns the cached response for key, calling loader() when it is missing or too old.
+
+        Stale entries are returned straight away and refreshed by loader() in the background.
+        """
+        if endpoint not in self.freshness:
+            return loader()
+
+        cached = self.lookup(endpoint, key)
+        if cached is not None:
+            response, age, state = cached
+            if state == FRESH or self.staleWhileRevalidate:
+                with self._lock:
+                    self.hits += 1
+                    self.bytesSaved += len(response.content)
+                    self._hitAgeTotal += age
+                    self._hitAgeMax = max(self._hitAgeMax, age)
+                    if state == STALE:
+                        self.staleHits += 1
+                if state == STALE:
+                    self._revalidate(endpoint, key, loader)
+                return response
+
+        with self._lock:
+            self.misses += 1
+        response = loader()
+        if response.status_code == 200:
+            self.store(endpoint, key, response)
+        return response
+
+    def _revalidate(self, endpoint: str, key: str, loader) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=self._refresh, args=(endpoint, key, loader), name="gmgn-revalidate", daemon=True)
+            self._refreshing[key] = thread
+            self.revalidations += 1
+        thread.start()
+
+    def _refresh(self, endpoint: str, key: str, loader) -> None:
+        try:
+            response = loader()
+            if response.status_code == 200:
+                self.store(endpoint, key, response)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def wait(self, timeout: float = None) -> None:
+        """
+        Waits for the background refreshes still in flight.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._refreshing.values())
+            if not pending:
+                return
+            for thread in pending:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*), MIN(stored_at) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries[0],
+                'bytes': self._totalBytes,
+                'max_bytes': self.maxBytes,
+                'hits': self.hits,
+                'stale_hits': self.staleHits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'bytes_saved': self.bytesSaved,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+                'avg_hit_age': round(self._hitAgeTotal / self.hits, 1) if self.hits else 0.0,
+                'max_hit_age': round(self._hitAgeMax, 1),
+                'oldest_entry_age': round(time.time() - entries[1], 1) if entries[1] else 0.0
+            }
+
+    def close(self, timeout: float = 10.0) -> None:
+        self.wait(timeout)
+        with self._lock:
+            self._db.close()
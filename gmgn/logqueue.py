@@ -0,0 +1,32 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def startQueueLogging(handlers: list = None, level: int = logging.INFO, fmt: str = DEFAULT_FORMAT) -> QueueListener:
+    """
+    Routes the root logger through a QueueHandler, so worker threads only enqueue records
+    and the file/console writes happen on the listener's thread.
+
+    Handlers - Where records end up, defaults to a console handler.
+    Level - Root logger level, records below it are dropped before being formatted.
+
+    Call stop() on the returned listener before exiting, it drains the queue.
+    """
+    handlers = handlers or [logging.StreamHandler()]
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds (bytes) of the response size histogram buckets
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts plus sum/count/min/max, the way Prometheus histograms are exported.
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'low', 'high')
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile from the buckets (upper bound of the bucket it falls in).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self.high) if index < len(self.bounds) else self.high
+        return self.high
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'avg': round(self.total / self.count, 6) if self.count else 0.0,
+            'min': self.low or 0.0,
+            'max': self.high or 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms of the client and the analyzers built on it.
+
+    Calls - endpoint method calls, including the ones served from a cache.
+    Requests - requests that actually went through the transport, with their latency, size and status.
+    Stages - wall time of named pipeline stages, and the CPU time of the thread running them, see timeStage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.startedAt = time.time()
+        self.calls = {}
+        self.requests = {}
+        self.statuses = {}
+        self.errors = {}
+        self.latency = {}
+        self.sizes = {}
+        self.stages = {}
+        self.stageCpu = {}
+
+    def observeCall(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def observeRequest(self, endpoint: str, seconds: float, size: int = 0, status: int = None, error: str = None):
+        """
+        Records one request sent through the transport.
+
+        Status - HTTP status of the response, None when the request raised.
+        Error - Exception class name when the request raised.
+        """
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            if status is not None:
+                key = (endpoint, str(status))
+                self.statuses[key] = self.statuses.get(key, 0) + 1
+                self.sizes.setdefault(endpoint, Histogram(SIZE_BUCKETS)).observe(size)
+            if error is not None:
+                key = (endpoint, error)
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def observeStage(self, stage: str, seconds: float, cpuSeconds: float = None):
+        with self._lock:
+            self.stages.setdefault(stage, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            if cpuSeconds is not None:
+                self.stageCpu.setdefault(stage, Histogram(LATENCY_BUCKETS)).observe(cpuSeconds)
+
+    @contextmanager
+    def timeStage(self, stage: str):
+        """
+        Times the body of a with block as one run of a stage, in wall time and CPU time of the calling thread.
+
+        Work the stage hands to other threads is only in their own stages' CPU time.
+        """
+        started = time.perf_counter()
+        startedCpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observeStage(stage, time.perf_counter() - started, time.thread_time() - startedCpu)
+
+    def summary(self) -> dict:
+        """
+        Gets everything as a JSON-serializable dict, per endpoint and per stage.
+        """
+        with self._lock:
+            endpoints = {}
+            for endpoint in sorted(set(self.calls) | set(self.requests)):
+                endpoints[endpoint] = {
+                    'calls': self.calls.get(endpoint, 0),
+                    'requests': self.requests.get(endpoint, 0),
+                    'statuses': {status: count for (name, status), count in sorted(self.statuses.items()) if name == endpoint},
+                    'errors': {error: count for (name, error), count in sorted(self.errors.items()) if name == endpoint},
+                    'latency_seconds': self.latency[endpoint].summary() if endpoint in self.latency else None,
+                    'response_bytes': self.sizes[endpoint].summary() if endpoint in self.sizes else None
+                }
+            return {
+                'started_at': self.startedAt,
+                'elapsed_seconds': round(time.time() - self.startedAt, 3),
+                'endpoints': endpoints,
+                'stages': {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+                'stage_cpu': {stage: histogram.summary() for stage, histogram in sorted(self.stageCpu.items())}
+            }
+
+    def _histogramLines(self, name: str, labelName: str, histograms: dict) -> list:
+        lines = [f"# TYPE {name} histogram"]
+        for label, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labelName}="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labelName}="{label}"}} {histogram.total}')
+            lines.append(f'{name}_count{{{labelName}="{label}"}} {histogram.count}')
+        return lines
+
+    def toPrometheus(self) -> str:
+        """
+        Gets the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = ["# TYPE gmgn_calls_total counter"]
+            lines += [f'gmgn_calls_total{{endpoint="{endpoint}"}} {count}' for endpoint, count in sorted(self.calls.items())]
+            lines.append("# TYPE gmgn_requests_total counter")
+            lines += [f'gmgn_requests_total{{endpoint="{endpoint}"}} {count}' for endpoint, count in sorted(self.requests.items())]
+            lines.append("# TYPE gmgn_responses_total counter")
+            lines += [f'gmgn_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+                      for (endpoint, status), count in sorted(self.statuses.items())]
+            lines.append("# TYPE gmgn_errors_total counter")
+            lines += [f'gmgn_errors_total{{endpoint="{endpoint}",error="{error}"}} {count}'
+                      for (endpoint, error), count in sorted(self.errors.items())]
+            lines += self._histogramLines("gmgn_request_duration_seconds", "endpoint", self.latency)
+            lines += self._histogramLines("gmgn_response_size_bytes", "endpoint", self.sizes)
+            lines += self._histogramLines("gmgn_stage_duration_seconds", "stage", self.stages)
+            lines += self._histogramLines("gmgn_stage_cpu_seconds", "stage", self.stageCpu)
+        return "\n".join(lines) + "\n"
+
+    def export(self, prefix: str = "gmgn_metrics"):
+        """
+        Writes <prefix>.prom (Prometheus text, e.g. for the node exporter textfile collector) and <prefix>.json.
+        """
+        for path, data in ((prefix + ".prom", self.toPrometheus()), (prefix + ".json", json.dumps(self.summary(), indent=2))):
+            # Written next to the target and renamed, so a scraper never reads a half-written file
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as f:
+                f.write(data)
+            os.replace(temporary, path)
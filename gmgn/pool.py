@@ -0,0 +1,212 @@
+import random
+import threading
+from gmgn.useragents import randomUserAgent
+
+ROTATE_ROUND_ROBIN = "round_robin"
+ROTATE_EVERY_N = "every_n"
+ROTATE_ON_FAILURE = "on_failure"
+
+ROTATION_POLICIES = (ROTATE_ROUND_ROBIN, ROTATE_EVERY_N, ROTATE_ON_FAILURE)
+
+
+_identifiers = None
+
+
+def browserIdentifiers() -> list:
+    """
+    Lists the tls_client identifiers we are willing to impersonate (built once, tls_client is imported on first use).
+    """
+    global _identifiers
+    if _identifiers is None:
+        import tls_client
+        _identifiers = [browser for browser in tls_client.settings.ClientIdentifiers.__args__ if browser.startswith(('chrome', 'safari', 'firefox', 'opera'))]
+    return list(_identifiers)
+
+
+def buildHeaders(identifier: str) -> dict:
+    """
+    Builds the request headers (with a matching user agent) for a tls_client identifier.
+    """
+    parts = identifier.split('_')
+    browser, version, *rest = parts
+
+    os = 'windows'
+    if browser == 'opera':
+        browser = 'chrome'
+    elif version in ('ios', 'ipad'):
+        os = 'ios'
+    elif browser == 'safari':
+        os = 'macos'
+
+    user_agent = randomUserAgent(browser, os)
+
+    return {
+        'Host': 'gmgn.ai',
+        'accept': 'application/json, text/plain, */*',
+        'accept-language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
+        'dnt': '1',
+        'priority': 'u=1, i',
+        'referer': 'https://gmgn.ai/?chain=sol',
+        'user-agent': user_agent
+    }
+
+
+class PooledSession:
+    """
+    A warm tls_client session with its own fingerprint and headers.
+
+    The underlying connection is kept alive between requests, so only the
+    first request on a freshly built session pays for the TLS handshake.
+    """
+
+    def __init__(self, identifier: str):
+        import tls_client
+        self.identifier = identifier
+        self.session = tls_client.Session(random_tls_extension_order=True, client_identifier=identifier)
+        self.headers = buildHeaders(identifier)
+        self.requests = 0
+        self.failures = 0
+        # Requests currently sent on the session, a retired session is closed by the last one
+        self.users = 0
+        self.retired = False
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, headers=self.headers, **kwargs)
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+
+class SessionPool:
+    """
+    A fixed set of warm sessions shared by every request of a gmgn client.
+
+    Rotation policies\n
+    round_robin = Move to the next session on every request\n
+    every_n = Stay on a session for `rotate_every` requests, then move on\n
+    on_failure = Stay on a session until a request fails, then rebuild it with a new fingerprint\n
+
+    A reported failure always rebuilds the session it was sent on, whatever the policy. Every
+    acquire() is paired with a release(), so a session other threads are still using is only
+    closed once they are done with it.
+    """
+
+    def __init__(self, size: int = 4, policy: str = ROTATE_ROUND_ROBIN, rotate_every: int = 10):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        if policy not in ROTATION_POLICIES:
+            raise ValueError(f"Unknown rotation policy '{policy}', expected one of {ROTATION_POLICIES}.")
+
+        self.size = size
+        self.policy = policy
+        self.rotate_every = max(1, rotate_every)
+        self._slots = [None] * size
+        self._current = 0
+        self._served = 0
+        self._lock = threading.Lock()
+        self._identifiers = None
+
+        self.handshakes = 0
+        self.reuses = 0
+        self.rotations = 0
+        self.rebuilds = 0
+
+    def _newSession(self) -> PooledSession:
+        if self._identifiers is None:
+            self._identifiers = browserIdentifiers()
+        return PooledSession(random.choice(self._identifiers))
+
+    def warm(self) -> None:
+        """
+        Builds every session of the pool up front.
+        """
+        with self._lock:
+            for index, slot in enumerate(self._slots):
+                if slot is None:
+                    self._slots[index] = self._newSession()
+
+    def acquire(self) -> PooledSession:
+        """
+        Picks the session for the next request according to the rotation policy.
+        """
+        with self._lock:
+            if self.policy == ROTATE_ROUND_ROBIN and self._served:
+                self._advance()
+            elif self.policy == ROTATE_EVERY_N and self._served >= self.rotate_every:
+                self._advance()
+
+            slot = self._slots[self._current]
+            if slot is None:
+                slot = self._slots[self._current] = self._newSession()
+
+            if slot.requests:
+                self.reuses += 1
+            else:
+                self.handshakes += 1
+
+            slot.requests += 1
+            slot.users += 1
+            self._served += 1
+            return slot
+
+    def release(self, slot: PooledSession) -> None:
+        """
+        Hands back a session once its request is done, closing it if it was retired meanwhile.
+        """
+        with self._lock:
+            slot.users -= 1
+            close = slot.retired and not slot.users
+        if close:
+            slot.close()
+
+    def _advance(self) -> None:
+        self._current = (self._current + 1) % self.size
+        self._served = 0
+        self.rotations += 1
+
+    def reportFailure(self, slot: PooledSession) -> None:
+        """
+        Retires a session that failed a request, its slot is rebuilt with a fresh fingerprint.
+
+        The session is closed once no request is using it anymore (see release).
+        """
+        with self._lock:
+            slot.failures += 1
+            for index, current in enumerate(self._slots):
+                if current is slot:
+                    self._slots[index] = None
+                    self.rebuilds += 1
+                    if index == self._current:
+                        self._advance()
+                    break
+            slot.retired = True
+            close = not slot.users
+        if close:
+            slot.close()
+
+    def stats(self) -> dict:
+        """
+        Returns the reuse/handshake counters of the pool.
+        """
+        with self._lock:
+            total = self.handshakes + self.reuses
+            return {
+                'size': self.size,
+                'policy': self.policy,
+                'requests': total,
+                'handshakes': self.handshakes,
+                'reuses': self.reuses,
+                'reuse_ratio': round(self.reuses / total, 3) if total else 0.0,
+                'rotations': self.rotations,
+                'rebuilds': self.rebuilds
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            slots, self._slots = self._slots, [None] * self.size
+        for slot in slots:
+            if slot is not None:
+                slot.close()
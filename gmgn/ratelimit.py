@@ -0,0 +1,77 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket shared by every caller of a gmgn client.
+
+    Rate - Tokens added per second, i.e. the sustained request rate.
+    Burst - How many tokens the bucket holds, i.e. how many requests may go out back to back.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = float(rate)
+        self.burst = float(burst if burst else max(1, int(rate)))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def setRate(self, rate: float, burst: float = None) -> None:
+        """
+        Changes the sustained rate (and optionally the burst) without losing the tokens already earned.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if burst is not None:
+                self.burst = float(burst)
+                self._tokens = min(self._tokens, self.burst)
+
+    def tryAcquire(self, tokens: float = 1.0) -> bool:
+        """
+        Takes tokens if they are available right now.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks until tokens are available and returns how long we waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired += 1
+                    self.waited += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'waited': round(self.waited, 3)
+            }
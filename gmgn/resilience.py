@@ -0,0 +1,315 @@
+import random
+import threading
+import time
+from gmgn.ratelimit import TokenBucket
+from gmgn.transport import Response
+
+OK = "ok"
+RATE_LIMITED = "rate_limited"
+CHALLENGE = "challenge"
+SERVER_ERROR = "server_error"
+CLIENT_ERROR = "client_error"
+NETWORK_ERROR = "network_error"
+
+# Outcomes worth retrying, and the ones that mean we are going too fast
+TRANSIENT = (RATE_LIMITED, CHALLENGE, SERVER_ERROR, NETWORK_ERROR)
+THROTTLED = (RATE_LIMITED, CHALLENGE)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CHALLENGE_MARKERS = (b"Just a moment...", b"cf-chl", b"challenge-platform", b"Attention Required! | Cloudflare")
+
+
+class GmgnError(Exception):
+    """
+    Base class of the errors raised by the gmgn client.
+    """
+
+    def __init__(self, message: str, endpoint: str = None, status: int = None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.status = status
+
+
+class RateLimitedError(GmgnError):
+    """
+    The endpoint kept answering 429 Too Many Requests.
+    """
+
+
+class ChallengeError(GmgnError):
+    """
+    The endpoint kept answering with a Cloudflare challenge page instead of JSON.
+    """
+
+
+class ServerError(GmgnError):
+    """
+    The endpoint kept failing with a 5xx status or a network error.
+    """
+
+
+class CircuitOpenError(GmgnError):
+    """
+    The endpoint failed too many times in a row and is not being called until its breaker resets.
+    """
+
+
+ERRORS = {RATE_LIMITED: RateLimitedError, CHALLENGE: ChallengeError, SERVER_ERROR: ServerError, NETWORK_ERROR: ServerError}
+
+
+def classify(response: Response) -> str:
+    """
+    Classifies a response as ok, rate_limited, challenge, server_error or client_error.
+    """
+    status = response.status_code
+    if status == 429:
+        return RATE_LIMITED
+    headers = {key.lower(): value for key, value in (response.headers or {}).items()}
+    head = (response.content or b"")[:4096]
+    if headers.get('cf-mitigated') == 'challenge' or (status in (403, 503) and any(marker in head for marker in CHALLENGE_MARKERS)):
+        return CHALLENGE
+    if status >= 500:
+        return SERVER_ERROR
+    if status >= 400:
+        return CLIENT_ERROR
+    if 'text/html' in headers.get('content-type', '') and any(marker in head for marker in CHALLENGE_MARKERS):
+        return CHALLENGE
+    return OK
+
+
+def retryAfter(response: Response) -> float:
+    """
+    Gets the Retry-After delay of a response in seconds (0 when absent or not in seconds).
+    """
+    for key, value in (response.headers or {}).items():
+        if key.lower() == 'retry-after':
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attempts - Total tries of a request, including the first one.
+    BaseDelay - Backoff ceiling of the first retry, doubled on every retry up to MaxDelay.
+    """
+
+    def __init__(self, attempts: int = 4, baseDelay: float = 0.5, maxDelay: float = 20.0, seed: int = None):
+        self.attempts = max(1, attempts)
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self._random = random.Random(seed)
+
+    def delay(self, attempt: int, serverDelay: float = 0.0) -> float:
+        """
+        Gets how long to wait before retry number `attempt` (1 for the first retry).
+        """
+        ceiling = min(self.maxDelay, self.baseDelay * (2 ** (attempt - 1)))
+        return max(serverDelay, self._random.uniform(0, ceiling))
+
+
+class AdaptiveRate:
+    """
+    Additive increase / multiplicative decrease of a TokenBucket's rate.
+
+    Every success adds Increase / rate, so the rate grows by about Increase per second of
+    successful traffic. A throttled response multiplies it by Decrease, at most once per
+    Cooldown seconds, so a burst of 429s from requests already in flight only counts once.
+    The burst shrinks and grows with the rate, so a lowered rate is not undone by bursts.
+    """
+
+    def __init__(self, bucket: TokenBucket, minRate: float = 0.2, maxRate: float = None, increase: float = 1.0,
+                 decrease: float = 0.7, cooldown: float = 1.0):
+        self.bucket = bucket
+        self.minRate = minRate
+        self.maxRate = maxRate if maxRate is not None else bucket.rate
+        self.maxBurst = bucket.burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._lastDecrease = 0.0
+
+        self.increases = 0
+        self.decreases = 0
+        self.lowest = bucket.rate
+
+    def onSuccess(self) -> None:
+        with self._lock:
+            rate = self.bucket.rate
+            if rate >= self.maxRate:
+                return
+            self._setRate(min(self.maxRate, rate + self.increase / rate))
+            self.increases += 1
+
+    def _setRate(self, rate: float) -> None:
+        self.bucket.setRate(rate, max(1.0, self.maxBurst * rate / self.maxRate))
+
+    def onThrottle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._lastDecrease < self.cooldown:
+                return
+            self._lastDecrease = now
+            rate = max(self.minRate, self.bucket.rate * self.decrease)
+            self._setRate(rate)
+            self.lowest = min(self.lowest, rate)
+            self.decreases += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rate': round(self.bucket.rate, 3),
+                'max_rate': self.maxRate,
+                'lowest_rate': round(self.lowest, 3),
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
+
+
+class CircuitBreaker:
+    """
+    Opens after FailureThreshold consecutive failures, fails fast for ResetTimeout seconds,
+    then lets a single trial request through (half open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failureThreshold: int = 5, resetTimeout: float = 30.0):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.state = CLOSED
+        self.failures = 0
+        self.openedAt = 0.0
+        self.opened = 0
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.openedAt >= self.resetTimeout:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def recordSuccess(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def recordFailure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failureThreshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self.openedAt = time.monotonic()
+                self._trial = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'opened': self.opened, 'rejected': self.rejected}
+
+
+class Resilience:
+    """
+    Retries, adaptive rate and per-endpoint circuit breakers around the requests of a gmgn client.
+
+    Retry - RetryPolicy of transient failures (429, challenge pages, 5xx, network errors).
+    RateLimiter - TokenBucket whose rate is adapted from the 429s we get (AIMD), left alone when None.
+    FailureThreshold - Consecutive failed requests (after their retries) before an endpoint's breaker opens.
+    ResetTimeout - Seconds an open breaker fails fast before letting a trial request through.
+    """
+
+    def __init__(self, retry: RetryPolicy = None, rateLimiter: TokenBucket = None, failureThreshold: int = 5,
+                 resetTimeout: float = 30.0, sleep=time.sleep, **adaptive):
+        self.retry = retry or RetryPolicy()
+        self.adaptive = AdaptiveRate(rateLimiter, **adaptive) if rateLimiter is not None else None
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.sleep = sleep
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+        self.retries = 0
+        self.outcomes = {}
+        self.failed = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.failureThreshold, self.resetTimeout)
+            return self.breakers[endpoint]
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def call(self, endpoint: str, send) -> Response:
+        """
+        Sends a request through send() until it succeeds, fails permanently or runs out of attempts.
+
+        Client errors (4xx other than 429) are returned as is, they would fail the same way again.
+        Raises CircuitOpenError while the endpoint's breaker is open, and RateLimitedError,
+        ChallengeError or ServerError when the retries are exhausted.
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{endpoint} is failing, not called for up to {self.resetTimeout:g}s", endpoint)
+
+        for attempt in range(1, self.retry.attempts + 1):
+            try:
+                response = send()
+                outcome = classify(response)
+                error = None
+            except Exception as e:
+                response, outcome, error = None, NETWORK_ERROR, e
+            self._count(outcome)
+
+            if outcome not in TRANSIENT:
+                breaker.recordSuccess()
+                if self.adaptive is not None:
+                    self.adaptive.onSuccess()
+                return response
+
+            if outcome in THROTTLED and self.adaptive is not None:
+                self.adaptive.onThrottle()
+
+            if attempt == self.retry.attempts:
+                break
+            with self._lock:
+                self.retries += 1
+            self.sleep(self.retry.delay(attempt, retryAfter(response) if response is not None else 0.0))
+
+        breaker.recordFailure()
+        with self._lock:
+            self.failed += 1
+        status = response.status_code if response is not None else None
+        detail = f"status {status}" if error is None else f"{type(error).__name__}: {error}"
+        raise ERRORS[outcome](f"{endpoint} failed after {self.retry.attempts} attempts ({outcome}, {detail})", endpoint, status)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'retries': self.retries,
+                'failed': self.failed,
+                'outcomes': dict(self.outcomes),
+                'breakers': {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()}
+            }
+        if self.adaptive is not None:
+            stats['rate'] = self.adaptive.stats()
+        return stats
@@ -0,0 +1,90 @@
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from gmgn.transport import MockTransport, ReplayTransport
+
+
+class StandInServer:
+    """
+    A local HTTP server speaking the /defi/quotation/v1/... routes of gmgn.ai.
+
+    Responses come from a MockTransport (a ReplayTransport for recordings), so the
+    injected latency and error rates apply to the real network path as well.
+
+    Usage\n
+    server = StandInServer(ReplayTransport("gmgn_recordings.jsonl")).start()\n
+    client = gmgn(baseUrl=server.baseUrl)\n
+    """
+
+    def __init__(self, transport: MockTransport, host: str = "127.0.0.1", port: int = 0):
+        self.transport = transport
+        self.httpd = ThreadingHTTPServer((host, port), self._handlerClass())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def baseUrl(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/defi/quotation"
+
+    def _handlerClass(self):
+        transport = self.transport
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                response = transport.get(self.path)
+                self.send_response(response.status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response.content)))
+                self.end_headers()
+                self.wfile.write(response.content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="gmgn-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded gmgn.ai responses locally.")
+    parser.add_argument("recordings", help="JSON lines file written by RecordingTransport")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses replaced by an error")
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    transport = ReplayTransport(args.recordings, latency=args.latency, jitter=args.jitter, errorRate=args.error_rate, errorStatus=args.error_status)
+    server = StandInServer(transport, host=args.host, port=args.port)
+    print(f"Serving {sum(len(r) for r in transport.routes.values())} recordings on {server.baseUrl}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+from gmgn.pool import SessionPool, ROTATE_ROUND_ROBIN
+from gmgn.decode import loads
+
+
+def routeOf(url: str) -> str:
+    """
+    Strips the scheme and host of a url, e.g. '/defi/quotation/v1/tokens/sol/<address>'.
+
+    Recordings are keyed by route so they can be served whatever the base url is.
+    """
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+class Response:
+    """
+    A transport independent HTTP response.
+    """
+
+    def __init__(self, status_code: int, content: bytes, headers: dict = None, url: str = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return loads(self.content)
+
+
+class Transport:
+    """
+    Sends the GET requests of a gmgn client.
+    """
+
+    def get(self, url: str, endpoint: str = None) -> Response:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class TlsClientTransport(Transport):
+    """
+    The live transport: requests go out through a pool of warm tls_client sessions.
+    """
+
+    def __init__(self, poolSize: int = 4, rotation: str = ROTATE_ROUND_ROBIN, rotateEvery: int = 10):
+        self.pool = SessionPool(size=poolSize, policy=rotation, rotate_every=rotateEvery)
+
+    def get(self, url: str, endpoint: str = None) -> Response:
+        from gmgn.resilience import classify, CHALLENGE  # resilience imports this module
+
+        slot = self.pool.acquire()
+        try:
+            try:
+                request = slot.get(url)
+            except Exception:
+                self.pool.reportFailure(slot)
+                raise
+
+            response = Response(request.status_code, request.content, dict(request.headers or {}), url)
+            # Only a challenge means the fingerprint is burnt, a 429 or a 5xx is retried on the same warm session
+            if classify(response) == CHALLENGE:
+                self.pool.reportFailure(slot)
+            return response
+        finally:
+            self.pool.release(slot)
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Wraps another transport and appends every request/response pair to a JSON lines file.
+
+    Each line holds the route, endpoint, status, latency and body, so the file can be
+    replayed with ReplayTransport or served by gmgn.server.
+    """
+
+    def __init__(self, inner: Transport, path: str = "gmgn_recordings.jsonl"):
+        self.inner = inner
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, endpoint: str = None) -> Response:
+        started = time.perf_counter()
+        response = self.inner.get(url, endpoint)
+        elapsed = time.perf_counter() - started
+
+        line = json.dumps({
+            'route': routeOf(url),
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'elapsed': round(elapsed, 4),
+            'recorded_at': time.time(),
+            'body': response.text
+        })
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+            self.recorded += 1
+
+        return response
+
+    def stats(self) -> dict:
+        stats = dict(self.inner.stats())
+        stats['recorded'] = self.recorded
+        return stats
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class MockTransport(Transport):
+    """
+    Serves responses from a handler instead of the network.
+
+    Handler - Callable taking a route and returning a Response (or None for a 404).
+    Latency - Seconds added to every request, plus up to `jitter` seconds at random.
+    ErrorRate - Share of requests answered with `errorStatus` instead of the handler's response.
+    """
+
+    def __init__(self, handler, latency: float = 0.0, jitter: float = 0.0, errorRate: float = 0.0, errorStatus: int = 429, seed: int = None):
+        self.handler = handler
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.errorStatus = errorStatus
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.errors = 0
+        self.notFound = 0
+
+    def get(self, url: str, endpoint: str = None) -> Response:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.errorRate > 0 and self._random.random() < self.errorRate
+            if failed:
+                self.errors += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if failed:
+            return Response(self.errorStatus, json.dumps({'code': self.errorStatus, 'msg': 'injected error'}).encode(), url=url)
+
+        response = self.handler(routeOf(url))
+        if response is None:
+            with self._lock:
+                self.notFound += 1
+            return Response(404, b'{"code": 404, "msg": "no recording for route"}', url=url)
+
+        response.url = url
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'injected_errors': self.errors,
+                'not_found': self.notFound
+            }
+
+
+class ReplayTransport(MockTransport):
+    """
+    Serves the responses written by RecordingTransport.
+
+    When a route was recorded several times, its responses are served in turn.
+    """
+
+    def __init__(self, path: str = "gmgn_recordings.jsonl", **kwargs):
+        self.routes = loadRecordings(path)
+        self._cursor = {}
+        super().__init__(self._replay, **kwargs)
+
+    def _replay(self, route: str) -> Response:
+        recordings = self.routes.get(route)
+        if not recordings:
+            return None
+        with self._lock:
+            index = self._cursor.get(route, 0)
+            self._cursor[route] = index + 1
+        recording = recordings[index % len(recordings)]
+        return Response(recording['status'], recording['body'].encode())
+
+
+def loadRecordings(path: str) -> dict:
+    """
+    Loads a recordings file into a dictionary of route -> recorded responses.
+    """
+    routes = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            recording = json.loads(line)
+            routes.setdefault(recording['route'], []).append(recording)
+    return routes
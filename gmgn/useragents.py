@@ -0,0 +1,98 @@
+import json
+import os
+import random
+import threading
+
+# Where refreshUserAgents() writes the table, override with the GMGN_USER_AGENTS environment variable
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "gmgn", "user_agents.json")
+
+# Prebuilt table used when there is no cached file, (browser, os) -> user agents
+USER_AGENTS = {
+    "chrome/windows": [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+    ],
+    "firefox/windows": [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:127.0) Gecko/20100101 Firefox/127.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0"
+    ],
+    "safari/macos": [
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15"
+    ],
+    "safari/ios": [
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Mobile/15E148 Safari/604.1",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1"
+    ]
+}
+
+_table = None
+_lock = threading.Lock()
+
+
+def userAgentPath() -> str:
+    return os.environ.get("GMGN_USER_AGENTS", DEFAULT_PATH)
+
+
+def loadUserAgents(path: str = None) -> dict:
+    """
+    Gets the user agent table, loaded once per process from the cached file if there is one,
+    otherwise the prebuilt USER_AGENTS.
+    """
+    global _table
+    with _lock:
+        if _table is None:
+            table = dict(USER_AGENTS)
+            try:
+                with open(path or userAgentPath()) as f:
+                    table.update({key: agents for key, agents in json.load(f).items() if agents})
+            except (OSError, ValueError):
+                pass
+            _table = table
+        return _table
+
+
+def randomUserAgent(browser: str, os: str) -> str:
+    """
+    Picks a user agent for a browser and OS, falling back to Chrome on Windows.
+    """
+    table = loadUserAgents()
+    return random.choice(table.get(f"{browser}/{os}") or table["chrome/windows"])
+
+
+def refreshUserAgents(path: str = None, samples: int = 20) -> dict:
+    """
+    Rebuilds the cached table from fake_useragent (imported only here) and writes it to path.
+    """
+    global _table
+    from fake_useragent import UserAgent
+
+    table = {}
+    for key in USER_AGENTS:
+        browser, os_ = key.split('/')
+        generator = UserAgent(browsers=[browser], os=[os_])
+        agents = {generator.random for _ in range(samples)}
+        table[key] = sorted(agents)
+
+    path = path or userAgentPath()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(table, f, indent=2)
+    os.replace(temporary, path)
+
+    with _lock:
+        _table = dict(USER_AGENTS, **{key: agents for key, agents in table.items() if agents})
+    return table
+
+
+if __name__ == "__main__":
+    written = refreshUserAgents()
+    print(f"Wrote {sum(len(agents) for agents in written.values())} user agents to {userAgentPath()}")
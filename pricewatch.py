@@ -0,0 +1,309 @@
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from records import WalletRecord
+
+
+def held_tokens(records: Iterable[WalletRecord]) -> Dict[str, int]:
+    """
+    Count the tracked wallets holding each token, a wallet holding a token when its latest trade of it is a buy.
+
+    Returns:
+        A dictionary mapping token address to its number of holders.
+    """
+    holders: Dict[str, int] = {}
+    for record in records:
+        latest = {}
+        for trade in record.trades:
+            if trade.token_address and (trade.token_address not in latest or trade.timestamp >= latest[trade.token_address][0]):
+                latest[trade.token_address] = (trade.timestamp or 0, trade.event_type)
+        for token_address, (_, event_type) in latest.items():
+            if event_type == 'buy':
+                holders[token_address] = holders.get(token_address, 0) + 1
+    return holders
+
+
+def caches_prices(client) -> bool:
+    """Whether a gmgn client serves getTokenUsdPrice responses from its in-memory or persistent cache."""
+    cache_ttls = getattr(client, 'cacheTtls', None) or {}
+    if getattr(client, 'cache', None) is not None and 'getTokenUsdPrice' in cache_ttls:
+        return True
+    disk_cache = getattr(client, 'diskCache', None)
+    return disk_cache is not None and 'getTokenUsdPrice' in disk_cache.freshness
+
+
+class WatchedToken:
+    """
+    Price state of a watched token.
+
+    variance is an exponentially weighted estimate of the squared log return per second,
+    the price volatility the refresh interval is derived from.
+    """
+
+    __slots__ = ('token_address', 'holders', 'price', 'updated', 'variance', 'interval', 'next_due',
+                 'generation', 'in_flight', 'fetches', 'errors')
+
+    def __init__(self, token_address: str, holders: int, interval: float, next_due: float):
+        self.token_address = token_address
+        self.holders = holders
+        self.price: Optional[float] = None
+        self.updated: Optional[float] = None
+        self.variance: Optional[float] = None
+        self.interval = interval
+        self.next_due = next_due
+        self.generation = 0
+        self.in_flight = False
+        self.fetches = 0
+        self.errors = 0
+
+    @property
+    def volatility(self) -> Optional[float]:
+        """Standard deviation of the log return over one second."""
+        return math.sqrt(self.variance) if self.variance is not None else None
+
+    def __repr__(self):
+        return f"WatchedToken({self.token_address!r}, price={self.price!r}, interval={self.interval:.2f})"
+
+
+class PriceWatcher:
+    """
+    Keep the USD price of followed tokens fresh, refreshing each one when it is due.
+
+    Tokens sit in a priority queue keyed by their next due time. A token's interval is the time its
+    price is expected to take to move by `target_move` given its observed volatility, shortened for
+    tokens held by many tracked wallets and clamped to [min_interval, max_interval]: hot tokens are
+    refreshed every second or so, flat ones only every few minutes. Due tokens are dispatched most
+    overdue first to up to `max_workers` threads, each taking a token from `budget` first, so the
+    request budget goes to the tokens that need it when there is not enough of it for everyone.
+    """
+
+    def __init__(self, client, budget=None, max_workers: int = 4, min_interval: float = 1.0,
+                 max_interval: float = 300.0, initial_interval: float = 5.0, target_move: float = 0.005,
+                 holder_exponent: float = 0.5, smoothing: float = 0.3,
+                 on_price: Optional[Callable[[str, float, Optional[float]], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the watcher.
+
+        Args:
+            client: gmgn client the prices are fetched with. It must not cache getTokenUsdPrice responses
+                (e.g. build it with cacheTtls={}), cached prices would read as flat tokens.
+            budget: Optional TokenBucket a token is taken from before every price request, e.g. the
+                rate limiter shared with the rest of the analysis (leave it out if it is the client's own).
+            max_workers: Price requests in flight at once.
+            min_interval, max_interval: Bounds of a token's refresh interval in seconds.
+            initial_interval: Interval until a token's volatility has been observed.
+            target_move: Relative price move a refresh should catch (0.005 = 0.5%).
+            holder_exponent: The interval is divided by holders ** holder_exponent.
+            smoothing: Weight of the latest return in the volatility estimate.
+            on_price: Optional callback receiving (token address, price, previous price) after every refresh.
+            clock: Monotonic time source.
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval.")
+        if caches_prices(client):
+            raise ValueError("The client caches getTokenUsdPrice responses, build it without caching them (e.g. cacheTtls={}).")
+        self.client = client
+        self.budget = budget
+        self.max_workers = max(1, max_workers)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = min(max(initial_interval, min_interval), max_interval)
+        self.target_move = target_move
+        self.holder_exponent = holder_exponent
+        self.smoothing = smoothing
+        self.on_price = on_price
+        self.clock = clock
+        self.logger = logging.getLogger("PriceWatcher")
+
+        self.tokens: Dict[str, WatchedToken] = {}
+        self._queue: List = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._slots = threading.Semaphore(self.max_workers)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.fetches = 0
+        self.errors = 0
+        self.lateness: List[float] = []
+
+    def _schedule(self, token: WatchedToken, due: float) -> None:
+        token.next_due = due
+        token.generation += 1
+        heapq.heappush(self._queue, (due, next(self._sequence), token.generation, token))
+        self._condition.notify()
+
+    def interval_for(self, token: WatchedToken) -> float:
+        if token.variance is None:
+            interval = self.initial_interval
+        elif token.variance <= 0:
+            interval = self.max_interval
+        else:
+            interval = self.target_move ** 2 / token.variance
+        interval /= max(1, token.holders) ** self.holder_exponent
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def watch(self, token_address: str, holders: int = 1) -> None:
+        """Start watching a token (due right away), or update the holder count of a watched one."""
+        with self._condition:
+            token = self.tokens.get(token_address)
+            if token is None:
+                token = self.tokens[token_address] = WatchedToken(token_address, holders, self.initial_interval, self.clock())
+                self._schedule(token, token.next_due)
+                return
+            token.holders = holders
+            interval = self.interval_for(token)
+            # More holders can only bring the refresh forward
+            if not token.in_flight and token.updated is not None and token.updated + interval < token.next_due:
+                token.interval = interval
+                self._schedule(token, token.updated + interval)
+
+    def unwatch(self, token_address: str) -> None:
+        with self._condition:
+            token = self.tokens.pop(token_address, None)
+            if token is not None:
+                token.generation += 1
+
+    def sync_holders(self, records: Iterable[WalletRecord]) -> Dict[str, int]:
+        """
+        Watch exactly the tokens the tracked wallets hold, weighted by how many of them hold each one.
+
+        Returns:
+            The holder counts the watch list was synced to.
+        """
+        holders = held_tokens(records)
+        for token_address in [token_address for token_address in self.tokens if token_address not in holders]:
+            self.unwatch(token_address)
+        for token_address, count in holders.items():
+            self.watch(token_address, count)
+        return holders
+
+    def _observe(self, token: WatchedToken, price: Optional[float], now: float) -> None:
+        if price and token.price and token.updated is not None and now > token.updated:
+            sample = math.log(price / token.price) ** 2 / (now - token.updated)
+            token.variance = sample if token.variance is None else (1 - self.smoothing) * token.variance + self.smoothing * sample
+        if price:
+            token.price = price
+        token.updated = now
+        token.interval = self.interval_for(token)
+
+    def refresh(self, token: WatchedToken) -> Optional[float]:
+        """Fetch one token's price and reschedule it."""
+        price, previous = None, token.price
+        try:
+            response = self.client.getTokenUsdPrice(contractAddress=token.token_address)
+            price = float(response.get('usd_price') or 0) if isinstance(response, dict) else 0.0
+            if price <= 0:
+                # No price (dead or unlisted token): back off like a failed fetch instead of polling it at the initial interval
+                self.logger.debug(f"No price for {token.token_address}")
+                price = None
+        except Exception as e:
+            self.logger.debug(f"Error fetching the price of {token.token_address}: {e}")
+
+        with self._condition:
+            now = self.clock()
+            token.fetches += 1
+            self.fetches += 1
+            token.in_flight = False
+            if price is None:
+                token.errors += 1
+                self.errors += 1
+                # Back off a failing or priceless token without touching its volatility estimate
+                token.interval = min(self.max_interval, token.interval * 2)
+            else:
+                self._observe(token, price, now)
+            if self.tokens.get(token.token_address) is token:
+                self._schedule(token, now + token.interval)
+
+        if price and self.on_price is not None:
+            self.on_price(token.token_address, price, previous)
+        return price
+
+    def _next_due(self, timeout: float) -> Optional[WatchedToken]:
+        """Wait up to `timeout` for a token to fall due and take it off the queue."""
+        deadline = self.clock() + timeout
+        with self._condition:
+            while not self._stopped.is_set():
+                now = self.clock()
+                while self._queue and self._queue[0][3].generation != self._queue[0][2]:
+                    heapq.heappop(self._queue)
+                if self._queue and self._queue[0][0] <= now:
+                    due, _, _, token = heapq.heappop(self._queue)
+                    token.in_flight = True
+                    return token
+                if now >= deadline:
+                    return None
+                wait = deadline - now if not self._queue else min(deadline, self._queue[0][0]) - now
+                self._condition.wait(max(0.0, wait))
+        return None
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """
+        Dispatch due tokens until stopped (or for `duration` seconds).
+        """
+        deadline = self.clock() + duration if duration is not None else None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stopped.is_set():
+                remaining = deadline - self.clock() if deadline is not None else 1.0
+                if remaining <= 0:
+                    break
+                # A free slot first, so due tokens wait in the queue in priority order rather than in the executor
+                if not self._slots.acquire(timeout=min(remaining, 1.0)):
+                    continue
+                token = self._next_due(min(remaining, 1.0))
+                if token is None:
+                    self._slots.release()
+                    continue
+                if self.budget is not None:
+                    self.budget.acquire()
+                with self._condition:
+                    self.lateness.append(self.clock() - token.next_due)
+                    del self.lateness[:-4096]
+                executor.submit(self._refresh_slot, token)
+
+    def _refresh_slot(self, token: WatchedToken) -> None:
+        try:
+            self.refresh(token)
+        finally:
+            self._slots.release()
+
+    def start(self) -> None:
+        """Run the dispatcher on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, name="PriceWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self._condition:
+            now = self.clock()
+            intervals = sorted(token.interval for token in self.tokens.values())
+            staleness = sorted(now - token.updated for token in self.tokens.values() if token.updated is not None)
+            lateness = sorted(self.lateness)
+
+            def quantile(values: List[float], q: float) -> Optional[float]:
+                return round(values[min(len(values) - 1, int(q * len(values)))], 3) if values else None
+
+            return {
+                'watched': len(self.tokens),
+                'fetches': self.fetches,
+                'errors': self.errors,
+                'interval_s': {'min': quantile(intervals, 0), 'p50': quantile(intervals, 0.5), 'max': quantile(intervals, 1)},
+                'staleness_s': {'p50': quantile(staleness, 0.5), 'p95': quantile(staleness, 0.95)},
+                'lateness_s': {'p50': quantile(lateness, 0.5), 'p95': quantile(lateness, 0.95)}
+            }
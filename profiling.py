@@ -0,0 +1,358 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+# Where time goes, matched against "path:function" of a frame (paths with forward slashes).
+# A sample goes to the category of its innermost matching frame, except for the sticky
+# categories which win whenever one of their frames is anywhere on the stack. Threads
+# parked with nothing to do (the logging listener, idle pool workers) count as idle.
+CATEGORIES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('idle', ('logging/handlers.py:dequeue', 'concurrent/futures/thread.py:_worker')),
+    ('tls_setup', ('gmgn/pool.py:_newSession', 'gmgn/pool.py:__init__', 'gmgn/pool.py:browserIdentifiers',
+                   'gmgn/pool.py:buildHeaders', 'gmgn/client.py:randomiseRequest', 'gmgn/useragents.py:')),
+    ('logging', ('/logging/', 'gmgn/logqueue.py:')),
+    ('rendering', ('tabulate', 'render.py:', ':print_analysis_output', ':display_wallet_analysis', ':display_progressive')),
+    ('json_decode', ('gmgn/decode.py:', 'orjson', '/json/')),
+    ('rate_limit_wait', ('gmgn/ratelimit.py:',)),
+    ('network', ('gmgn/transport.py:', 'tls_client', '/socket.py:', '/ssl.py:', '/http/', 'gmgn/pool.py:get',
+                 'benchmark.py:handle')),
+    ('retry_backoff', ('gmgn/resilience.py:',)),
+    ('cache', ('gmgn/cache.py:', 'gmgn/diskcache.py:', 'sqlite3')),
+    ('parsing', (':safe_get', 'records.py:', 'walletframe.py:', ':_filter_wallets_python', ':summarize_wallet',
+                 'vetting.py:', 'consensus.py:', 'scan.py:', 'snapshots.py:')),
+    ('analysis', ('smartMoney.py:', 'wallet.py:', 'watch.py:', 'gmgn/client.py:', 'gmgn/metrics.py:')),
+    ('worker_wait', ('/threading.py:', '/concurrent/futures/', '/queue.py:')),
+)
+STICKY = ('tls_setup',)
+
+
+def categorize(key: str) -> Optional[str]:
+    """Category of one "path:function" key, or None."""
+    for category, patterns in CATEGORIES:
+        if any(pattern in key for pattern in patterns):
+            return category
+    return None
+
+
+def categorize_stack(keys: Sequence[str]) -> str:
+    """Category of a stack given innermost frame first."""
+    categories = [categorize(key) for key in keys]
+    for category in STICKY:
+        if category in categories:
+            return category
+    return next((category for category in categories if category is not None), 'other')
+
+
+def _key(filename: str, function: str) -> str:
+    return f"{filename.replace(os.sep, '/')}:{function}"
+
+
+def _label(filename: str, line: int, function: str) -> str:
+    if filename == '~':
+        return function
+    return f"{function} ({os.path.basename(filename)}:{line})"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of every thread at a fixed interval from a background thread.
+
+    Samples are wall-clock: a thread blocked on the network or a lock is counted where it waits,
+    which is what tells network wait and rate limiting apart from CPU work.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Dict[Tuple[Tuple[str, int, str], ...], int] = {}
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack = tuple(stack)
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def write_folded(self, path: str) -> None:
+        """Collapsed stacks, one "outermost;...;innermost count" line per stack (flamegraph.pl / speedscope input)."""
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(";".join(_label(*frame) for frame in reversed(stack)) + f" {count}\n")
+
+    def hot_path(self, top: int = 15) -> Dict:
+        categories: Dict[str, float] = {}
+        own: Dict[str, float] = {}
+        inclusive: Dict[str, float] = {}
+        for stack, count in self.stacks.items():
+            seconds = count * self.interval
+            category = categorize_stack([_key(filename, function) for filename, _, function in stack])
+            categories[category] = categories.get(category, 0.0) + seconds
+            leaf = _label(*stack[0])
+            own[leaf] = own.get(leaf, 0.0) + seconds
+            for label in {_label(*frame) for frame in stack}:
+                inclusive[label] = inclusive.get(label, 0.0) + seconds
+        return _hot_path(categories, own, inclusive, top)
+
+
+def _hot_path(categories: Dict[str, float], own: Dict[str, float], inclusive: Dict[str, float], top: int) -> Dict:
+    def ranked(values: Dict[str, float]) -> List[Tuple[str, float]]:
+        return [(label, round(seconds, 4)) for label, seconds in sorted(values.items(), key=lambda item: -item[1])[:top]]
+    total = sum(categories.values())
+    return {
+        'thread_seconds': round(total, 4),
+        'categories': {category: {'seconds': round(seconds, 4), 'share': round(seconds / total, 4) if total else 0.0}
+                       for category, seconds in sorted(categories.items(), key=lambda item: -item[1])},
+        'self': ranked(own),
+        'cumulative': ranked(inclusive)
+    }
+
+
+def cprofile_hot_path(stats: pstats.Stats, top: int = 15) -> Dict:
+    """
+    Hot path of a cProfile run. A function's own time goes to its category; the time of uncategorized
+    functions (builtins like time.sleep or lock waits) goes to the categories of their callers.
+    """
+    entries = stats.stats
+    resolved: Dict[Tuple, Dict[str, float]] = {}
+
+    def category_of(function: Tuple, depth: int = 0) -> Dict[str, float]:
+        """Shares of the function's own time per category."""
+        if function in resolved:
+            return resolved[function]
+        filename, _, name = function
+        category = categorize(_key(filename, name))
+        if category is not None:
+            return {category: 1.0}
+        callers = entries.get(function, (0, 0, 0, 0, {}))[4]
+        total = sum(caller[2] for caller in callers.values())
+        if depth >= 4 or not total:
+            return {'other': 1.0}
+        shares: Dict[str, float] = {}
+        for caller, timing in callers.items():
+            for parent, share in category_of(caller, depth + 1).items():
+                shares[parent] = shares.get(parent, 0.0) + share * timing[2] / total
+        resolved[function] = shares
+        return shares
+
+    categories: Dict[str, float] = {}
+    own: Dict[str, float] = {}
+    inclusive: Dict[str, float] = {}
+    for function, (_, _, tottime, cumtime, _) in entries.items():
+        label = _label(*function)
+        own[label] = own.get(label, 0.0) + tottime
+        inclusive[label] = max(inclusive.get(label, 0.0), cumtime)
+        for category, share in category_of(function).items():
+            categories[category] = categories.get(category, 0.0) + tottime * share
+    return _hot_path(categories, own, inclusive, top)
+
+
+class Profiler:
+    """
+    Profile a block of code: cProfile or stack sampling across every thread, plus tracemalloc allocation sites.
+
+    Usage\n
+    with Profiler("sample", tracemalloc_top=10) as profiler:\n
+        run()\n
+    profiler.print_summary(profiler.report(metrics))\n
+    """
+
+    def __init__(self, mode: Optional[str] = None, output: str = "gmgn_profile", interval: float = 0.005,
+                 tracemalloc_top: int = 0, top: int = 15):
+        """
+        Args:
+            mode: "cprofile" (deterministic, every call, writes <output>.prof), "sample" (low overhead
+                stack sampling, writes <output>.folded) or None (timers and allocations only).
+            output: Prefix of the files written by report().
+            interval: Seconds between two samples in "sample" mode.
+            tracemalloc_top: Allocation sites to report (0 disables tracemalloc).
+            top: Functions listed in the hot path summary.
+        """
+        if mode not in (None, "cprofile", "sample"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.output = output
+        self.interval = interval
+        self.tracemalloc_top = tracemalloc_top
+        self.top = top
+        self.sampler: Optional[SamplingProfiler] = None
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._peak = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def _profile_thread(self, frame, event, arg) -> None:
+        # Runs once as the profile hook of every new thread and replaces itself with a profiler of that thread
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        if self.tracemalloc_top:
+            tracemalloc.start()
+        if self.mode == "cprofile":
+            self._profiles = [cProfile.Profile()]
+            threading.setprofile(self._profile_thread)
+            self._profiles[0].enable()
+        elif self.mode == "sample":
+            self.sampler = SamplingProfiler(self.interval)
+            self.sampler.start()
+        self._started = time.perf_counter()
+        self._startedCpu = time.process_time()
+
+    def stop(self) -> None:
+        self.wall = time.perf_counter() - self._started
+        self.cpu = time.process_time() - self._startedCpu
+        if self.mode == "cprofile":
+            self._profiles[0].disable()
+            threading.setprofile(None)
+        elif self.sampler is not None:
+            self.sampler.stop()
+        if self.tracemalloc_top:
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _stats(self) -> Optional[pstats.Stats]:
+        if not self._profiles:
+            return None
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:  # a thread that never made a call has no stats
+                continue
+        return stats
+
+    def allocations(self) -> Optional[Dict]:
+        if self._snapshot is None:
+            return None
+        snapshot = self._snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+        def site(frame) -> str:
+            path = os.path.relpath(frame.filename)
+            return f"{frame.filename if path.startswith('..') else path}:{frame.lineno}"
+
+        return {
+            'peak_bytes': self._peak,
+            'top': [{
+                'site': site(stat.traceback[0]),
+                'bytes': stat.size,
+                'blocks': stat.count
+            } for stat in snapshot.statistics('lineno')[:self.tracemalloc_top]]
+        }
+
+    @staticmethod
+    def stage_timers(metrics) -> Dict:
+        """Per stage run count, wall and CPU seconds from a gmgn Metrics."""
+        summary = metrics.summary()
+        cpu = summary.get('stage_cpu', {})
+        return {
+            stage: {
+                'count': wall['count'],
+                'wall_s': round(wall['sum'], 4),
+                'cpu_s': round(cpu[stage]['sum'], 4) if stage in cpu else None
+            } for stage, wall in summary['stages'].items()
+        }
+
+    def report(self, metrics=None) -> Dict:
+        """
+        Write the profile files and gather the summary (also written to <output>.json).
+        """
+        summary = {'mode': self.mode, 'wall_s': round(self.wall, 4), 'cpu_s': round(self.cpu, 4), 'files': []}
+        directory = os.path.dirname(self.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        stats = self._stats() if self.mode == "cprofile" else None
+        if stats is not None:
+            stats.dump_stats(self.output + ".prof")
+            summary['files'].append(self.output + ".prof")
+            summary['hot_path'] = cprofile_hot_path(stats, self.top)
+        elif self.sampler is not None:
+            self.sampler.write_folded(self.output + ".folded")
+            summary['files'].append(self.output + ".folded")
+            summary['hot_path'] = self.sampler.hot_path(self.top)
+            summary['hot_path']['samples'] = self.sampler.samples
+
+        if metrics is not None:
+            summary['stages'] = self.stage_timers(metrics)
+        allocations = self.allocations()
+        if allocations is not None:
+            summary['allocations'] = allocations
+
+        summary['files'].append(self.output + ".json")
+        with open(self.output + ".json", 'w') as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    @staticmethod
+    def print_summary(summary: Dict, out: Optional[TextIO] = None, top: int = 10) -> None:
+        out = out or sys.stderr
+        print(f"\n=== Profile ({summary['mode'] or 'timers'}): {summary['wall_s']:.3f} s wall, {summary['cpu_s']:.3f} s CPU ===", file=out)
+
+        hot_path = summary.get('hot_path')
+        if hot_path:
+            print(f"Where the thread time went ({hot_path['thread_seconds']:.3f} thread-seconds):", file=out)
+            for category, value in hot_path['categories'].items():
+                print(f"  {category:<18}{value['seconds']:>10.3f} s {value['share']:>7.1%}", file=out)
+            print("Hottest functions (self time):", file=out)
+            for label, seconds in hot_path['self'][:top]:
+                print(f"  {seconds:>9.3f} s  {label}", file=out)
+
+        stages = summary.get('stages')
+        if stages:
+            print("Stages (wall / CPU of the running thread):", file=out)
+            for stage, value in stages.items():
+                cpu = f"{value['cpu_s']:.3f}" if value['cpu_s'] is not None else "-"
+                print(f"  {stage:<18} n={value['count']:<6} {value['wall_s']:>9.3f} s / {cpu} s", file=out)
+
+        allocations = summary.get('allocations')
+        if allocations:
+            print(f"Allocations still held (peak {allocations['peak_bytes'] / 2 ** 20:.2f} MiB):", file=out)
+            for site in allocations['top'][:top]:
+                print(f"  {site['bytes'] / 1024:>10.1f} KiB {site['blocks']:>8} blocks  {site['site']}", file=out)
+
+        print(f"Written: {', '.join(summary['files'])}", file=out)
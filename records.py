@@ -0,0 +1,144 @@
+import math
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+def to_number(value) -> float:
+    """
+    Coerce a rank entry value the same way for both WalletAnalyzer engines.
+
+    Missing, None or empty values become 0, numbers and numeric strings are converted,
+    anything else (including infinities and NaN) becomes NaN so the entry can be skipped.
+    """
+    if not value:
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return number if math.isfinite(number) else math.nan
+
+
+class TradeRecord:
+    """One trade of a getWalletInfo response."""
+
+    __slots__ = ('token_address', 'event_type', 'timestamp', 'amount_usd', 'tx_hash')
+
+    def __init__(self, token_address: Optional[str], event_type: Optional[str] = None,
+                 timestamp: float = 0, amount_usd: Optional[float] = None, tx_hash: Optional[str] = None):
+        self.token_address = token_address
+        self.event_type = event_type
+        self.timestamp = timestamp
+        self.amount_usd = amount_usd
+        self.tx_hash = tx_hash
+
+    @classmethod
+    def from_response(cls, trade: Dict) -> "TradeRecord":
+        return cls(
+            trade.get('token_address'),
+            trade.get('event_type') or trade.get('side'),
+            trade.get('timestamp') or 0,
+            trade.get('amount_usd'),
+            trade.get('tx_hash')
+        )
+
+    def key(self) -> Tuple:
+        """Identify the trade across polls (split orders share token, side and second, not the transaction)."""
+        return (self.token_address, self.timestamp, self.event_type, self.tx_hash)
+
+    def to_dict(self) -> Dict:
+        return {
+            'token_address': self.token_address,
+            'event_type': self.event_type,
+            'timestamp': self.timestamp,
+            'amount_usd': self.amount_usd,
+            'tx_hash': self.tx_hash
+        }
+
+    def __repr__(self):
+        return f"TradeRecord({self.token_address!r}, {self.event_type!r}, {self.timestamp!r})"
+
+
+class WalletRecord:
+    """
+    A tracked wallet, with the values already formatted the way they are displayed.
+
+    win_rate, honeypot_ratio and fast_tx_ratio are percentages, last_active is a timestamp.
+    """
+
+    __slots__ = ('wallet_address', 'realized_profit', 'win_rate', 'buy', 'sell', 'last_active',
+                 'honeypot_ratio', 'fast_tx_ratio', 'trades')
+
+    def __init__(self, wallet_address: str, realized_profit=0.0, win_rate=0.0, buy=0, sell=0, last_active=0,
+                 honeypot_ratio=0.0, fast_tx_ratio=0.0, trades: Tuple[TradeRecord, ...] = ()):
+        self.wallet_address = wallet_address
+        self.realized_profit = realized_profit
+        self.win_rate = win_rate
+        self.buy = buy
+        self.sell = sell
+        self.last_active = last_active
+        self.honeypot_ratio = honeypot_ratio
+        self.fast_tx_ratio = fast_tx_ratio
+        self.trades = trades
+
+    @classmethod
+    def from_rank_entry(cls, wallet: Dict) -> "WalletRecord":
+        """Parse a getTrendingWallets rank entry (values are coerced with to_number)."""
+        risk = wallet.get('risk') if isinstance(wallet.get('risk'), dict) else {}
+        last_active = wallet.get('last_active') or 0
+        return cls(
+            wallet.get('wallet_address') or 'N/A',
+            round(to_number(wallet.get('realized_profit')), 2),
+            round(to_number(wallet.get('winrate_7d')) * 100, 1),
+            int(to_number(wallet.get('buy'))),
+            int(to_number(wallet.get('sell'))),
+            last_active if isinstance(last_active, (int, float)) else to_number(last_active),
+            round(to_number(risk.get('token_honeypot_ratio')) * 100, 1),
+            round(to_number(risk.get('fast_tx_ratio')) * 100, 1)
+        )
+
+    @classmethod
+    def from_wallet_info(cls, wallet_address: str, wallet_activity: Dict) -> "WalletRecord":
+        """Parse a getWalletInfo response, keeping only the fields the analysis uses."""
+        winrate = wallet_activity.get('winrate')
+        return cls(
+            wallet_address,
+            wallet_activity.get('realized_profit', 'N/A'),
+            round(float(winrate) * 100, 1) if winrate is not None else 0.0,
+            wallet_activity.get('buy', 'N/A'),
+            wallet_activity.get('sell', 'N/A'),
+            wallet_activity.get('last_active_timestamp', 0),
+            trades=tuple(TradeRecord.from_response(trade) for trade in wallet_activity.get('trades') or ())
+        )
+
+    @property
+    def last_active_display(self) -> str:
+        return datetime.fromtimestamp(self.last_active).strftime('%Y-%m-%d %H:%M')
+
+    def token_addresses(self):
+        return [trade.token_address for trade in self.trades]
+
+    def to_dict(self) -> Dict:
+        """The nested dict layout of wallet_analysis.json."""
+        return {
+            'wallet_address': self.wallet_address,
+            'realized_profit': self.realized_profit,
+            'win_rate': self.win_rate,
+            'trades': {
+                'buy': self.buy,
+                'sell': self.sell
+            },
+            'last_active': self.last_active_display,
+            'risk_metrics': {
+                'honeypot_ratio': self.honeypot_ratio,
+                'fast_tx_ratio': self.fast_tx_ratio
+            }
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, WalletRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"WalletRecord({self.wallet_address!r}, realized_profit={self.realized_profit!r}, win_rate={self.win_rate!r})"
@@ -0,0 +1,111 @@
+import sys
+from typing import Callable, List, Optional, Sequence, TextIO
+from records import WalletRecord
+
+
+class Column:
+    """A fixed-width column: its header, width, alignment ('<' or '>') and how a cell is formatted from (rank, wallet)."""
+
+    __slots__ = ('header', 'width', 'align', 'cell')
+
+    def __init__(self, header: str, width: int, align: str, cell: Callable[[int, WalletRecord], object]):
+        self.header = header
+        self.width = max(width, len(header))
+        self.align = align
+        self.cell = cell
+
+    def format(self, value) -> str:
+        text = str(value)
+        if len(text) > self.width:
+            text = text[:self.width - 1] + "…"
+        return f"{text:{self.align}{self.width}}"
+
+
+class RunningTotals:
+    """Wallet count, total realized profit and average win rate, updated one wallet at a time."""
+
+    __slots__ = ('wallets', 'total_profit', 'win_rate_sum')
+
+    def __init__(self):
+        self.wallets = 0
+        self.total_profit = 0.0
+        self.win_rate_sum = 0.0
+
+    def add(self, wallet: WalletRecord) -> None:
+        self.wallets += 1
+        if isinstance(wallet.realized_profit, (int, float)):
+            self.total_profit += wallet.realized_profit
+        if isinstance(wallet.win_rate, (int, float)):
+            self.win_rate_sum += wallet.win_rate
+
+    @property
+    def average_win_rate(self) -> float:
+        return self.win_rate_sum / self.wallets if self.wallets else 0.0
+
+    def line(self) -> str:
+        return (f"Wallets: {self.wallets} | Total Profit: {self.total_profit:,.2f} SOL | "
+                f"Average Win Rate: {self.average_win_rate:.1f}%")
+
+
+class StreamingTable:
+    """
+    Print wallets as rows of a fixed-width table as soon as they are added.
+
+    Nothing is measured ahead, so the cost of a row does not depend on how many come before or after it.
+    Rows past `limit` are counted in the totals but not printed. On a terminal the running totals are
+    kept on a status line below the last row; the final totals are printed by close().
+    """
+
+    def __init__(self, columns: Sequence[Column], title: Optional[str] = None, limit: Optional[int] = None,
+                 out: Optional[TextIO] = None, live: Optional[bool] = None):
+        self.columns = list(columns)
+        self.title = title
+        self.limit = limit
+        self.out = out or sys.stdout
+        self.live = self.out.isatty() if live is None else live
+        self.totals = RunningTotals()
+        self.rows = 0
+        self._border = "+" + "+".join("-" * (column.width + 2) for column in self.columns) + "+"
+        self._status = False
+        self._started = False
+
+    def _line(self, cells: List[str]) -> str:
+        return "| " + " | ".join(cells) + " |"
+
+    def _write(self, text: str) -> None:
+        if self._status:
+            self.out.write("\r\x1b[K")
+            self._status = False
+        self.out.write(text + "\n")
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        if self.title:
+            self._write(self.title)
+        self._write(self._border)
+        self._write(self._line([f"{column.header:{column.align}{column.width}}" for column in self.columns]))
+        self._write(self._border.replace("-", "="))
+
+    def add(self, wallet: WalletRecord) -> None:
+        """Count a wallet in the totals and print its row (unless the limit was reached)."""
+        self.start()
+        self.totals.add(wallet)
+        if self.limit is None or self.rows < self.limit:
+            self.rows += 1
+            self._write(self._line([column.format(column.cell(self.rows, wallet)) for column in self.columns]))
+        if self.live:
+            self.out.write(("\r\x1b[K" if self._status else "") + self.totals.line())
+            self._status = True
+        self.out.flush()
+
+    def close(self) -> RunningTotals:
+        """Close the table and print the final totals."""
+        self.start()
+        self._write(self._border)
+        if self.rows < self.totals.wallets:
+            self._write(f"Showing the first {self.rows} of {self.totals.wallets} wallets")
+        self._write(self.totals.line())
+        self.out.flush()
+        return self.totals
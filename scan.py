@@ -0,0 +1,157 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+TIMEFRAMES = ("1d", "7d", "30d")
+WALLET_TAGS = ("pump_smart", "smart_degen", "reowned", "snipe_bot")
+
+
+class ListAppearance:
+    """Where a wallet appears in one rank list, with the metrics that list reported."""
+
+    __slots__ = ('timeframe', 'wallet_tag', 'rank', 'realized_profit', 'winrate', 'buy', 'sell')
+
+    def __init__(self, timeframe: str, wallet_tag: str, rank: int, realized_profit=0.0, winrate=0.0, buy=0, sell=0):
+        self.timeframe = timeframe
+        self.wallet_tag = wallet_tag
+        self.rank = rank
+        self.realized_profit = realized_profit
+        self.winrate = winrate
+        self.buy = buy
+        self.sell = sell
+
+    @property
+    def list_name(self) -> str:
+        return f"{self.timeframe}/{self.wallet_tag}"
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ListAppearance({self.list_name!r}, rank={self.rank})"
+
+
+class IndexedWallet:
+    """
+    A wallet of the merged index: every list it appears in, and the rank entry used for analysis.
+
+    The entry kept is the one of the list where the wallet ranks best.
+    """
+
+    __slots__ = ('wallet_address', 'entry', 'appearances')
+
+    def __init__(self, wallet_address: str, entry: Dict, appearances: Optional[List[ListAppearance]] = None):
+        self.wallet_address = wallet_address
+        self.entry = entry
+        self.appearances = appearances or []
+
+    @property
+    def best_rank(self) -> int:
+        return min(appearance.rank for appearance in self.appearances)
+
+    @property
+    def lists(self) -> List[str]:
+        return [appearance.list_name for appearance in self.appearances]
+
+    def to_dict(self) -> Dict:
+        return {
+            'wallet_address': self.wallet_address,
+            'best_rank': self.best_rank,
+            'lists': [appearance.to_dict() for appearance in self.appearances]
+        }
+
+    def __repr__(self):
+        return f"IndexedWallet({self.wallet_address!r}, lists={self.lists})"
+
+
+def merge_rank_lists(rank_lists: Iterable[Tuple[str, str, List[Dict]]]) -> Dict[str, IndexedWallet]:
+    """
+    Merge rank lists into a single index keyed by wallet address.
+
+    Args:
+        rank_lists: (timeframe, wallet tag, rank list) triples, in the order lists should be listed.
+
+    Returns:
+        The index, ordered by best rank across lists (ties keep the order wallets were first seen).
+    """
+    index: Dict[str, IndexedWallet] = {}
+    for timeframe, wallet_tag, rank_list in rank_lists:
+        for rank, entry in enumerate(rank_list, start=1):
+            address = entry.get('wallet_address')
+            if not address:
+                continue
+            appearance = ListAppearance(
+                timeframe, wallet_tag, rank,
+                entry.get('realized_profit') or 0.0,
+                entry.get('winrate_7d') or 0.0,
+                entry.get('buy') or 0,
+                entry.get('sell') or 0
+            )
+            wallet = index.get(address)
+            if wallet is None:
+                index[address] = IndexedWallet(address, entry, [appearance])
+                continue
+            if rank < wallet.best_rank:
+                wallet.entry = entry
+            wallet.appearances.append(appearance)
+
+    ordered = sorted(index.values(), key=lambda wallet: wallet.best_rank)
+    return {wallet.wallet_address: wallet for wallet in ordered}
+
+
+class RankScanner:
+    """Fetch several getTrendingWallets lists concurrently and merge them into one wallet index."""
+
+    def __init__(self, client, timeframes: Sequence[str] = TIMEFRAMES, wallet_tags: Sequence[str] = WALLET_TAGS,
+                 max_workers: int = 4, on_list=None):
+        """
+        Initialize the scanner.
+
+        Args:
+            client: gmgn client (its rate limiter and caches are shared by every list fetch).
+            timeframes: Timeframes to scan.
+            wallet_tags: Wallet tags to scan.
+            max_workers: Lists fetched in parallel.
+            on_list: Optional callback receiving (timeframe, wallet tag, rank list) for every fetched list.
+        """
+        unknown = [timeframe for timeframe in timeframes if timeframe not in TIMEFRAMES] + \
+                  [tag for tag in wallet_tags if tag not in WALLET_TAGS]
+        if unknown:
+            raise ValueError(f"Unknown timeframes or wallet tags: {', '.join(unknown)}")
+        self.client = client
+        self.combinations = [(timeframe, tag) for timeframe in timeframes for tag in wallet_tags]
+        self.max_workers = max(1, max_workers)
+        self.on_list = on_list
+        self.logger = logging.getLogger("RankScanner")
+        self.failed: List[Tuple[str, str]] = []
+
+    def fetch_list(self, combination: Tuple[str, str]) -> List[Dict]:
+        timeframe, wallet_tag = combination
+        try:
+            response = self.client.getTrendingWallets(timeframe=timeframe, walletTag=wallet_tag)
+            return response.get('rank', []) if isinstance(response, dict) else []
+        except Exception as e:
+            self.logger.error(f"Error fetching {timeframe}/{wallet_tag} trending wallets: {e}")
+            self.failed.append(combination)
+            return []
+
+    def scan(self) -> Dict[str, IndexedWallet]:
+        """
+        Fetch every timeframe x tag combination and merge them.
+
+        Returns:
+            The merged index keyed by wallet address, best ranked wallets first.
+        """
+        self.failed = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.combinations) or 1)) as executor:
+            rank_lists = list(executor.map(self.fetch_list, self.combinations))
+
+        fetched = [(timeframe, tag, rank_list) for (timeframe, tag), rank_list in zip(self.combinations, rank_lists)]
+        if self.on_list is not None:
+            for timeframe, tag, rank_list in fetched:
+                self.on_list(timeframe, tag, rank_list)
+
+        index = merge_rank_lists(fetched)
+        appearances = sum(len(rank_list) for rank_list in rank_lists)
+        self.logger.info(f"Scanned {len(self.combinations)} lists: {appearances} appearances, {len(index)} unique wallets")
+        return index
@@ -0,0 +1,359 @@
+import contextlib
+import logging
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from records import WalletRecord
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+class WorkQueue:
+    """
+    A durable work queue of wallet addresses in a local SQLite file, shared by the coordinator and its workers.
+
+    Tasks are keyed by (run id, position in the rank list). A worker leases a batch of pending tasks
+    for `lease_seconds` and renews it as it finishes wallets; tasks whose lease expired, or whose worker
+    died, go back to pending until they have been attempted `max_attempts` times and are marked failed.
+    The connection can be shared by the threads of a worker.
+    """
+
+    def __init__(self, path: str = "gmgn_queue.sqlite", max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                run_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                wallet_address TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                leased_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result BLOB,
+                error TEXT,
+                PRIMARY KEY (run_id, position)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (run_id, state, position)")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def enqueue(self, run_id: str, addresses: Sequence[str]) -> int:
+        """
+        Add the wallets of a run, in rank order. Positions already queued are kept as they are, so a run can be resumed.
+
+        Returns:
+            The number of tasks added.
+        """
+        rows = [(run_id, position, address) for position, address in enumerate(addresses) if address]
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO tasks (run_id, position, wallet_address) VALUES (?, ?, ?)", rows)
+            return self._db.total_changes - before
+
+    def lease(self, run_id: str, worker: str, limit: int = 8, lease_seconds: float = 60.0) -> List[Tuple[int, str]]:
+        """
+        Lease up to `limit` pending tasks, lowest positions first.
+
+        Returns:
+            (position, wallet address) pairs, empty when nothing is pending.
+        """
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT position, wallet_address FROM tasks WHERE run_id = ? AND state = ? ORDER BY position LIMIT ?",
+                (run_id, PENDING, limit)
+            ).fetchall()
+            db.executemany(
+                "UPDATE tasks SET state = ?, worker = ?, leased_until = ?, attempts = attempts + 1 WHERE run_id = ? AND position = ?",
+                [(LEASED, worker, time.time() + lease_seconds, run_id, position) for position, _ in rows]
+            )
+        return rows
+
+    def renew(self, run_id: str, worker: str, lease_seconds: float = 60.0) -> int:
+        """
+        Extend the leases `worker` still holds by `lease_seconds` from now (a heartbeat, so a slow batch is not handed out twice).
+
+        Returns:
+            The number of leases extended.
+        """
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.execute(
+                "UPDATE tasks SET leased_until = ? WHERE run_id = ? AND state = ? AND worker = ?",
+                (time.time() + lease_seconds, run_id, LEASED, worker)
+            )
+            return self._db.total_changes - before
+
+    def complete(self, run_id: str, worker: str, results: Sequence[Tuple[int, Optional[WalletRecord]]]) -> int:
+        """
+        Store the results of leased tasks. Results of a lease that was taken away (expired or requeued) are dropped.
+
+        Returns:
+            The number of results stored.
+        """
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                "UPDATE tasks SET state = ?, result = ?, leased_until = NULL "
+                "WHERE run_id = ? AND position = ? AND state = ? AND worker = ?",
+                [(DONE, pickle.dumps(record), run_id, position, LEASED, worker) for position, record in results]
+            )
+            return self._db.total_changes - before
+
+    def fail(self, run_id: str, worker: str, position: int, error: str) -> None:
+        with self._transaction():
+            self._db.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, leased_until = NULL "
+                "WHERE run_id = ? AND position = ? AND state = ? AND worker = ?",
+                (self.max_attempts, FAILED, PENDING, error, run_id, position, LEASED, worker)
+            )
+
+    def requeue(self, run_id: str, worker: Optional[str] = None, now: Optional[float] = None) -> int:
+        """
+        Put leased tasks back to pending: those of `worker` if given, otherwise those whose lease expired.
+
+        Returns:
+            The number of tasks requeued (including those marked failed after too many attempts).
+        """
+        condition, params = ("worker = ?", (worker,)) if worker is not None else ("leased_until < ?", (now or time.time(),))
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, leased_until = NULL, "
+                f"error = COALESCE(error, 'lease lost') WHERE run_id = ? AND state = ? AND {condition}",
+                (self.max_attempts, FAILED, PENDING, run_id, LEASED) + params
+            )
+            return self._db.total_changes - before
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for state, count in self._db.execute("SELECT state, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY state", (run_id,)):
+            counts[state] = count
+        return counts
+
+    def done_by_worker(self, run_id: str) -> Dict[str, int]:
+        return dict(self._db.execute(
+            "SELECT worker, COUNT(*) FROM tasks WHERE run_id = ? AND state = ? GROUP BY worker ORDER BY worker", (run_id, DONE)
+        ).fetchall())
+
+    def results(self, run_id: str) -> List[Tuple[str, Optional[WalletRecord]]]:
+        """(wallet address, record) of every finished task in rank order, the record being None if the wallet did not qualify."""
+        rows = self._db.execute(
+            "SELECT wallet_address, result FROM tasks WHERE run_id = ? AND state = ? ORDER BY position", (run_id, DONE)
+        )
+        return [(address, pickle.loads(result)) for address, result in rows]
+
+    def failures(self, run_id: str) -> List[Tuple[str, str]]:
+        return self._db.execute(
+            "SELECT wallet_address, error FROM tasks WHERE run_id = ? AND state = ? ORDER BY position", (run_id, FAILED)
+        ).fetchall()
+
+    def clear(self, run_id: str) -> None:
+        with self._transaction():
+            self._db.execute("DELETE FROM tasks WHERE run_id = ?", (run_id,))
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def run_worker(queue_path: str, run_id: str, worker: str, batch_size: int = 8, lease_seconds: float = 60.0,
+               transport_factory: Optional[Callable] = None, log_level: int = logging.WARNING,
+               follower_options: Optional[Dict] = None) -> None:
+    """
+    Worker process: lease batches of wallets and analyze them with a SmartMoneyFollower of its own
+    (own client, sessions, caches and request budget) until nothing is pending. The leases of the
+    batch are renewed every time one of its wallets is finished.
+    """
+    # The parent's queue logging thread does not survive the fork, log straight to stderr instead
+    logging.basicConfig(level=log_level, force=True,
+                        format=f"%(asctime)s [{worker}] %(name)s %(levelname)s: %(message)s")
+    from smartMoney import SmartMoneyFollower
+
+    options = dict(follower_options or {})
+    follower = SmartMoneyFollower(transport=transport_factory() if transport_factory else None, **options)
+    queue = WorkQueue(queue_path)
+
+    def analyze(task: Tuple[int, str]) -> Tuple[int, Optional[WalletRecord], Optional[str]]:
+        position, address = task
+        try:
+            # A failed getWalletInfo must go through queue.fail to be retried, not be stored as a wallet that did not qualify
+            return position, follower.process_wallet({'wallet_address': address}, raise_errors=True), None
+        except Exception as e:
+            return position, None, repr(e)
+        finally:
+            queue.renew(run_id, worker, lease_seconds)
+
+    try:
+        while True:
+            batch = queue.lease(run_id, worker, batch_size, lease_seconds)
+            if not batch:
+                break
+            outcomes = follower.parallel_map(analyze, batch)
+            queue.complete(run_id, worker, [(position, record) for position, record, error in outcomes if error is None])
+            for position, _, error in outcomes:
+                if error is not None:
+                    queue.fail(run_id, worker, position, error)
+    finally:
+        follower.gmgn.close()
+        queue.close()
+
+
+class ShardCoordinator:
+    """
+    Shard the wallets of a run across worker processes through a WorkQueue and merge their results.
+
+    Workers that exit abnormally have their leases requeued and are replaced (up to `max_restarts`
+    times), leases of hung workers are requeued once they expire. Since the queue is durable,
+    a coordinator restarted with the same run id picks up where the previous one stopped.
+    """
+
+    def __init__(self, queue_path: str = "gmgn_queue.sqlite", workers: int = 4, batch_size: int = 8,
+                 lease_seconds: float = 60.0, max_attempts: int = 3, max_restarts: Optional[int] = None,
+                 transport_factory: Optional[Callable] = None, follower_options: Optional[Dict] = None,
+                 poll_interval: float = 0.05, start_method: Optional[str] = None):
+        """
+        Initialize the coordinator.
+
+        Args:
+            queue_path: SQLite file of the work queue.
+            workers: Worker processes.
+            batch_size: Wallets leased at a time by a worker.
+            lease_seconds: Time a worker has to finish its next wallet of a batch before the rest of the batch
+                is handed to another worker.
+            max_attempts: Leases of a wallet before it is given up on.
+            max_restarts: Replacement workers started after crashes (defaults to `workers`).
+            transport_factory: Picklable callable building each worker's transport (the live one when None).
+            follower_options: Keyword arguments of every worker's SmartMoneyFollower
+                (requests_per_second is the budget of each worker).
+            poll_interval: Seconds between checks of the workers and the queue.
+            start_method: multiprocessing start method (the platform default when None).
+        """
+        self.queue_path = queue_path
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.max_restarts = self.workers if max_restarts is None else max_restarts
+        self.transport_factory = transport_factory
+        self.follower_options = dict(follower_options or {})
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context(start_method)
+        self.queue = WorkQueue(queue_path, max_attempts=max_attempts)
+        self.logger = logging.getLogger("ShardCoordinator")
+
+        self.crashes = 0
+        self.requeued = 0
+        self.elapsed = 0.0
+        self.last_run: Optional[str] = None
+
+    def _start(self, run_id: str, slot: int, generation: int):
+        worker = f"{run_id}/w{slot}.{generation}"
+        process = self.context.Process(
+            target=run_worker, name=worker, daemon=True,
+            args=(self.queue_path, run_id, worker, self.batch_size, self.lease_seconds, self.transport_factory,
+                  logging.getLogger().getEffectiveLevel(), self.follower_options)
+        )
+        process.start()
+        return worker, process
+
+    def run(self, addresses: Sequence[str], run_id: Optional[str] = None) -> List[WalletRecord]:
+        """
+        Analyze the wallets on the worker processes.
+
+        Args:
+            addresses: Wallet addresses in rank order.
+            run_id: Id of the run in the queue, reuse it to resume an interrupted run.
+
+        Returns:
+            Records of the qualifying wallets, in rank order.
+        """
+        run_id = run_id or f"run-{int(time.time() * 1000)}-{os.getpid()}"
+        self.last_run = run_id
+        added = self.queue.enqueue(run_id, addresses)
+        self.logger.info(f"Run {run_id}: {added} wallets queued, {self.workers} workers")
+
+        started = time.perf_counter()
+        running, slots = {}, {}
+        generations = [0] * self.workers
+        restarts = 0
+
+        def start(slot: int) -> None:
+            worker, process = self._start(run_id, slot, generations[slot])
+            generations[slot] += 1
+            running[worker] = process
+            slots[worker] = slot
+
+        for slot in range(self.workers):
+            start(slot)
+
+        while True:
+            for worker, process in list(running.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del running[worker]
+                slot = slots.pop(worker)
+                if process.exitcode != 0:
+                    self.crashes += 1
+                    requeued = self.queue.requeue(run_id, worker=worker)
+                    self.requeued += requeued
+                    self.logger.warning(f"Worker {worker} exited with code {process.exitcode}, {requeued} wallets requeued")
+
+            self.requeued += self.queue.requeue(run_id)
+            counts = self.queue.counts(run_id)
+            if not counts[PENDING] and not counts[LEASED]:
+                break
+
+            # Replace crashed workers, or workers that ran out of work before expired leases were requeued
+            if counts[PENDING]:
+                for slot in sorted(set(range(self.workers)) - set(slots.values())):
+                    if restarts >= self.max_restarts:
+                        break
+                    restarts += 1
+                    start(slot)
+                if not running:
+                    self.logger.error(f"Run {run_id}: no restarts left, {counts[PENDING]} wallets still pending")
+                    break
+            time.sleep(self.poll_interval)
+
+        for process in running.values():
+            process.join()
+        self.elapsed = time.perf_counter() - started
+
+        for address, error in self.queue.failures(run_id):
+            self.logger.error(f"Wallet {address} failed: {error}")
+        return [record for _, record in self.queue.results(run_id) if record is not None]
+
+    def stats(self) -> Dict:
+        counts = self.queue.counts(self.last_run) if self.last_run else {}
+        finished = counts.get(DONE, 0)
+        return {
+            'run_id': self.last_run,
+            'workers': self.workers,
+            'tasks': counts,
+            'elapsed_s': round(self.elapsed, 3),
+            'wallets_per_s': round(finished / self.elapsed, 2) if self.elapsed else 0.0,
+            'crashes': self.crashes,
+            'requeued': self.requeued,
+            'done_by_worker': self.queue.done_by_worker(self.last_run) if self.last_run else {}
+        }
+
+    def close(self) -> None:
+        self.queue.close()
@@ -1,18 +1,71 @@
-import httpx
 import logging
-import time
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-from tabulate import tabulate
-from gmgn import gmgn  
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional
+from gmgn import gmgn, TokenBucket, TTLCache, Transport, SQLiteCache, Metrics, startQueueLogging, DEFAULT_PROJECTIONS
+from records import WalletRecord
+from snapshots import SnapshotStore
+from scan import RankScanner, IndexedWallet
+from consensus import ConsensusDetector
+from vetting import TokenVetter, default_stages
+from shards import ShardCoordinator
+from render import Column, StreamingTable
+from streaming import StreamPipeline, StreamStage
 
 
 class SmartMoneyFollower:
     """A class to follow and analyze smart money wallets on Solana."""
 
-    def __init__(self):
-        """Initialize the SmartMoneyFollower with a gmgn_wrapper instance and logger."""
-        self.gmgn = gmgn()
+    def __init__(self, max_workers: int = 1, requests_per_second: float = 5.0, cache_size: int = 4096,
+                 transport: Optional[Transport] = None, base_url: Optional[str] = None, cache_path: Optional[str] = None,
+                 snapshot_store: Optional[SnapshotStore] = None, metrics: Optional[Metrics] = None,
+                 consensus: Optional[ConsensusDetector] = None, vetting: bool = False, project_fields: bool = True,
+                 progressive: bool = False, display_limit: Optional[int] = None, **vetting_thresholds):
+        """
+        Initialize the SmartMoneyFollower with a gmgn_wrapper instance and logger.
+
+        Args:
+            max_workers: Number of wallets analyzed in parallel (1 keeps the serial path).
+            requests_per_second: Request rate allowed by the shared token-bucket limiter.
+            cache_size: Number of token responses kept in the cache shared across wallets.
+            transport: gmgn transport to use instead of the live one (e.g. a ReplayTransport).
+            base_url: gmgn base URL override (e.g. a local gmgn.server stand-in).
+            cache_path: SQLite file persisting responses between runs (disabled when None).
+            snapshot_store: History store receiving every rank list and wallet info response.
+            metrics: Request and stage metrics, shared with the gmgn client (a new one when None).
+            consensus: Detector fed with the trades of every qualifying wallet, signals are logged.
+            vetting: Run tokens through the staged TokenVetter before fetching their info and price.
+            project_fields: Keep only the response fields the analysis reads (gmgn.DEFAULT_PROJECTIONS),
+                turn it off to see full payloads in the DEBUG logs.
+            progressive: Print every qualifying wallet as soon as it is analyzed (in rank order), in fixed-width
+                columns with running totals, instead of one tabulate grid at the end.
+            display_limit: Print at most this many wallets (the totals still cover every wallet).
+            vetting_thresholds: Thresholds of vetting.default_stages (min_liquidity, min_holders, max_top10_rate).
+        """
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = TokenBucket(rate=requests_per_second)
+        self.token_cache = TTLCache(maxsize=cache_size)
+        self.disk_cache = SQLiteCache(cache_path) if cache_path else None
+        self.metrics = metrics or Metrics()
+        self.gmgn = gmgn(rateLimiter=self.rate_limiter, cache=self.token_cache, transport=transport, baseUrl=base_url,
+                         diskCache=self.disk_cache, metrics=self.metrics,
+                         projections=DEFAULT_PROJECTIONS if project_fields else None)
+        self.snapshot_store = snapshot_store
+        self.consensus = consensus
+        self.vetter = TokenVetter(self.gmgn, default_stages(**vetting_thresholds)) if vetting else None
+        # What run_sharded's worker processes are built with
+        self.worker_options = dict(max_workers=self.max_workers, requests_per_second=requests_per_second, cache_size=cache_size,
+                                   base_url=base_url, cache_path=cache_path,
+                                   vetting=vetting, project_fields=project_fields, **vetting_thresholds)
+        self.shard_stats: Dict = {}
+        self.stream_stats: Dict = {}
+        self.progressive = progressive
+        self.display_limit = display_limit
+        self.consensus_signals: List[Dict] = []
+        self.wallet_index: Dict[str, IndexedWallet] = {}
+        self.token_index: Dict[str, List[str]] = {}
+        self.token_evaluations: Dict[str, Tuple[Dict, Dict]] = {}
         self.logger = logging.getLogger("SmartMoneyFollower")
         logging.basicConfig(level=logging.INFO)
 
@@ -29,26 +82,54 @@ class SmartMoneyFollower:
         """
         try:
             response = self.gmgn.getTrendingWallets(timeframe=timeframe, walletTag=wallet_tag)
-            return response.get('rank', [])
+            rank_list = response.get('rank', [])
+            if self.snapshot_store is not None:
+                self.snapshot_store.record_rank(rank_list, timeframe=timeframe, wallet_tag=wallet_tag)
+            return rank_list
         except Exception as e:
             self.logger.error(f"Error fetching top wallets: {e}")
             return []
 
-    def analyze_wallet_activity(self, wallet_address: str, period: str = "7d") -> Dict:
+    def scan_top_wallets(self, timeframes: List[str], wallet_tags: List[str]) -> List[Dict]:
+        """
+        Fetch every timeframe x tag rank list concurrently and merge them by wallet address.
+
+        Args:
+            timeframes: Timeframes to scan.
+            wallet_tags: Wallet tags to scan.
+
+        Returns:
+            One rank entry per unique wallet (from the list where it ranks best), best ranked first.
+            The merged index with every list a wallet appears in is kept in `wallet_index`.
+        """
+        on_list = None
+        if self.snapshot_store is not None:
+            on_list = lambda timeframe, wallet_tag, rank_list: self.snapshot_store.record_rank(rank_list, timeframe=timeframe,
+                                                                                               wallet_tag=wallet_tag)
+        scanner = RankScanner(self.gmgn, timeframes, wallet_tags, max_workers=self.max_workers, on_list=on_list)
+        self.wallet_index = scanner.scan()
+        return [wallet.entry for wallet in self.wallet_index.values()]
+
+    def analyze_wallet_activity(self, wallet_address: str, period: str = "7d", raise_errors: bool = False) -> Dict:
         """
         Analyze recent trading activity of a wallet using the getWalletInfo endpoint.
 
         Args:
             wallet_address: Address of the wallet to analyze.
             period: Time period for wallet analysis (default "7d").
+            raise_errors: Raise fetch errors instead of logging them and returning an empty dictionary.
 
         Returns:
             A dictionary containing wallet activity data.
         """
         try:
             response = self.gmgn.getWalletInfo(walletAddress=wallet_address, period=period)
+            if self.snapshot_store is not None:
+                self.snapshot_store.record_wallet_info(wallet_address, response)
             return response
         except Exception as e:
+            if raise_errors:
+                raise
             self.logger.error(f"Error analyzing wallet activity: {e}")
             return {}
 
@@ -56,27 +137,45 @@ class SmartMoneyFollower:
         """
         Evaluate a token using the getTokenInfo and getTokenUsdPrice endpoints.
 
+        With vetting enabled, the token first goes through the staged checks (security flags,
+        liquidity, ...) and a rejected token costs only the requests of the stages it reached.
+
         Args:
             token_address: Address of the token to evaluate.
 
         Returns:
-            A tuple containing token information and USD price.
+            A tuple containing token information and USD price (both empty if the token was rejected).
         """
+        if self.vetter is not None:
+            with self.metrics.timeStage("token_evaluation"):
+                result = self.vetter.vet(token_address)
+            if not result.passed:
+                return {}, {}
+            return result.payloads['info'], result.payloads['price']
+
         try:
-            token_info = self.gmgn.getTokenInfo(contractAddress=token_address)
-            token_price = self.gmgn.getTokenUsdPrice(contractAddress=token_address)
+            with self.metrics.timeStage("token_evaluation"):
+                token_info = self.gmgn.getTokenInfo(contractAddress=token_address)
+                token_price = self.gmgn.getTokenUsdPrice(contractAddress=token_address)
             return token_info, token_price
         except Exception as e:
             self.logger.error(f"Error evaluating token: {e}")
             return {}, {}
 
-    def print_analysis_output(self, wallets: List[Dict]) -> None:
+    def print_analysis_output(self, wallets: List[WalletRecord]) -> None:
         """
         Print the analysis output in a tabulated format.
 
         Args:
             wallets: List of wallets to print.
         """
+        if self.progressive:
+            table = self.progressive_table()
+            for wallet in wallets:
+                table.add(wallet)
+            table.close()
+            return
+
         headers = [
             "Rank",
             "Wallet Address",
@@ -89,71 +188,445 @@ class SmartMoneyFollower:
 
         for idx, wallet in enumerate(wallets):
             last_active = datetime.utcfromtimestamp(
-                wallet.get('last_active_timestamp', 0)
+                wallet.last_active or 0
             ).strftime('%Y-%m-%d %H:%M:%S')
             table_data.append([
                 idx + 1,
-                wallet.get('wallet_address', 'N/A'),
-                wallet.get('realized_profit', 'N/A'),
-                wallet.get('buy', 'N/A'),
-                wallet.get('sell', 'N/A'),
+                wallet.wallet_address or 'N/A',
+                wallet.realized_profit,
+                wallet.buy,
+                wallet.sell,
                 last_active
             ])
 
+        from tabulate import tabulate
         print(tabulate(table_data, headers=headers, tablefmt="pretty"))
         print("Note: The 'Realized Profit' is represented in SOL.")
 
-    def run_strategy(self) -> None:
+    def progressive_table(self) -> StreamingTable:
+        """The fixed-width table of the progressive output, same columns as the tabulate one."""
+        columns = [
+            Column("Rank", 6, ">", lambda rank, wallet: rank),
+            Column("Wallet Address", 44, "<", lambda rank, wallet: wallet.wallet_address or 'N/A'),
+            Column("Realized Profit (SOL or USD)", 28, ">", lambda rank, wallet: wallet.realized_profit),
+            Column("Buy Transactions", 16, ">", lambda rank, wallet: wallet.buy),
+            Column("Sell Transactions", 17, ">", lambda rank, wallet: wallet.sell),
+            Column("Last Active", 19, "<", lambda rank, wallet: datetime.utcfromtimestamp(
+                wallet.last_active or 0).strftime('%Y-%m-%d %H:%M:%S'))
+        ]
+        return StreamingTable(columns, limit=self.display_limit)
+
+    def iter_map(self, func, items: List) -> Iterator:
+        """
+        Apply func to every item, on up to `max_workers` threads, yielding results in the input order as they are ready.
+        """
+        if self.max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                yield from executor.map(func, items)
+        else:
+            for item in items:
+                yield func(item)
+
+    def parallel_map(self, func, items: List) -> List:
+        """
+        Apply func to every item, on up to `max_workers` threads, keeping the input order.
+        """
+        return list(self.iter_map(func, items))
+
+    def collect(self, func, items: List, on_record: Optional[Callable[[WalletRecord], None]] = None) -> List[WalletRecord]:
+        """
+        Apply func to every item (see iter_map) and keep the records it returns, passing each one to on_record as it arrives.
+        """
+        records = []
+        for record in self.iter_map(func, items):
+            if record is None:
+                continue
+            records.append(record)
+            if on_record is not None:
+                on_record(record)
+        return records
+
+    def summarize_wallet(self, wallet_address: str, wallet_activity: Dict) -> Optional[WalletRecord]:
+        """
+        Log a wallet's activity and keep it if its win rate qualifies.
+
+        Args:
+            wallet_address: Address of the analyzed wallet.
+            wallet_activity: Response of the getWalletInfo endpoint.
+
+        Returns:
+            The wallet record (with its trades) if its win rate qualifies, otherwise None.
+        """
+        # Log wallet activity data vertically (full payloads only at DEBUG, formatting them is not free)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Wallet Activity for {wallet_address}:")
+            for key, value in wallet_activity.items():
+                self.logger.debug(f"{key}: {value}")
+
+        # Filter wallets with a win rate higher than 0.6
+        winrate = wallet_activity.get('winrate', 0)
+        if winrate is None or winrate <= 0.6:
+            return None
+
+        return WalletRecord.from_wallet_info(wallet_address, wallet_activity)
+
+    def fetch_wallet_record(self, wallet_address: str, raise_errors: bool = False) -> Optional[WalletRecord]:
+        """
+        Fetch a wallet's activity and parse it, so the raw response is dropped right away.
+
+        Args:
+            wallet_address: Address of the wallet to analyze.
+            raise_errors: Raise fetch errors instead of treating the wallet as not qualifying.
+
+        Returns:
+            The wallet record if its win rate qualifies, otherwise None.
+        """
+        with self.metrics.timeStage("wallet_info"):
+            wallet_activity = self.analyze_wallet_activity(wallet_address, raise_errors=raise_errors)
+        with self.metrics.timeStage("summarize"):
+            return self.summarize_wallet(wallet_address, wallet_activity)
+
+    def log_token_evaluation(self, token_address: str, token_info: Dict, token_price: Dict) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Token Info for {token_address}: {token_info}")
+            self.logger.debug(f"Token Price for {token_address}: {token_price}")
+
+    def process_wallet(self, wallet: Dict, raise_errors: bool = False) -> Optional[WalletRecord]:
+        """
+        Analyze one ranked wallet and evaluate the tokens it traded.
+
+        Args:
+            wallet: Entry of the trending wallets rank list.
+            raise_errors: Raise getWalletInfo errors instead of treating the wallet as not qualifying.
+
+        Returns:
+            The wallet record if its win rate qualifies, otherwise None.
+        """
+        record = self.fetch_wallet_record(wallet.get('wallet_address'), raise_errors)
+        if record is None:
+            return None
+        return self.enrich_wallet(record)
+
+    def enrich_wallet(self, record: WalletRecord) -> WalletRecord:
+        """
+        Evaluate the tokens traded by a qualifying wallet.
+
+        Args:
+            record: Record of the qualifying wallet.
+
+        Returns:
+            The same record.
+        """
+        for token_address in record.token_addresses():
+            token_info, token_price = self.evaluate_token(token_address)
+            self.log_token_evaluation(token_address, token_info, token_price)
+        return record
+
+    def collect_wallet_records(self, top_wallets: List[Dict],
+                               on_record: Optional[Callable[[WalletRecord], None]] = None) -> List[WalletRecord]:
+        """
+        Phase one of the pipeline: fetch getWalletInfo for every ranked wallet.
+
+        Args:
+            top_wallets: The trending wallets rank list.
+            on_record: Optional callback receiving every qualifying record as soon as it is ready, in rank order.
+
+        Returns:
+            Records of the qualifying wallets in rank order.
+        """
+        addresses = [wallet.get('wallet_address') for wallet in top_wallets]
+        return self.collect(self.fetch_wallet_record, addresses, on_record)
+
+    def stream_wallets(self, addresses: Iterable[str], queue_size: int = 16) -> Iterator[WalletRecord]:
+        """
+        Analyze wallets through a fetch -> filter -> enrich stream (see streaming.StreamPipeline).
+
+        getWalletInfo is fetched by up to `max_workers` threads, parsed and filtered on the win rate,
+        then the tokens of the qualifying wallets are evaluated by up to `max_workers` threads. The
+        stages are connected by queues of `queue_size` items, and a stage whose queue is full waits,
+        so only a bounded number of responses and records are held at any time, whatever the number
+        of wallets or trades. The pipeline stats are kept in `stream_stats`.
+
+        Args:
+            addresses: Addresses of the wallets to analyze, consumed lazily.
+            queue_size: Capacity of the queues between the stages.
+
+        Returns:
+            A generator of the qualifying wallet records in rank order, yielded as they are ready.
+        """
+        def fetch(wallet_address):
+            with self.metrics.timeStage("wallet_info"):
+                return wallet_address, self.analyze_wallet_activity(wallet_address)
+
+        def summarize(fetched):
+            with self.metrics.timeStage("summarize"):
+                return self.summarize_wallet(*fetched)
+
+        stream = StreamPipeline([
+            StreamStage("fetch", fetch, workers=self.max_workers),
+            StreamStage("filter", summarize),
+            StreamStage("enrich", self.enrich_wallet, workers=self.max_workers)
+        ], queue_size=queue_size)
+        try:
+            yield from stream.run(addresses)
+        finally:
+            self.stream_stats = stream.stats()
+
+    def build_token_index(self, records: List[WalletRecord]) -> Dict[str, List[str]]:
+        """
+        Build the deduplicated set of traded tokens with a reverse index of the wallets that traded each one.
+
+        Args:
+            records: Records of the qualifying wallets.
+
+        Returns:
+            A dictionary mapping each token address to the wallets that traded it, in first-seen order.
+        """
+        token_index = {}
+        for record in records:
+            for token_address in record.token_addresses():
+                if not token_address:
+                    continue
+                wallets = token_index.setdefault(token_address, [])
+                if not wallets or wallets[-1] != record.wallet_address:
+                    wallets.append(record.wallet_address)
+        return token_index
+
+    def evaluate_tokens(self, token_addresses: List[str]) -> Dict[str, Tuple[Dict, Dict]]:
+        """
+        Phase two of the pipeline: evaluate every unique token exactly once, in parallel.
+
+        Args:
+            token_addresses: Deduplicated token addresses.
+
+        Returns:
+            A dictionary mapping each token address to its (token information, USD price).
+        """
+        return dict(zip(token_addresses, self.parallel_map(self.evaluate_token, token_addresses)))
+
+    def run_pipeline(self, top_wallets: List[Dict],
+                     on_record: Optional[Callable[[WalletRecord], None]] = None) -> List[WalletRecord]:
+        """
+        Two-phase analysis: gather every wallet first, then evaluate each distinct token once.
+
+        The number of token requests scales with the number of distinct tokens
+        rather than with wallets x trades.
+
+        Args:
+            top_wallets: The trending wallets rank list.
+            on_record: Optional callback receiving every qualifying record once its wallet info is parsed.
+
+        Returns:
+            The qualifying wallet records in rank order.
+        """
+        with self.metrics.timeStage("collect_wallets"):
+            wallet_data = self.collect_wallet_records(top_wallets, on_record)
+
+        self.token_index = self.build_token_index(wallet_data)
+        with self.metrics.timeStage("evaluate_tokens"):
+            self.token_evaluations = self.evaluate_tokens(list(self.token_index))
+        self.logger.info(f"Evaluated {len(self.token_index)} unique tokens traded by {len(wallet_data)} wallets")
+
+        # Join every wallet's trades against the evaluated tokens
+        for record in wallet_data:
+            for token_address in record.token_addresses():
+                token_info, token_price = self.token_evaluations.get(token_address, ({}, {}))
+                self.log_token_evaluation(token_address, token_info, token_price)
+
+        return wallet_data
+
+    def detect_consensus(self, wallet_data: List[WalletRecord]) -> List[Dict]:
+        """
+        Feed the trades of the qualifying wallets to the consensus detector.
+
+        Args:
+            wallet_data: Records of the qualifying wallets.
+
+        Returns:
+            The consensus signals completed by these trades.
+        """
+        if self.consensus is None:
+            return []
+        self.consensus.expire()
+        signals = []
+        for record in wallet_data:
+            signals.extend(self.consensus.add_record(record))
+        for signal in signals:
+            self.logger.info(f"Consensus: {len(signal['wallets'])} wallets bought {signal['token_address']} "
+                             f"within {signal['window_minutes']:g} minutes")
+        return signals
+
+    def fetch_top_wallets(self, timeframes: Optional[List[str]] = None, wallet_tags: Optional[List[str]] = None) -> List[Dict]:
+        """The 1d smart_degen rank list, or the merged scan of the given rank lists."""
+        with self.metrics.timeStage("top_wallets"):
+            if timeframes or wallet_tags:
+                return self.scan_top_wallets(timeframes or ["1d"], wallet_tags or ["smart_degen"])
+            return self.get_top_wallets()
+
+    def report(self, wallet_data: List[WalletRecord], table: Optional[StreamingTable] = None) -> None:
+        """
+        Detect consensus buys, print the analysis output and log the cache and vetting stats.
+
+        With a table the rows were already printed as they came, only its totals are left to print.
+        """
+        self.consensus_signals = self.detect_consensus(wallet_data)
+
+        with self.metrics.timeStage("print"):
+            if table is not None:
+                table.close()
+            else:
+                self.print_analysis_output(wallet_data)
+        self.log_stats()
+
+    def log_stats(self) -> None:
+        """Log the cache and vetting stats."""
+        self.logger.info(f"Token cache: {self.token_cache.stats()}")
+        if self.disk_cache is not None:
+            self.logger.info(f"Response cache: {self.disk_cache.stats()}")
+        if self.vetter is not None:
+            self.logger.info(f"Token vetting: {self.vetter.stats()}")
+
+    def run_stream(self, top_wallets: List[Dict]) -> int:
+        """
+        Analyze the ranked wallets through stream_wallets, printing and feeding the consensus detector
+        with every record as it comes out, so no record outlives its row.
+
+        The rank list is reduced to its addresses first, and the rows are always printed progressively
+        (the tabulate grid would need every record at once).
+
+        Args:
+            top_wallets: The trending wallets rank list, emptied here.
+
+        Returns:
+            The number of qualifying wallets.
+        """
+        addresses = [wallet.get('wallet_address') for wallet in top_wallets]
+        top_wallets.clear()
+        table = self.progressive_table()
+        self.consensus_signals = []
+        count = 0
+        with self.metrics.timeStage("collect_wallets"):
+            for record in self.stream_wallets(addresses):
+                table.add(record)
+                self.consensus_signals.extend(self.detect_consensus([record]))
+                count += 1
+
+        with self.metrics.timeStage("print"):
+            table.close()
+        self.logger.info(f"Stream: {self.stream_stats}")
+        self.log_stats()
+        return count
+
+    def run_strategy(self, pipeline: bool = False, timeframes: Optional[List[str]] = None,
+                     wallet_tags: Optional[List[str]] = None, stream: bool = False) -> None:
         """
         Orchestrate the overall strategy execution.
+
+        Wallets are analyzed by up to `max_workers` threads, all sharing the
+        client's rate limiter. Results are collected in rank order, so the
+        output is the same as the serial path.
+
+        Args:
+            pipeline: Evaluate tokens in a separate, deduplicated stage (see run_pipeline).
+            timeframes, wallet_tags: Scan these rank lists and analyze each unique wallet once
+                (see scan_top_wallets), instead of the 1d smart_degen list only.
+            stream: Analyze the wallets through the bounded-memory stream instead (see run_stream),
+                takes precedence over pipeline.
         """
         try:
             # Step 1: Get top wallets
-            top_wallets = self.get_top_wallets()
+            top_wallets = self.fetch_top_wallets(timeframes, wallet_tags)
             if not top_wallets:
                 self.logger.warning("No top wallets found.")
                 return
 
-            wallet_data = []
-
-            # Step 2: Analyze each wallet's activity
-            for wallet in top_wallets:
-                wallet_address = wallet.get('wallet_address')
-                wallet_activity = self.analyze_wallet_activity(wallet_address)
-
-                # Log wallet activity data vertically
-                self.logger.info(f"Wallet Activity for {wallet_address}:")
-                for key, value in wallet_activity.items():
-                    self.logger.info(f"{key}: {value}")
-
-                # Filter wallets with a win rate higher than 0.6
-                winrate = wallet_activity.get('winrate', 0)
-                if winrate is not None and winrate > 0.6:
-                    wallet_info = {
-                        'wallet_address': wallet_address,
-                        'realized_profit': wallet_activity.get('realized_profit', 'N/A'),
-                        'buy': wallet_activity.get('buy', 'N/A'),
-                        'sell': wallet_activity.get('sell', 'N/A'),
-                        'last_active_timestamp': wallet_activity.get('last_active_timestamp', 0)
-                    }
-
-                    wallet_data.append(wallet_info)
-
-                    # Step 3: Evaluate tokens traded by the wallet
-                    for trade in wallet_activity.get('trades', []):
-                        token_address = trade.get('token_address')
-                        token_info, token_price = self.evaluate_token(token_address)
-                        self.logger.info(f"Token Info for {token_address}: {token_info}")
-                        self.logger.info(f"Token Price for {token_address}: {token_price}")
-
-                    time.sleep(1)  # Rate limiting
-
-            # Step 4: Print the analysis output
-            self.print_analysis_output(wallet_data)
+            if stream:
+                self.run_stream(top_wallets)
+                return
+
+            # Step 2: Analyze each wallet's activity and evaluate its tokens
+            table = self.progressive_table() if self.progressive else None
+            on_record = table.add if table is not None else None
+            if pipeline:
+                wallet_data = self.run_pipeline(top_wallets, on_record)
+            else:
+                wallet_data = self.collect(self.process_wallet, top_wallets, on_record)
+
+            # Step 3: Print the analysis output
+            self.report(wallet_data, table)
         except Exception as e:
             self.logger.error(f"Error running strategy: {e}")
 
+    def run_sharded(self, shards: int, queue_path: str = "gmgn_queue.sqlite", transport_factory=None,
+                    run_id: Optional[str] = None, timeframes: Optional[List[str]] = None,
+                    wallet_tags: Optional[List[str]] = None) -> List[WalletRecord]:
+        """
+        Run the strategy with the wallets sharded across worker processes (see shards.ShardCoordinator).
+
+        The rank lists are fetched here, every worker analyzes its wallets with a SmartMoneyFollower of
+        its own (built like this one: same base URL, response cache, vetting and field projection, with its
+        own `requests_per_second` budget), and the results are merged back in rank order before the
+        consensus detection and the output.
+
+        Args:
+            shards: Worker processes.
+            queue_path: SQLite file of the durable work queue.
+            transport_factory: Picklable callable building each worker's transport (the live one when None).
+            run_id: Id of the run in the queue, reuse it to resume an interrupted run.
+            timeframes, wallet_tags: Rank lists to scan (see run_strategy).
+
+        Returns:
+            The qualifying wallet records in rank order.
+
+        Raises:
+            ValueError: With a snapshot store, whose segment files only take one writer process.
+        """
+        if self.snapshot_store is not None:
+            raise ValueError("Wallet history (snapshot_store / GMGN_HISTORY_DIR) cannot be recorded by sharded runs.")
+
+        top_wallets = self.fetch_top_wallets(timeframes, wallet_tags)
+        if not top_wallets:
+            self.logger.warning("No top wallets found.")
+            return []
+
+        coordinator = ShardCoordinator(queue_path, workers=shards, transport_factory=transport_factory,
+                                       follower_options=self.worker_options)
+        try:
+            with self.metrics.timeStage("collect_wallets"):
+                wallet_data = coordinator.run([wallet.get('wallet_address') for wallet in top_wallets], run_id)
+            self.shard_stats = coordinator.stats()
+        finally:
+            coordinator.close()
+        self.logger.info(f"Shards: {self.shard_stats}")
+
+        self.report(wallet_data)
+        return wallet_data
+
 
 if __name__ == "__main__":
-    follower = SmartMoneyFollower()
-    follower.run_strategy()
+    log_level = getattr(logging, os.environ.get('GMGN_LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    listener = startQueueLogging(level=log_level)
+    history = os.environ.get('GMGN_HISTORY_DIR')
+    snapshot_store = SnapshotStore(history) if history else None
+    consensus_wallets = int(os.environ.get('GMGN_CONSENSUS_WALLETS', '0'))
+    consensus = ConsensusDetector(consensus_wallets, float(os.environ.get('GMGN_CONSENSUS_WINDOW', '30'))) if consensus_wallets else None
+    follower = SmartMoneyFollower(max_workers=int(os.environ.get('GMGN_WORKERS', '1')), cache_path=os.environ.get('GMGN_CACHE_PATH'), snapshot_store=snapshot_store,
+                                  consensus=consensus, vetting=os.environ.get('GMGN_VETTING') == '1',
+                                  project_fields=log_level > logging.DEBUG, progressive=os.environ.get('GMGN_PROGRESSIVE') == '1',
+                                  display_limit=int(os.environ['GMGN_DISPLAY_LIMIT']) if os.environ.get('GMGN_DISPLAY_LIMIT') else None)
+    timeframes = [value for value in os.environ.get('GMGN_SCAN_TIMEFRAMES', '').split(',') if value]
+    wallet_tags = [value for value in os.environ.get('GMGN_SCAN_TAGS', '').split(',') if value]
+    shards = int(os.environ.get('GMGN_SHARDS', '0'))
+    if shards:
+        follower.run_sharded(shards, os.environ.get('GMGN_QUEUE_PATH', 'gmgn_queue.sqlite'), run_id=os.environ.get('GMGN_RUN_ID'),
+                             timeframes=timeframes or None, wallet_tags=wallet_tags or None)
+    else:
+        follower.run_strategy(timeframes=timeframes or None, wallet_tags=wallet_tags or None,
+                              stream=os.environ.get('GMGN_STREAM') == '1')
+    metrics_prefix = os.environ.get('GMGN_METRICS')
+    if metrics_prefix:
+        follower.metrics.export(metrics_prefix)
+    follower.gmgn.close()
+    if snapshot_store is not None:
+        snapshot_store.close()
+    listener.stop()
@@ -0,0 +1,450 @@
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+from scan import TIMEFRAMES, WALLET_TAGS
+
+KIND_RANK = 1
+KIND_WALLET_INFO = 2
+KINDS = {'rank': KIND_RANK, 'wallet_info': KIND_WALLET_INFO}
+
+# Rank lists ("timeframe/tag") a rank row comes from, stored as their position + 1.
+# 0 is no list: wallet info rows, and rank rows written before the list was recorded.
+RANK_LISTS = tuple(f"{timeframe}/{wallet_tag}" for timeframe in TIMEFRAMES for wallet_tag in WALLET_TAGS)
+
+# timestamp, wallet id, kind, rank list, rank, realized profit, winrate, buy, sell, last active
+ROW = struct.Struct('<dIBB2xiddiid')
+# wallet id, row: one pair per row of a sealed segment, sorted by wallet then row (i.e. time)
+PAIR = struct.Struct('<II')
+# wallet id, first pair, pair count: one entry per wallet of a sealed segment, sorted by wallet
+DIRECTORY = struct.Struct('<III')
+
+Snapshot = namedtuple('Snapshot', 'timestamp wallet_address kind rank_list rank realized_profit winrate buy sell last_active')
+
+
+def rank_list_id(timeframe: Optional[str], wallet_tag: Optional[str]) -> int:
+    """Id of a rank list in the rows (0 when it is not one of RANK_LISTS)."""
+    key = f"{timeframe}/{wallet_tag}"
+    return RANK_LISTS.index(key) + 1 if key in RANK_LISTS else 0
+
+
+def rank_list_name(list_id: int) -> Optional[str]:
+    return RANK_LISTS[list_id - 1] if 0 < list_id <= len(RANK_LISTS) else None
+
+
+def _number(value, default=0.0) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class Segment:
+    """
+    One append-only file of fixed-size rows.
+
+    Sealed segments also have a .idx file (wallet/row pairs) and a .dir file (per wallet
+    slice of the pairs), both memory-mapped, plus a small .meta file with the time range.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.rows = size // ROW.size
+        self.min_ts = None
+        self.max_ts = None
+        self.sealed = os.path.exists(self._meta_path)
+        self._data = None
+        self._mapped_rows = 0
+        self._pairs = None
+        self._directory = None
+        # wallet id -> rows, only kept for the active (unsealed) segment
+        self.active_index: Dict[int, List[int]] = {}
+
+        if self.sealed:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.min_ts, self.max_ts, self.rows = meta['min_ts'], meta['max_ts'], meta['rows']
+            return
+        if size % ROW.size:
+            # A crash mid-append left a partial row, drop it or every row appended after it would be misaligned
+            with open(path, 'r+b') as f:
+                f.truncate(self.rows * ROW.size)
+        if self.rows:
+            self._scan()
+
+    @property
+    def _meta_path(self) -> str:
+        return self.path[:-4] + '.meta'
+
+    def _scan(self) -> None:
+        """Rebuild the in-memory index of an active segment (bounded by the segment size)."""
+        data = self.data()
+        for row in range(self.rows):
+            timestamp, wallet_id = ROW.unpack_from(data, row * ROW.size)[:2]
+            self._index_row(row, timestamp, wallet_id)
+
+    def _index_row(self, row: int, timestamp: float, wallet_id: int) -> None:
+        self.active_index.setdefault(wallet_id, []).append(row)
+        self.min_ts = timestamp if self.min_ts is None else min(self.min_ts, timestamp)
+        self.max_ts = timestamp if self.max_ts is None else max(self.max_ts, timestamp)
+
+    def data(self):
+        """Memory map of the rows, remapped when the active segment has grown."""
+        if self._data is None or self._mapped_rows != self.rows:
+            if self._data is not None:
+                self._data.close()
+            with open(self.path, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), self.rows * ROW.size, access=mmap.ACCESS_READ) if self.rows else b''
+            self._mapped_rows = self.rows
+        return self._data
+
+    def row(self, row: int) -> tuple:
+        return ROW.unpack_from(self.data(), row * ROW.size)
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        if self.min_ts is None:
+            return False
+        return (start is None or self.max_ts >= start) and (end is None or self.min_ts <= end)
+
+    def seal(self) -> None:
+        """Write the per-wallet index files and drop the in-memory index."""
+        base = self.path[:-4]
+        with open(base + '.idx', 'wb') as pairs, open(base + '.dir', 'wb') as directory:
+            offset = 0
+            for wallet_id in sorted(self.active_index):
+                rows = self.active_index[wallet_id]
+                pairs.write(b''.join(PAIR.pack(wallet_id, row) for row in rows))
+                directory.write(DIRECTORY.pack(wallet_id, offset, len(rows)))
+                offset += len(rows)
+        with open(self._meta_path + '.tmp', 'w') as f:
+            json.dump({'rows': self.rows, 'min_ts': self.min_ts, 'max_ts': self.max_ts}, f)
+        os.replace(self._meta_path + '.tmp', self._meta_path)
+        self.sealed = True
+        self.active_index = {}
+
+    def _mapped(self, suffix: str):
+        with open(self.path[:-4] + suffix, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def wallets(self) -> List[int]:
+        if not self.sealed:
+            return list(self.active_index)
+        if self._directory is None:
+            self._directory = self._mapped('.dir')
+        return [DIRECTORY.unpack_from(self._directory, entry * DIRECTORY.size)[0]
+                for entry in range(len(self._directory) // DIRECTORY.size)]
+
+    def wallet_rows(self, wallet_id: int) -> List[int]:
+        """Rows of one wallet in time order, found by binary search in the sealed directory."""
+        if not self.sealed:
+            return self.active_index.get(wallet_id, [])
+        if self._directory is None:
+            self._directory = self._mapped('.dir')
+            self._pairs = self._mapped('.idx')
+        if self._pairs is None:
+            self._pairs = self._mapped('.idx')
+
+        low, high = 0, len(self._directory) // DIRECTORY.size
+        while low < high:
+            middle = (low + high) // 2
+            entry_wallet, start, count = DIRECTORY.unpack_from(self._directory, middle * DIRECTORY.size)
+            if entry_wallet < wallet_id:
+                low = middle + 1
+            elif entry_wallet > wallet_id:
+                high = middle
+            else:
+                return [PAIR.unpack_from(self._pairs, (start + index) * PAIR.size)[1] for index in range(count)]
+        return []
+
+    def close(self) -> None:
+        for mapped in (self._data, self._pairs, self._directory):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._data = self._pairs = self._directory = None
+
+
+class SnapshotStore:
+    """
+    Append-only history of getTrendingWallets / getWalletInfo results, indexed by wallet and time.
+
+    Rows are fixed size and appended in time order to segment files of `segment_rows` rows.
+    Full segments are sealed with a per-wallet index, so a wallet's history is found by
+    binary search in each segment that overlaps the requested time range, and older
+    segments are skipped without being read.
+    """
+
+    def __init__(self, directory: str = "snapshots", segment_rows: int = 1 << 18):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._addresses_path = os.path.join(directory, 'addresses.txt')
+        self.addresses: List[str] = []
+        self.wallet_ids: Dict[str, int] = {}
+        if os.path.exists(self._addresses_path):
+            with open(self._addresses_path, 'r+') as f:
+                complete = 0
+                for line in f:
+                    # Same as the rows: an address cut short by a crash is dropped (no row refers to it yet)
+                    if not line.endswith('\n'):
+                        f.truncate(complete)
+                        break
+                    self._register(line[:-1])
+                    complete += len(line.encode())
+        self._addresses_file = open(self._addresses_path, 'a')
+
+        names = sorted(name for name in os.listdir(directory) if name.startswith('seg-') and name.endswith('.dat'))
+        self.segments = [Segment(os.path.join(directory, name)) for name in names]
+        if not self.segments or self.segments[-1].sealed:
+            self._new_segment()
+        self._writer = open(self.segments[-1].path, 'ab')
+
+    def _register(self, address: str) -> int:
+        self.wallet_ids[address] = len(self.addresses)
+        self.addresses.append(address)
+        return self.wallet_ids[address]
+
+    def _wallet_id(self, address: str) -> int:
+        wallet_id = self.wallet_ids.get(address)
+        if wallet_id is None:
+            wallet_id = self._register(address)
+            self._addresses_file.write(address + '\n')
+            self._addresses_file.flush()
+        return wallet_id
+
+    def _new_segment(self) -> None:
+        path = os.path.join(self.directory, f"seg-{len(self.segments) + 1:06d}.dat")
+        open(path, 'ab').close()
+        self.segments.append(Segment(path))
+
+    def _append(self, timestamp: float, address: str, kind: int, list_id: int, rank: int, realized_profit: float,
+                winrate: float, buy: int, sell: int, last_active: float) -> None:
+        segment = self.segments[-1]
+        wallet_id = self._wallet_id(address)
+        self._writer.write(ROW.pack(timestamp, wallet_id, kind, list_id, rank, realized_profit, winrate, buy, sell, last_active))
+        segment._index_row(segment.rows, timestamp, wallet_id)
+        segment.rows += 1
+
+        if segment.rows >= self.segment_rows:
+            self._writer.close()
+            segment.seal()
+            self._new_segment()
+            self._writer = open(self.segments[-1].path, 'ab')
+
+    def record_rank(self, rank_list: List[Dict], timestamp: Optional[float] = None, timeframe: Optional[str] = None,
+                    wallet_tag: Optional[str] = None) -> int:
+        """
+        Append one snapshot row per wallet of a getTrendingWallets rank list.
+
+        The rows remember the timeframe/tag list they come from, so ranks of different lists
+        (e.g. the lists of a multi-list scan) are never compared with each other.
+        Rows are stamped with the current time unless `timestamp` is given, which must then not
+        be older than the rows already written (range queries rely on the time order).
+
+        Returns:
+            The number of rows written.
+        """
+        list_id = rank_list_id(timeframe, wallet_tag)
+        written = 0
+        with self._lock:
+            # Stamped under the lock, so concurrent writers append rows in time order
+            timestamp = time.time() if timestamp is None else timestamp
+            for rank, wallet in enumerate(rank_list, start=1):
+                address = wallet.get('wallet_address')
+                if not address:
+                    continue
+                self._append(
+                    timestamp, address, KIND_RANK, list_id, rank,
+                    _number(wallet.get('realized_profit')),
+                    _number(wallet.get('winrate_7d')),
+                    int(_number(wallet.get('buy'))),
+                    int(_number(wallet.get('sell'))),
+                    _number(wallet.get('last_active'))
+                )
+                written += 1
+            self._writer.flush()
+        return written
+
+    def record_wallet_info(self, wallet_address: str, wallet_activity: Dict, timestamp: Optional[float] = None) -> None:
+        """Append the snapshot row of one getWalletInfo response."""
+        if not wallet_address or not wallet_activity:
+            return
+        with self._lock:
+            timestamp = time.time() if timestamp is None else timestamp
+            self._append(
+                timestamp, wallet_address, KIND_WALLET_INFO, 0, 0,
+                _number(wallet_activity.get('realized_profit')),
+                _number(wallet_activity.get('winrate')),
+                int(_number(wallet_activity.get('buy'))),
+                int(_number(wallet_activity.get('sell'))),
+                _number(wallet_activity.get('last_active_timestamp'))
+            )
+            self._writer.flush()
+
+    def _snapshot(self, row: tuple) -> Snapshot:
+        timestamp, wallet_id, kind, list_id, rank, realized_profit, winrate, buy, sell, last_active = row
+        return Snapshot(timestamp, self.addresses[wallet_id], kind, rank_list_name(list_id), rank, realized_profit, winrate,
+                        buy, sell, last_active)
+
+    def _wallet_rows_in_range(self, segment: Segment, wallet_id: int, start: Optional[float], end: Optional[float],
+                              kind: Optional[int], list_id: Optional[int] = None):
+        rows = segment.wallet_rows(wallet_id)
+        if not rows:
+            return []
+        # Rows are in time order (stamped under the lock): binary search the range instead of filtering every row
+        timestamps = _RowTimestamps(segment, rows)
+        first = bisect.bisect_left(timestamps, start) if start is not None else 0
+        last = bisect.bisect_right(timestamps, end) if end is not None else len(rows)
+        selected = [segment.row(row) for row in rows[first:last]]
+        return [row for row in selected if (kind is None or row[2] == kind) and (list_id is None or row[3] == list_id)]
+
+    def history(self, wallet_address: str, start: Optional[float] = None, end: Optional[float] = None,
+                kind: Optional[int] = None, rank_list: Optional[str] = None) -> List[Snapshot]:
+        """
+        All snapshots of a wallet between two timestamps, oldest first.
+
+        Args:
+            wallet_address: The wallet.
+            start, end: Inclusive time range (unbounded when None).
+            kind: KIND_RANK or KIND_WALLET_INFO (both when None).
+            rank_list: Only the rank rows of this "timeframe/tag" list (every row when None).
+        """
+        list_id = RANK_LISTS.index(rank_list) + 1 if rank_list else None
+        with self._lock:
+            wallet_id = self.wallet_ids.get(wallet_address)
+            if wallet_id is None:
+                return []
+            snapshots = []
+            for segment in self.segments:
+                if segment.overlaps(start, end):
+                    snapshots.extend(self._snapshot(row) for row in self._wallet_rows_in_range(segment, wallet_id, start, end, kind, list_id))
+            return snapshots
+
+    def top_movers(self, since: float, until: Optional[float] = None, metric: str = 'realized_profit',
+                   limit: int = 10, kind: int = KIND_RANK, rank_list: Optional[str] = None) -> List[Dict]:
+        """
+        Wallets whose metric changed the most between their first and last snapshot in a time range.
+
+        A wallet is compared within each rank list it appears in (a mover per wallet and list),
+        or only within `rank_list` when given. Only segments overlapping the range are read, and
+        inside them only each wallet's rows in range (found by binary search on their timestamps).
+        """
+        field = Snapshot._fields.index(metric)
+        list_filter = RANK_LISTS.index(rank_list) + 1 if rank_list else None
+        first: Dict[tuple, tuple] = {}
+        last: Dict[tuple, tuple] = {}
+        with self._lock:
+            for segment in self.segments:
+                if not segment.overlaps(since, until):
+                    continue
+                for wallet_id in segment.wallets():
+                    for row in self._wallet_rows_in_range(segment, wallet_id, since, until, kind, list_filter):
+                        key = (wallet_id, row[3])
+                        first.setdefault(key, row)
+                        last[key] = row
+
+            movers = []
+            for key, start_row in first.items():
+                start, end = self._snapshot(start_row), self._snapshot(last[key])
+                movers.append({
+                    'wallet_address': start.wallet_address,
+                    'rank_list': start.rank_list,
+                    'from': start[field],
+                    'to': end[field],
+                    'change': end[field] - start[field],
+                    'first_seen': start.timestamp,
+                    'last_seen': end.timestamp
+                })
+        movers.sort(key=lambda mover: abs(mover['change']), reverse=True)
+        return movers[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'wallets': len(self.addresses),
+                'segments': len(self.segments),
+                'rows': sum(segment.rows for segment in self.segments)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+            self._addresses_file.close()
+            for segment in self.segments:
+                segment.close()
+
+
+class _RowTimestamps:
+    """Lazy sequence of the timestamps of some rows, for bisect."""
+
+    def __init__(self, segment: Segment, rows: List[int]):
+        self.segment = segment
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> float:
+        return ROW.unpack_from(self.segment.data(), self.rows[index] * ROW.size)[0]
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Accept a unix timestamp, an ISO date, or a relative age like 24h / 7d."""
+    if value is None:
+        return None
+    units = {'m': 60, 'h': 3600, 'd': 86400}
+    if value[-1:] in units and value[:-1].replace('.', '', 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the wallet snapshot history.")
+    parser.add_argument("--directory", default="snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    history = commands.add_parser("history", help="Snapshots of one wallet")
+    history.add_argument("wallet")
+    history.add_argument("--since", default=None, help="Timestamp, ISO date or age (e.g. 7d)")
+    history.add_argument("--until", default=None)
+    history.add_argument("--kind", choices=list(KINDS), default=None)
+    history.add_argument("--list", default=None, choices=RANK_LISTS, help="Only the rank rows of this timeframe/tag list")
+
+    movers = commands.add_parser("movers", help="Wallets that moved the most")
+    movers.add_argument("--since", default="24h")
+    movers.add_argument("--metric", default="realized_profit", choices=['realized_profit', 'winrate', 'rank', 'buy', 'sell'])
+    movers.add_argument("--limit", type=int, default=10)
+    movers.add_argument("--kind", choices=list(KINDS), default='rank')
+    movers.add_argument("--list", default=None, choices=RANK_LISTS, help="Only this timeframe/tag list (each list apart when omitted)")
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.directory)
+    try:
+        if args.command == "history":
+            kind = KINDS[args.kind] if args.kind else None
+            for snapshot in store.history(args.wallet, parse_time(args.since), parse_time(args.until), kind, args.list):
+                print(json.dumps(snapshot._asdict()))
+        else:
+            for mover in store.top_movers(parse_time(args.since), metric=args.metric, limit=args.limit, kind=KINDS[args.kind],
+                                          rank_list=args.list):
+                print(json.dumps(mover))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+_END = object()
+
+
+class StreamStage:
+    """
+    One stage of a StreamPipeline: `func` applied to every item on `workers` threads.
+
+    func returns the item handed to the next stage, or None to drop it (exceptions are logged and drop it too).
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.high_water = 0
+        self._remaining = self.workers
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'busy_s': round(self.busy, 4),
+                'queue_high_water': self.high_water
+            }
+
+    def __repr__(self):
+        return f"StreamStage({self.name!r}, workers={self.workers})"
+
+
+class StreamPipeline:
+    """
+    Run items through a chain of stages connected by bounded queues, yielding the results as they come out.
+
+    A full queue blocks the stage feeding it, so a slow stage holds back the ones before it instead
+    of letting items pile up. On top of that at most `max_in_flight` items are between the source and
+    the consumer at any time (a slot is only freed when the consumer took the item, or when it was
+    dropped), so memory is bounded by the window whatever the length of the source, and a consumer
+    that stops reading stops the whole pipeline. With `ordered`, results are yielded in source order.
+
+    Usage\n
+    pipeline = StreamPipeline([StreamStage("fetch", fetch, workers=8), StreamStage("parse", parse)])\n
+    for result in pipeline.run(addresses):\n
+        ...\n
+    """
+
+    def __init__(self, stages: Sequence[StreamStage], queue_size: int = 16, max_in_flight: Optional[int] = None,
+                 ordered: bool = True):
+        """
+        Args:
+            stages: Stages in processing order.
+            queue_size: Capacity of the queue in front of every stage and of the output queue.
+            max_in_flight: Items between the source and the consumer, defaults to what the
+                queues and workers can hold.
+            ordered: Yield results in source order (a result waits for the ones before it).
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.max_in_flight = max_in_flight or sum(stage.workers + self.queue_size for stage in self.stages) + self.queue_size
+        self.ordered = ordered
+        self.logger = logging.getLogger("StreamPipeline")
+
+        self.emitted = 0
+        self.peak_in_flight = 0
+        self.peak_reorder = 0
+        self.elapsed = 0.0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _put(self, target: queue.Queue, item, stopped: threading.Event) -> bool:
+        while not stopped.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue, stopped: threading.Event):
+        while not stopped.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, source: Iterable, target: queue.Queue, window: threading.Semaphore, stopped: threading.Event,
+              failure: List[BaseException]) -> None:
+        try:
+            for sequence, item in enumerate(source):
+                while not window.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                if stopped.is_set():
+                    return
+                with self._lock:
+                    self._in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+                if not self._put(target, (sequence, item), stopped):
+                    return
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._put(target, _END, stopped)
+
+    def _work(self, stage: StreamStage, source: queue.Queue, target: queue.Queue, downstream: int,
+              stopped: threading.Event) -> None:
+        while True:
+            message = self._get(source, stopped)
+            if message is _END:
+                break
+            sequence, item = message
+            result = None
+            if item is not None:
+                started = time.perf_counter()
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    self.logger.error(f"Stage {stage.name} failed: {e}")
+                    with stage._lock:
+                        stage.errors += 1
+                with stage._lock:
+                    stage.busy += time.perf_counter() - started
+                    stage.processed += 1
+                    if result is None:
+                        stage.dropped += 1
+            # Dropped items still travel down as None, so an ordered consumer knows not to wait for them
+            if not self._put(target, (sequence, result), stopped):
+                break
+            with stage._lock:
+                stage.high_water = max(stage.high_water, source.qsize())
+
+        with stage._lock:
+            stage._remaining -= 1
+            last = stage._remaining == 0
+        if last:
+            for _ in range(downstream):
+                self._put(target, _END, stopped)
+
+    def run(self, source: Iterable) -> Iterator:
+        """
+        Stream the items of `source` through the stages.
+
+        Returns:
+            A generator of the results that made it through every stage. Closing it early stops the pipeline.
+        """
+        stopped = threading.Event()
+        window = threading.Semaphore(self.max_in_flight)
+        failure: List[BaseException] = []
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        for stage in self.stages:
+            stage._remaining = stage.workers
+
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0], window, stopped, failure),
+                                    name="StreamPipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            downstream = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(stage, queues[index], queues[index + 1], downstream, stopped),
+                                                name=f"StreamPipeline-{stage.name}-{worker}", daemon=True))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        output = queues[-1]
+        pending: Dict[int, Any] = {}
+        expected = 0
+        try:
+            while True:
+                message = self._get(output, stopped)
+                if message is _END:
+                    break
+                sequence, result = message
+                if not self.ordered:
+                    ready: List[Tuple[int, Any]] = [(sequence, result)]
+                else:
+                    pending[sequence] = result
+                    self.peak_reorder = max(self.peak_reorder, len(pending))
+                    ready = []
+                    while expected in pending:
+                        ready.append((expected, pending.pop(expected)))
+                        expected += 1
+                for _, result in ready:
+                    with self._lock:
+                        self._in_flight -= 1
+                    window.release()
+                    if result is not None:
+                        self.emitted += 1
+                        yield result
+            if failure:
+                raise failure[0]
+        finally:
+            stopped.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - started
+
+    def stats(self) -> Dict:
+        return {
+            'emitted': self.emitted,
+            'max_in_flight': self.max_in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'peak_reorder': self.peak_reorder,
+            'elapsed_s': round(self.elapsed, 3),
+            'stages': {stage.name: stage.stats() for stage in self.stages}
+        }
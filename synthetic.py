@@ -0,0 +1,154 @@
+import json
+import random
+import time
+from typing import Dict, Optional
+from gmgn import MockTransport, Response
+
+
+class SyntheticGmgn:
+    """Synthetic GMGN responses for a parameterized dataset, served through a MockTransport."""
+
+    def __init__(self, wallets: int = 100, trades_per_wallet: int = 10, token_overlap: float = 0.5, seed: int = 42,
+                 extra_fields: bool = False):
+        """
+        Build the dataset and pre-encode every payload.
+
+        Args:
+            wallets: Number of wallets in the rank list.
+            trades_per_wallet: Number of trades in each getWalletInfo response.
+            token_overlap: Share of trades (0-1) drawn from a token pool shared by every wallet.
+            seed: Random seed, so every run serves the same dataset.
+            extra_fields: Pad rank entries, wallet info and trades with the profile and history fields
+                the live API returns but the analyzers never read, for realistic payload sizes.
+        """
+        self.wallets = wallets
+        self.trades_per_wallet = trades_per_wallet
+        self.token_overlap = token_overlap
+        rng = random.Random(seed)
+        now = int(time.time())
+
+        shared_tokens = [f"Shared{index:04d}pump" for index in range(max(1, trades_per_wallet))]
+        self.routes: Dict[str, bytes] = {}
+        self.tokens = set()
+
+        rank = []
+        extras = self._extra_fields if extra_fields else (lambda rng, kind: {})
+        for index in range(wallets):
+            address = f"Wallet{index:06d}{rng.getrandbits(64):016x}"
+            winrate = rng.uniform(0.2, 0.95)
+            profit = rng.uniform(-1000, 50000)
+            buy, sell = rng.randint(1, 500), rng.randint(0, 500)
+            last_active = now - rng.randint(0, 3 * 24 * 3600)
+            rank.append({
+                'wallet_address': address,
+                'realized_profit': profit,
+                'buy': buy,
+                'sell': sell,
+                'last_active': last_active,
+                'winrate_7d': winrate,
+                'pnl_1d': rng.uniform(-1, 5),
+                'tags': ['smart_degen'],
+                'risk': {
+                    'token_honeypot_ratio': rng.choice([0, 0, 0.01, None]),
+                    'fast_tx_ratio': rng.uniform(0, 0.5)
+                },
+                **extras(rng, 'rank')
+            })
+
+            trades = []
+            for trade in range(trades_per_wallet):
+                if rng.random() < token_overlap:
+                    token = rng.choice(shared_tokens)
+                else:
+                    token = f"Own{index:06d}{trade:04d}pump"
+                self.tokens.add(token)
+                trades.append({
+                    'token_address': token,
+                    'event_type': rng.choice(['buy', 'sell']),
+                    'timestamp': last_active - trade * 60,
+                    'amount_usd': rng.uniform(10, 5000),
+                    **extras(rng, 'trade')
+                })
+
+            self.routes[f"/defi/quotation/v1/smartmoney/sol/walletNew/{address}?period=7d"] = self._encode({
+                'wallet_address': address,
+                'winrate': winrate,
+                'realized_profit': profit,
+                'buy': buy,
+                'sell': sell,
+                'last_active_timestamp': last_active,
+                'sol_balance': rng.uniform(0, 1000),
+                'trades': trades,
+                **extras(rng, 'wallet')
+            })
+
+        rank_payload = self._encode({'rank': rank})
+        for timeframe in ("1d", "7d", "30d"):
+            for tag in ("pump_smart", "smart_degen", "reowned", "snipe_bot"):
+                self.routes[f"/defi/quotation/v1/rank/sol/wallets/{timeframe}?tag={tag}&orderby=pnl_{timeframe}&direction=desc"] = rank_payload
+
+        for token in self.tokens:
+            price = rng.uniform(0.00001, 10)
+            self.routes[f"/defi/quotation/v1/tokens/sol/{token}"] = json.dumps({'code': 0, 'msg': 'success', 'data': {'token': {
+                'address': token,
+                'symbol': token[:6].upper(),
+                'price': price,
+                'liquidity': rng.uniform(0, 500000),
+                'holder_count': rng.randint(10, 20000),
+                'market_cap': rng.uniform(1e4, 1e8)
+            }}}).encode()
+            self.routes[f"/defi/quotation/v1/sol/tokens/realtime_token_price?address={token}"] = self._encode({'address': token, 'usd_price': str(price)})
+            self.routes[f"/defi/quotation/v1/tokens/security/sol/{token}"] = self._encode({
+                'address': token,
+                'is_honeypot': rng.random() < 0.05,
+                'renounced_mint': rng.random() < 0.9,
+                'renounced_freeze_account': rng.random() < 0.9,
+                'top_10_holder_rate': rng.uniform(0.05, 0.9)
+            })
+
+    @staticmethod
+    def _extra_fields(rng: random.Random, kind: str) -> Dict:
+        """Fields of the live payloads that no analyzer reads."""
+        if kind == 'trade':
+            return {
+                'tx_hash': f"{rng.getrandbits(256):064x}",
+                'token': {'symbol': 'TKN', 'logo': 'https://example.invalid/logo.png', 'price': rng.random()},
+                'price_usd': rng.random(),
+                'is_open_or_close': rng.randint(0, 1)
+            }
+        extra = {
+            'avatar': 'https://example.invalid/avatar.png',
+            'twitter_username': None,
+            'twitter_name': None,
+            'nickname': None,
+            'sol_balance': str(rng.uniform(0, 1000)),
+            'pnl_7d': rng.uniform(-1, 5),
+            'pnl_30d': rng.uniform(-1, 5),
+            'txs_30d': rng.randint(0, 5000),
+            'token_num_7d': rng.randint(0, 300),
+            'avg_holding_period_7d': rng.uniform(0, 86400),
+            'followers_count': rng.randint(0, 10000),
+            'daily_profit_7d': [{'timestamp': day * 86400, 'profit': rng.uniform(-500, 5000)} for day in range(7)]
+        }
+        if kind == 'wallet':
+            extra.update({
+                'unrealized_profit': rng.uniform(-1000, 1000),
+                'total_value': rng.uniform(0, 1e6),
+                'pnl_lt_minus_dot5_num': rng.randint(0, 50),
+                'pnl_2x_5x_num': rng.randint(0, 50),
+                'pnl_gt_5x_num': rng.randint(0, 20),
+                'history_bought_cost': rng.uniform(0, 1e6),
+                'tags': ['smart_degen']
+            })
+        return extra
+
+    @staticmethod
+    def _encode(data) -> bytes:
+        return json.dumps({'code': 0, 'msg': 'success', 'data': data}).encode()
+
+    def handle(self, route: str) -> Optional[Response]:
+        body = self.routes.get(route)
+        return Response(200, body) if body is not None else None
+
+    def transport(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 42) -> MockTransport:
+        return MockTransport(self.handle, latency=latency, jitter=jitter, errorRate=error_rate, seed=seed)
@@ -0,0 +1,221 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Relative cost of one request per data source, used to order the stages
+SOURCE_COSTS = {'security': 1.0, 'info': 1.0, 'price': 1.0, 'top_buyers': 1.5}
+
+# Pass rate assumed for a stage until it has been evaluated `min_samples` times
+PRIOR_PASS_RATE = 0.5
+
+
+def token_fields(info: Dict) -> Dict:
+    """The token object of a getTokenInfo response (the response itself keeps the legacy layout)."""
+    data = info.get('data') if isinstance(info, dict) else None
+    if isinstance(data, dict):
+        return data.get('token', data) or {}
+    return {}
+
+
+def _number(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class VettingStage:
+    """
+    One check of the vetting pipeline.
+
+    The check receives the payload of its data source and returns a rejection reason, or None if the token passes.
+    """
+
+    def __init__(self, name: str, source: str, check: Callable[[Dict], Optional[str]]):
+        self.name = name
+        self.source = source
+        self.check = check
+        self.evaluated = 0
+        self.passed = 0
+        # Fetch/check errors say nothing about the token, they are kept out of the pass rate
+        self.errors = 0
+
+    def pass_rate(self, min_samples: int) -> float:
+        if self.evaluated < min_samples:
+            return PRIOR_PASS_RATE
+        return self.passed / self.evaluated
+
+    def __repr__(self):
+        return f"VettingStage({self.name!r}, source={self.source!r})"
+
+
+def default_stages(min_liquidity: float = 10000.0, min_holders: int = 100, max_top10_rate: float = 0.5) -> List[VettingStage]:
+    """Security flags, holder concentration, liquidity, holder count and a usable price."""
+    return [
+        VettingStage('not_honeypot', 'security',
+                     lambda security: 'honeypot' if security.get('is_honeypot') else None),
+        VettingStage('renounced', 'security',
+                     lambda security: None if security.get('renounced_mint') and security.get('renounced_freeze_account')
+                     else 'mint or freeze authority not renounced'),
+        VettingStage('holder_concentration', 'security',
+                     lambda security: f"top 10 holders own {_number(security.get('top_10_holder_rate')):.0%}"
+                     if _number(security.get('top_10_holder_rate')) > max_top10_rate else None),
+        VettingStage('liquidity', 'info',
+                     lambda info: f"liquidity {_number(token_fields(info).get('liquidity')):,.0f} below {min_liquidity:,.0f}"
+                     if _number(token_fields(info).get('liquidity')) < min_liquidity else None),
+        VettingStage('holders', 'info',
+                     lambda info: f"{int(_number(token_fields(info).get('holder_count')))} holders"
+                     if _number(token_fields(info).get('holder_count')) < min_holders else None),
+        VettingStage('priced', 'price',
+                     lambda price: None if _number(price.get('usd_price')) > 0 else 'no usd price'),
+    ]
+
+
+class VettingResult:
+    __slots__ = ('token_address', 'passed', 'rejected_by', 'reason', 'payloads')
+
+    def __init__(self, token_address: str, passed: bool, rejected_by: Optional[str] = None, reason: Optional[str] = None,
+                 payloads: Optional[Dict[str, Dict]] = None):
+        self.token_address = token_address
+        self.passed = passed
+        self.rejected_by = rejected_by
+        self.reason = reason
+        self.payloads = payloads or {}
+
+    def __repr__(self):
+        if self.passed:
+            return f"VettingResult({self.token_address!r}, passed)"
+        return f"VettingResult({self.token_address!r}, rejected_by={self.rejected_by!r}, reason={self.reason!r})"
+
+
+class TokenVetter:
+    """
+    Run a token through the vetting stages, cheapest and most selective first, stopping at the first failure.
+
+    Each data source is fetched at most once per token and shared by the stages that use it.
+    The next stage is the one with the lowest expected cost per rejection, i.e. the cost of the
+    sources it still needs divided by its observed rejection rate, so the order tunes itself
+    as pass rates are recorded.
+    """
+
+    def __init__(self, client, stages: Optional[Sequence[VettingStage]] = None, costs: Optional[Dict[str, float]] = None,
+                 min_samples: int = 20, required: Sequence[str] = ('info', 'price')):
+        """
+        Initialize the vetter.
+
+        Args:
+            client: gmgn client used to fetch the data sources.
+            stages: Vetting stages, defaults to default_stages().
+            costs: Relative cost of each data source, defaults to SOURCE_COSTS.
+            min_samples: Evaluations of a stage before its observed pass rate replaces the prior.
+            required: Sources fetched for surviving tokens even if no stage used them (what evaluate_token returns).
+        """
+        self.client = client
+        self.stages = list(stages) if stages is not None else default_stages()
+        self.costs = dict(SOURCE_COSTS, **(costs or {}))
+        self.min_samples = min_samples
+        self.required = tuple(required)
+        self.sources = {
+            'security': lambda token_address: self.client.getSecurityInfo(contractAddress=token_address),
+            'info': lambda token_address: self.client.getTokenInfo(contractAddress=token_address),
+            'price': lambda token_address: self.client.getTokenUsdPrice(contractAddress=token_address),
+            'top_buyers': lambda token_address: self.client.getTopBuyers(contractAddress=token_address),
+        }
+        self.logger = logging.getLogger("TokenVetter")
+        self._lock = threading.Lock()
+
+        self.tokens = 0
+        self.accepted = 0
+        self.requests = 0
+        self.errors = 0
+
+    def _next_stage(self, remaining: List[VettingStage], fetched: Dict[str, Dict]) -> VettingStage:
+        def expected_cost(stage: VettingStage) -> float:
+            cost = 0.0 if stage.source in fetched else self.costs.get(stage.source, 1.0)
+            rejection = 1.0 - stage.pass_rate(self.min_samples)
+            return cost / rejection if rejection > 0 else float('inf')
+        with self._lock:
+            return min(remaining, key=expected_cost)
+
+    def _fetch(self, source: str, token_address: str, fetched: Dict[str, Dict]) -> Dict:
+        if source not in fetched:
+            with self._lock:
+                self.requests += 1
+            payload = self.sources[source](token_address)
+            fetched[source] = payload if isinstance(payload, dict) else {}
+        return fetched[source]
+
+    def vet(self, token_address: str) -> VettingResult:
+        """
+        Vet one token.
+
+        Returns:
+            The result, with the payloads fetched along the way.
+        """
+        fetched: Dict[str, Dict] = {}
+        remaining = list(self.stages)
+        with self._lock:
+            self.tokens += 1
+
+        while remaining:
+            stage = self._next_stage(remaining, fetched)
+            remaining.remove(stage)
+            try:
+                reason = stage.check(self._fetch(stage.source, token_address, fetched))
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    stage.errors += 1
+                self.logger.debug(f"Could not vet {token_address} at {stage.name}: {e}")
+                return VettingResult(token_address, False, stage.name, f"error: {e}", fetched)
+            with self._lock:
+                stage.evaluated += 1
+                if reason is None:
+                    stage.passed += 1
+            if reason is not None:
+                self.logger.debug(f"Rejected {token_address} at {stage.name}: {reason}")
+                return VettingResult(token_address, False, stage.name, reason, fetched)
+
+        try:
+            for source in self.required:
+                self._fetch(source, token_address, fetched)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return VettingResult(token_address, False, None, f"error: {e}", fetched)
+
+        with self._lock:
+            self.accepted += 1
+        return VettingResult(token_address, True, payloads=fetched)
+
+    def order(self) -> List[str]:
+        """Current stage order for a token nothing has been fetched for yet."""
+        remaining, ordered = list(self.stages), []
+        fetched = {}
+        while remaining:
+            stage = self._next_stage(remaining, fetched)
+            remaining.remove(stage)
+            fetched[stage.source] = {}
+            ordered.append(stage.name)
+        return ordered
+
+    def stats(self) -> Dict:
+        order = self.order()
+        with self._lock:
+            return {
+                'tokens': self.tokens,
+                'accepted': self.accepted,
+                'requests': self.requests,
+                'requests_per_token': round(self.requests / self.tokens, 2) if self.tokens else 0.0,
+                'requests_per_accepted': round(self.requests / self.accepted, 2) if self.accepted else None,
+                'errors': self.errors,
+                'order': order,
+                'stages': {
+                    stage.name: {
+                        'evaluated': stage.evaluated,
+                        'passed': stage.passed,
+                        'errors': stage.errors,
+                        'pass_rate': round(stage.passed / stage.evaluated, 3) if stage.evaluated else None
+                    } for stage in self.stages
+                }
+            }
@@ -1,26 +1,64 @@
+import argparse
 import json
 import logging
+import math
+import os
+import time
 from datetime import datetime
-from typing import List, Dict
-from tabulate import tabulate
-from gmgn import gmgn
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('wallet_analysis.log'),
-        logging.StreamHandler()
-    ]
-)
-
-# Suppress fake_useragent warnings
-logging.getLogger('fake_useragent').setLevel(logging.ERROR)
+from typing import List, Dict, Optional
+from gmgn import gmgn, Transport, SQLiteCache, Metrics, startQueueLogging, DEFAULT_PROJECTIONS
+import walletframe
+from records import WalletRecord, to_number
+from export import StreamingExporter, atomic_write
+from snapshots import SnapshotStore
+from scan import RankScanner, IndexedWallet, TIMEFRAMES, WALLET_TAGS
+from render import Column, StreamingTable
+
+def configure_logging(level: int = logging.INFO):
+    """Log to wallet_analysis.log and the console through a background queue (only when run as a script, not on import)."""
+    return startQueueLogging(
+        handlers=[
+            logging.FileHandler('wallet_analysis.log'),
+            logging.StreamHandler()
+        ],
+        level=level
+    )
 
 class WalletAnalyzer:
-    def __init__(self):
-        self.gmgn = gmgn()
+    def __init__(self, transport: Optional[Transport] = None, base_url: Optional[str] = None, cache_path: Optional[str] = None,
+                 engine: str = "python", weights: Optional[Dict[str, float]] = None, normalize: bool = False,
+                 exporter: Optional[StreamingExporter] = None, json_export: bool = True,
+                 snapshot_store: Optional[SnapshotStore] = None, metrics: Optional[Metrics] = None,
+                 project_fields: bool = True, progressive: bool = False, display_limit: Optional[int] = None, **thresholds):
+        """
+        engine: "python" walks the rank list entry by entry, "numpy" uses the vectorized WalletFrame.
+        weights, normalize, thresholds: Composite scoring and risk filters of the numpy engine (see WalletFrame.select).
+        exporter: Streaming sink receiving every selected wallet record (after sorting and top_k), for both engines.
+        json_export: Also rewrite wallet_analysis.json once the analysis is displayed.
+        snapshot_store: History store receiving every fetched rank list.
+        metrics: Request and stage metrics, shared with the gmgn client (a new one when None).
+        project_fields: Keep only the response fields the analysis reads (gmgn.DEFAULT_PROJECTIONS).
+        progressive: Print rows one by one in fixed-width columns with running totals instead of one tabulate grid
+            (after the filter, the rows being sorted by profit).
+        display_limit: Print at most this many rows (the totals still cover every wallet).
+        """
+        if engine == "numpy" and not walletframe.available():
+            logging.getLogger("WalletAnalyzer").warning("numpy is not installed, using the python engine")
+            engine = "python"
+        self.engine = engine
+        self.weights = weights
+        self.normalize = normalize
+        self.thresholds = thresholds
+        self.exporter = exporter
+        self.json_export = json_export
+        self.snapshot_store = snapshot_store
+        self.progressive = progressive
+        self.display_limit = display_limit
+        self.wallet_index: Dict[str, IndexedWallet] = {}
+        self.metrics = metrics or Metrics()
+        disk_cache = SQLiteCache(cache_path) if cache_path else None
+        self.gmgn = gmgn(transport=transport, baseUrl=base_url, diskCache=disk_cache, metrics=self.metrics,
+                         projections=DEFAULT_PROJECTIONS if project_fields else None)
         self.logger = logging.getLogger("WalletAnalyzer")
 
     def safe_get(self, data: Dict, *keys, default=0):
@@ -35,68 +73,132 @@ class WalletAnalyzer:
         except Exception:
             return default
 
-    def get_trending_wallets(self, timeframe: str = "1d", wallet_tag: str = "smart_degen") -> List[Dict]:
-        """Fetch and filter active trending wallets."""
+    def get_trending_wallets(self, timeframe: str = "1d", wallet_tag: str = "smart_degen", top_k: Optional[int] = None) -> List[WalletRecord]:
+        """Fetch and filter active trending wallets, keeping the top_k most profitable if given."""
         try:
             self.logger.info(f"Fetching trending wallets for {timeframe} timeframe with tag {wallet_tag}")
-            response = self.gmgn.getTrendingWallets(timeframe=timeframe, walletTag=wallet_tag)
+            with self.metrics.timeStage("fetch_rank"):
+                response = self.gmgn.getTrendingWallets(timeframe=timeframe, walletTag=wallet_tag)
 
             if not response or 'rank' not in response:
                 return []
 
-            # Filter and format active wallets
-            active_wallets = []
-            current_time = datetime.now().timestamp()
-
-            for wallet in response.get('rank', []):
-                try:
-                    # Get values with safe defaults
-                    last_active = self.safe_get(wallet, 'last_active', default=0)
-                    buy_count = self.safe_get(wallet, 'buy', default=0)
-                    sell_count = self.safe_get(wallet, 'sell', default=0)
-                    winrate = self.safe_get(wallet, 'winrate_7d', default=0)
-                    realized_profit = self.safe_get(wallet, 'realized_profit', default=0)
-
-                    # Skip inactive wallets
-                    if current_time - last_active > 7 * 24 * 3600:
-                        continue
-
-                    # Skip wallets with no trades
-                    if not buy_count and not sell_count:
-                        continue
-
-                    formatted_wallet = {
-                        'wallet_address': self.safe_get(wallet, 'wallet_address', default='N/A'),
-                        'realized_profit': round(float(realized_profit), 2),
-                        'win_rate': round(float(winrate) * 100, 1) if winrate is not None else 0.0,
-                        'trades': {
-                            'buy': int(buy_count),
-                            'sell': int(sell_count)
-                        },
-                        'last_active': datetime.fromtimestamp(last_active).strftime('%Y-%m-%d %H:%M'),
-                        'risk_metrics': {
-                            'honeypot_ratio': round(self.safe_get(wallet, 'risk', 'token_honeypot_ratio', default=0) * 100, 1),
-                            'fast_tx_ratio': round(self.safe_get(wallet, 'risk', 'fast_tx_ratio', default=0) * 100, 1)
-                        }
-                    }
-                    active_wallets.append(formatted_wallet)
-                except Exception as e:
-                    self.logger.warning(f"Error processing wallet: {e}")
-                    continue
+            if self.snapshot_store is not None:
+                self.snapshot_store.record_rank(response.get('rank', []), timeframe=timeframe, wallet_tag=wallet_tag)
 
-            # Sort by realized profit
-            return sorted(active_wallets, key=lambda x: x['realized_profit'], reverse=True)
+            with self.metrics.timeStage("filter"):
+                return self.filter_wallets(response.get('rank', []), top_k=top_k)
 
         except Exception as e:
             self.logger.error(f"Error fetching trending wallets: {e}")
             return []
 
-    def display_wallet_analysis(self, wallets: List[Dict]) -> None:
+    def scan_trending_wallets(self, timeframes: List[str], wallet_tags: List[str], top_k: Optional[int] = None) -> List[WalletRecord]:
+        """Fetch every timeframe x tag list concurrently, merge them by wallet and filter each unique wallet once."""
+        try:
+            self.logger.info(f"Scanning trending wallets for {', '.join(timeframes)} timeframes with tags {', '.join(wallet_tags)}")
+            on_list = None
+            if self.snapshot_store is not None:
+                on_list = lambda timeframe, wallet_tag, rank_list: self.snapshot_store.record_rank(rank_list, timeframe=timeframe,
+                                                                                                   wallet_tag=wallet_tag)
+            with self.metrics.timeStage("fetch_rank"):
+                self.wallet_index = RankScanner(self.gmgn, timeframes, wallet_tags, on_list=on_list).scan()
+
+            with self.metrics.timeStage("filter"):
+                return self.filter_wallets([wallet.entry for wallet in self.wallet_index.values()], top_k=top_k)
+
+        except Exception as e:
+            self.logger.error(f"Error scanning trending wallets: {e}")
+            return []
+
+    def filter_wallets(self, rank: List[Dict], top_k: Optional[int] = None) -> List[WalletRecord]:
+        """Filter, format and sort rank entries with the configured engine, and export the selected wallets."""
+        if self.engine == "numpy":
+            frame = walletframe.WalletFrame.from_rank(rank)
+            wallets = frame.select(k=top_k, weights=self.weights, normalize=self.normalize, **self.thresholds)
+        else:
+            wallets = self._filter_wallets_python(rank)
+            if top_k is not None:
+                wallets = wallets[:top_k]
+
+        if self.exporter is not None:
+            for wallet in wallets:
+                self.exporter(wallet)
+        return wallets
+
+    def _filter_wallets_python(self, rank: List[Dict]) -> List[WalletRecord]:
+        """Pure Python path, one rank entry at a time."""
+        # Filter and format active wallets
+        active_wallets = []
+        current_time = datetime.now().timestamp()
+
+        for wallet in rank:
+            try:
+                # Same coercion as the numpy engine, entries with a bad value are skipped by both
+                values = {name: to_number(self.safe_get(wallet, *path, default=0)) for name, path in walletframe.COLUMNS.items()}
+                if any(math.isnan(value) for value in values.values()):
+                    continue
+
+                # Skip inactive wallets
+                if current_time - values['last_active'] > 7 * 24 * 3600:
+                    continue
+
+                # Skip wallets with no trades
+                if not values['buy'] and not values['sell']:
+                    continue
+
+                active_wallets.append(WalletRecord.from_rank_entry(wallet))
+            except Exception as e:
+                self.logger.warning(f"Error processing wallet: {e}")
+                continue
+
+        # Sort by realized profit
+        return sorted(active_wallets, key=lambda x: x.realized_profit, reverse=True)
+
+    def progressive_table(self, title: Optional[str] = None) -> StreamingTable:
+        """The fixed-width table of the progressive display, same columns as the tabulate grid."""
+        columns = [
+            Column("Index", 5, ">", lambda idx, wallet: idx),
+            Column("Wallet Address", 44, "<", lambda idx, wallet: wallet.wallet_address),
+            Column("Profit (SOL)", 16, ">", lambda idx, wallet: f"{wallet.realized_profit:,.2f}"),
+            Column("Win Rate", 8, ">", lambda idx, wallet: f"{wallet.win_rate}%"),
+            Column("Trades (B/S)", 12, ">", lambda idx, wallet: f"{wallet.buy}/{wallet.sell}"),
+            Column("Last Active", 16, "<", lambda idx, wallet: wallet.last_active_display),
+            Column("Risk Metrics", 22, "<", lambda idx, wallet: f"HP:{wallet.honeypot_ratio}% FT:{wallet.fast_tx_ratio}%")
+        ]
+        return StreamingTable(columns, title=title, limit=self.display_limit)
+
+    def display_progressive(self, wallets: List[WalletRecord]) -> None:
+        """
+        Display wallet analysis row by row, without measuring the whole table first.
+
+        The wallets are already filtered and sorted by profit, so rows start once the filter is done,
+        like the tabulate grid: only the layout and the row cap differ.
+        """
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        table = self.progressive_table(f"\n=== Smart Money Wallet Analysis ({len(wallets)} Active Wallets) ===")
+        for wallet in wallets:
+            try:
+                table.add(wallet)
+            except Exception as e:
+                self.logger.warning(f"Error formatting wallet data: {e}")
+        table.close()
+        self.metrics.observeStage("display", time.perf_counter() - started, time.thread_time() - started_cpu)
+
+        if self.json_export:
+            with self.metrics.timeStage("export_json"):
+                self.export_to_json(wallets)
+
+    def display_wallet_analysis(self, wallets: List[WalletRecord]) -> None:
         """Display wallet analysis in a formatted table."""
         if not wallets:
             self.logger.warning("No wallet data to display")
             return
 
+        if self.progressive:
+            self.display_progressive(wallets)
+            return
+
         # Prepare table data
         headers = [
             "Index",
@@ -112,24 +214,24 @@ class WalletAnalyzer:
         for idx, wallet in enumerate(wallets, start=1):
             try:
                 # Format profit with commas
-                profit = f"{wallet['realized_profit']:,.2f}"
+                profit = f"{wallet.realized_profit:,.2f}"
 
                 # Format win rate
-                win_rate = f"{wallet['win_rate']}%"
+                win_rate = f"{wallet.win_rate}%"
 
                 # Format trades
-                trades = f"{wallet['trades']['buy']}/{wallet['trades']['sell']}"
+                trades = f"{wallet.buy}/{wallet.sell}"
 
                 # Format risk metrics
-                risk = f"HP:{wallet['risk_metrics']['honeypot_ratio']}% FT:{wallet['risk_metrics']['fast_tx_ratio']}%"
+                risk = f"HP:{wallet.honeypot_ratio}% FT:{wallet.fast_tx_ratio}%"
 
                 table_data.append([
                     idx,
-                    wallet['wallet_address'],  # Full wallet address for easy copying
+                    wallet.wallet_address,  # Full wallet address for easy copying
                     profit,
                     win_rate,
                     trades,
-                    wallet['last_active'],
+                    wallet.last_active_display,
                     risk
                 ])
             except Exception as e:
@@ -141,41 +243,80 @@ class WalletAnalyzer:
             return
 
         # Print summary
+        started, started_cpu = time.perf_counter(), time.thread_time()
         print(f"\n=== Smart Money Wallet Analysis ({len(table_data)} Active Wallets) ===")
+        from tabulate import tabulate  # imported on first display, it is slow to import
         print(tabulate(table_data, headers=headers, tablefmt="grid", numalign="right"))
 
         try:
             # Print statistics
-            total_profit = sum(w['realized_profit'] for w in wallets)
-            avg_win_rate = sum(w['win_rate'] for w in wallets) / len(wallets) if wallets else 0
+            total_profit = sum(w.realized_profit for w in wallets)
+            avg_win_rate = sum(w.win_rate for w in wallets) / len(wallets) if wallets else 0
             print(f"\nSummary:")
             print(f"Total Profit: {total_profit:,.2f} SOL")
             print(f"Average Win Rate: {avg_win_rate:.1f}%")
+            self.metrics.observeStage("display", time.perf_counter() - started, time.thread_time() - started_cpu)
 
             # Export to JSON
-            self.export_to_json(wallets)
+            if self.json_export:
+                with self.metrics.timeStage("export_json"):
+                    self.export_to_json(wallets)
         except Exception as e:
             self.logger.error(f"Error calculating statistics: {e}")
 
-    def export_to_json(self, data: List[Dict]) -> None:
+    def export_to_json(self, data: List[WalletRecord]) -> None:
         """Export analysis results to JSON file."""
         try:
             filename = 'wallet_analysis.json'
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
+            atomic_write(filename, json.dumps([wallet.to_dict() for wallet in data], indent=2))
             self.logger.info(f"Analysis exported to {filename}")
         except Exception as e:
             self.logger.error(f"Error exporting to JSON: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze the trending smart money wallets.")
+    parser.add_argument("--engine", default="python", choices=["python", "numpy"])
+    parser.add_argument("--top-k", type=int, default=None, help="Keep only the most profitable wallets")
+    parser.add_argument("--stream", default=None, help="Append every wallet to this NDJSON file as it is produced")
+    parser.add_argument("--snapshot", default=None, help="Write a columnar snapshot of the run to this file")
+    parser.add_argument("--no-json", action="store_true", help="Skip rewriting wallet_analysis.json")
+    parser.add_argument("--history", default=None, help="Append the rank list to the snapshot history in this directory")
+    parser.add_argument("--metrics", default=None, help="Write <prefix>.prom and <prefix>.json request/stage metrics at the end of the run")
+    parser.add_argument("--debug", action="store_true", help="Log at DEBUG level")
+    parser.add_argument("--progressive", action="store_true", help="Print rows in fixed-width columns, with running totals")
+    parser.add_argument("--rows", type=int, default=None, help="Print at most this many rows")
+    parser.add_argument("--timeframes", nargs="+", default=["1d"], choices=TIMEFRAMES, help="Rank list timeframes to scan")
+    parser.add_argument("--tags", nargs="+", default=["smart_degen"], choices=WALLET_TAGS, help="Rank list wallet tags to scan")
+    args = parser.parse_args()
+
+    listener = configure_logging(logging.DEBUG if args.debug else logging.INFO)
+    exporter = StreamingExporter(args.stream, snapshot_path=args.snapshot) if args.stream or args.snapshot else None
+    snapshot_store = SnapshotStore(args.history) if args.history else None
     try:
-        analyzer = WalletAnalyzer()
-        wallets = analyzer.get_trending_wallets()
+        analyzer = WalletAnalyzer(cache_path=os.environ.get('GMGN_CACHE_PATH'), engine=args.engine,
+                                  exporter=exporter, json_export=not args.no_json, snapshot_store=snapshot_store,
+                                  progressive=args.progressive, display_limit=args.rows)
+        if len(args.timeframes) * len(args.tags) > 1:
+            wallets = analyzer.scan_trending_wallets(args.timeframes, args.tags, top_k=args.top_k)
+        else:
+            wallets = analyzer.get_trending_wallets(args.timeframes[0], args.tags[0], top_k=args.top_k)
         analyzer.display_wallet_analysis(wallets)
+        if analyzer.gmgn.diskCache is not None:
+            logging.info(f"Response cache: {analyzer.gmgn.diskCacheStats()}")
+        if args.metrics:
+            analyzer.metrics.export(args.metrics)
+            logging.info(f"Metrics written to {args.metrics}.prom and {args.metrics}.json")
+        analyzer.gmgn.close()
     except KeyboardInterrupt:
         print("\nAnalysis interrupted by user")
     except Exception as e:
         logging.error(f"Error in main execution: {e}")
+    finally:
+        if exporter is not None:
+            exporter.close()
+        if snapshot_store is not None:
+            snapshot_store.close()
+        listener.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,193 @@
+import importlib.util
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Sequence
+from records import WalletRecord, to_number
+
+# numpy is optional (WalletAnalyzer falls back to the pure Python path) and imported on first use
+np = None
+
+# Column name -> path of the value inside a rank entry
+COLUMNS = {
+    'realized_profit': ('realized_profit',),
+    'winrate': ('winrate_7d',),
+    'buy': ('buy',),
+    'sell': ('sell',),
+    'last_active': ('last_active',),
+    'honeypot_ratio': ('risk', 'token_honeypot_ratio'),
+    'fast_tx_ratio': ('risk', 'fast_tx_ratio'),
+}
+
+INACTIVE_AFTER = 7 * 24 * 3600
+
+
+def available() -> bool:
+    """Whether the vectorized engine can be used, without importing numpy yet."""
+    return np is not None or importlib.util.find_spec("numpy") is not None
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def _number(entry: Dict, path: Sequence[str]) -> float:
+    """The value at path coerced with to_number, 0 when the path is missing."""
+    value = entry
+    for key in path:
+        if not isinstance(value, dict):
+            return 0.0
+        value = value.get(key)
+    return to_number(value)
+
+
+def _row(entry: Dict) -> tuple:
+    """All COLUMNS of one rank entry (same order), without walking the paths."""
+    risk = entry.get('risk')
+    if not isinstance(risk, dict):
+        risk = {}
+    return (
+        to_number(entry.get('realized_profit')),
+        to_number(entry.get('winrate_7d')),
+        to_number(entry.get('buy')),
+        to_number(entry.get('sell')),
+        to_number(entry.get('last_active')),
+        to_number(risk.get('token_honeypot_ratio')),
+        to_number(risk.get('fast_tx_ratio'))
+    )
+
+
+class WalletFrame:
+    """Columnar (NumPy) view of a getTrendingWallets rank payload."""
+
+    def __init__(self, rows: List[Dict], columns: Dict[str, "np.ndarray"]):
+        self.rows = rows
+        self.columns = columns
+
+    @classmethod
+    def from_rank(cls, rank: List[Dict]) -> "WalletFrame":
+        """
+        Load a rank list into one float64 array per column, in a single pass over the entries.
+
+        The entries themselves are kept (not copied) so the selected rows can be formatted
+        exactly like the Python path.
+
+        Args:
+            rank: Rank entries of getTrendingWallets (possibly merged from several lists).
+
+        Returns:
+            The wallet frame.
+        """
+        if not available():
+            raise ImportError("The vectorized wallet engine requires numpy (pip install numpy).")
+        np = _numpy()
+        flat = np.fromiter(
+            chain.from_iterable(map(_row, rank)),
+            dtype=np.float64,
+            count=len(rank) * len(COLUMNS)
+        ).reshape(len(rank), len(COLUMNS))
+        columns = {name: np.ascontiguousarray(flat[:, index]) for index, name in enumerate(COLUMNS)}
+        return cls(rank, columns)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, column: str) -> "np.ndarray":
+        return self.columns[column]
+
+    def activity_mask(self, now: Optional[float] = None, max_inactive: float = INACTIVE_AFTER) -> "np.ndarray":
+        """Active wallets with at least one trade and only well-formed values (the default filters)."""
+        now = datetime.now().timestamp() if now is None else now
+        valid = np.ones(len(self), dtype=bool)
+        for values in self.columns.values():
+            valid &= ~np.isnan(values)
+        active = (now - self.columns['last_active']) <= max_inactive
+        traded = (self.columns['buy'] != 0) | (self.columns['sell'] != 0)
+        return valid & active & traded
+
+    def risk_mask(self, max_honeypot_ratio: Optional[float] = None, max_fast_tx_ratio: Optional[float] = None,
+                  min_winrate: Optional[float] = None, min_profit: Optional[float] = None) -> "np.ndarray":
+        """Optional risk/quality thresholds, ratios given as fractions (0-1)."""
+        mask = np.ones(len(self), dtype=bool)
+        if max_honeypot_ratio is not None:
+            mask &= self.columns['honeypot_ratio'] <= max_honeypot_ratio
+        if max_fast_tx_ratio is not None:
+            mask &= self.columns['fast_tx_ratio'] <= max_fast_tx_ratio
+        if min_winrate is not None:
+            mask &= self.columns['winrate'] >= min_winrate
+        if min_profit is not None:
+            mask &= self.columns['realized_profit'] >= min_profit
+        return mask
+
+    def score(self, weights: Optional[Dict[str, float]] = None, mask: Optional["np.ndarray"] = None,
+              normalize: bool = False) -> "np.ndarray":
+        """
+        Composite score as a weighted sum of columns.
+
+        Args:
+            weights: Column -> weight, defaults to realized profit only (the legacy ordering).
+            mask: Rows used to compute the normalization range.
+            normalize: Min-max scale each column to 0-1 before weighting, so weights are comparable.
+
+        Returns:
+            One score per wallet.
+        """
+        if weights is None and not normalize:
+            # Legacy ordering: realized profit as displayed, i.e. rounded to 2 decimals
+            return np.round(self.columns['realized_profit'], 2)
+
+        weights = weights or {'realized_profit': 1.0}
+        scores = np.zeros(len(self), dtype=np.float64)
+        for column, weight in weights.items():
+            values = self.columns[column]
+            if normalize:
+                reference = values[mask] if mask is not None else values
+                low, high = (reference.min(), reference.max()) if reference.size else (0.0, 0.0)
+                values = (values - low) / (high - low) if high > low else np.zeros_like(values)
+            scores += weight * values
+        return scores
+
+    def top_k(self, scores: "np.ndarray", mask: "np.ndarray", k: Optional[int] = None) -> "np.ndarray":
+        """
+        Indices of the k best scores among the masked rows, best first.
+
+        Uses a partial sort, so only the selected rows are fully ordered. Ties keep rank order, including
+        ties at the k-th score: every row tied with it is ordered before the cut.
+        """
+        candidates = np.flatnonzero(mask)
+        if k is not None and k < candidates.size:
+            candidate_scores = scores[candidates]
+            kth = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            candidates = candidates[candidate_scores >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
+
+    def select(self, now: Optional[float] = None, k: Optional[int] = None,
+               weights: Optional[Dict[str, float]] = None, normalize: bool = False,
+               filters: Sequence[Callable[["WalletFrame"], "np.ndarray"]] = (), **thresholds) -> List[WalletRecord]:
+        """
+        Filter, score and rank the wallets, returning WalletAnalyzer's records.
+
+        Args:
+            now: Reference timestamp of the activity filter.
+            k: Keep only the k best wallets.
+            weights: Composite score weights (see score).
+            normalize: Min-max scale columns before weighting.
+            filters: Extra predicates returning a boolean mask, e.g. lambda f: f['winrate'] > 0.6.
+            thresholds: Keyword thresholds of risk_mask.
+
+        Returns:
+            The selected wallets, best first.
+        """
+        mask = self.activity_mask(now) & self.risk_mask(**thresholds)
+        for predicate in filters:
+            mask &= predicate(self)
+        scores = self.score(weights, mask, normalize)
+        return self.to_records(self.top_k(scores, mask, k))
+
+    def to_records(self, indices: "np.ndarray") -> List[WalletRecord]:
+        """Parse only the selected rows into the records WalletAnalyzer returns."""
+        return [WalletRecord.from_rank_entry(self.rows[index]) for index in indices.tolist()]
@@ -0,0 +1,279 @@
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from records import WalletRecord
+from consensus import ConsensusDetector
+from pricewatch import PriceWatcher
+from smartMoney import SmartMoneyFollower
+from gmgn import gmgn
+
+# Rank list fields whose change means the wallet traded since the last poll
+TRACKED_FIELDS = ('last_active', 'buy', 'sell', 'realized_profit')
+# Endpoints every poll needs live, the persistent response cache would serve them for minutes
+LIVE_ENDPOINTS = ('getTrendingWallets', 'getWalletInfo')
+
+
+class WalletWatcher:
+    """Poll the trending wallets and re-analyze only the wallets that changed."""
+
+    def __init__(self, follower: Optional[SmartMoneyFollower] = None, interval: float = 60.0,
+                 timeframe: str = "1d", wallet_tag: str = "smart_degen",
+                 on_event: Optional[Callable[[Dict], None]] = None, consensus: Optional[ConsensusDetector] = None,
+                 price_watcher: Optional[PriceWatcher] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            follower: SmartMoneyFollower used for requests and analysis (a default one is built if None).
+                Its response cache keeps serving token endpoints, but not LIVE_ENDPOINTS.
+            interval: Seconds between two polls of getTrendingWallets.
+            timeframe: Timeframe of the rank list.
+            wallet_tag: Tag of the rank list.
+            on_event: Callback receiving every change event (events are logged when None).
+            consensus: Detector fed with the new trades of every poll, its signals are emitted as events.
+            price_watcher: Price watcher synced after every poll to the tokens the tracked wallets hold.
+        """
+        self.follower = follower or SmartMoneyFollower(max_workers=4)
+        if self.follower.disk_cache is not None:
+            for endpoint in LIVE_ENDPOINTS:
+                self.follower.disk_cache.freshness.pop(endpoint, None)
+        self.interval = interval
+        self.timeframe = timeframe
+        self.wallet_tag = wallet_tag
+        self.on_event = on_event or self.log_event
+        self.consensus = consensus
+        self.price_watcher = price_watcher
+        self.logger = logging.getLogger("WalletWatcher")
+
+        self.snapshot: Dict[str, Dict] = {}
+        self.records: Dict[str, WalletRecord] = {}
+        self.seen_trades: Dict[str, set] = {}
+        self.polls = 0
+        self.analyzed = 0
+
+    def log_event(self, event: Dict) -> None:
+        self.logger.info(json.dumps(event, default=str))
+
+    @staticmethod
+    def take_snapshot(rank_list: List[Dict]) -> Dict[str, Dict]:
+        """
+        Reduce a rank list to the fields we diff on, keyed by wallet address.
+
+        Args:
+            rank_list: Response rank list of getTrendingWallets.
+
+        Returns:
+            A dictionary mapping wallet address to its rank and tracked fields.
+        """
+        snapshot = {}
+        for rank, wallet in enumerate(rank_list, start=1):
+            address = wallet.get('wallet_address')
+            if not address:
+                continue
+            entry = {field: wallet.get(field) for field in TRACKED_FIELDS}
+            entry['rank'] = rank
+            snapshot[address] = entry
+        return snapshot
+
+    @staticmethod
+    def diff(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Compare two snapshots.
+
+        Args:
+            previous: Snapshot of the previous poll.
+            current: Snapshot of this poll.
+
+        Returns:
+            The change events, and the wallets (in rank order) that need to be re-analyzed.
+        """
+        events = []
+        changed = []
+        for address, entry in current.items():
+            before = previous.get(address)
+            if before is None:
+                events.append({'type': 'entered', 'wallet_address': address, 'rank': entry['rank']})
+                changed.append(address)
+                continue
+
+            if before['rank'] != entry['rank']:
+                events.append({
+                    'type': 'moved',
+                    'wallet_address': address,
+                    'rank': entry['rank'],
+                    'previous_rank': before['rank']
+                })
+
+            fields = {field: [before[field], entry[field]] for field in TRACKED_FIELDS if before[field] != entry[field]}
+            if fields:
+                events.append({'type': 'changed', 'wallet_address': address, 'rank': entry['rank'], 'fields': fields})
+                changed.append(address)
+
+        for address, before in previous.items():
+            if address not in current:
+                events.append({'type': 'left', 'wallet_address': address, 'previous_rank': before['rank']})
+
+        return events, changed
+
+    def reanalyze(self, wallet_address: str) -> Optional[List[Dict]]:
+        """
+        Refetch a changed wallet and evaluate the tokens of its new trades.
+
+        The trades of a wallet seen for the first time (first poll, or re-entering the list) are its
+        history: they are only remembered, so the trades reported later are the ones made since.
+
+        Args:
+            wallet_address: Address of the wallet to re-analyze.
+
+        Returns:
+            A new_trades event followed by the consensus signals its trades completed,
+            nothing if the wallet has no new trade, or None if the refetch failed.
+        """
+        try:
+            wallet_activity = self.follower.analyze_wallet_activity(wallet_address, raise_errors=True)
+        except Exception as e:
+            self.logger.error(f"Error refetching {wallet_address}: {e}")
+            return None
+        if not wallet_activity:
+            return None
+        record = WalletRecord.from_wallet_info(wallet_address, wallet_activity)
+        self.records[wallet_address] = record
+
+        if wallet_address not in self.seen_trades:
+            self.seen_trades[wallet_address] = {trade.key() for trade in record.trades}
+            return []
+
+        seen = self.seen_trades[wallet_address]
+        new_trades = []
+        for trade in record.trades:
+            key = trade.key()
+            if key not in seen:
+                seen.add(key)
+                new_trades.append(trade)
+
+        if not new_trades:
+            return []
+
+        for trade in new_trades:
+            token_address = trade.token_address
+            if token_address:
+                token_info, token_price = self.follower.evaluate_token(token_address)
+                self.follower.log_token_evaluation(token_address, token_info, token_price)
+
+        events = [{'type': 'new_trades', 'wallet_address': wallet_address, 'trades': [trade.to_dict() for trade in new_trades]}]
+        if self.consensus is not None:
+            events.extend(self.consensus.add_trades(wallet_address, new_trades))
+        return events
+
+    def poll_once(self) -> List[Dict]:
+        """
+        Fetch the rank list, diff it against the previous snapshot and re-analyze changed wallets.
+
+        Returns:
+            Every change event of this poll.
+        """
+        rank_list = self.follower.get_top_wallets(timeframe=self.timeframe, wallet_tag=self.wallet_tag)
+        if not rank_list:
+            self.logger.warning("Empty rank list, keeping the previous snapshot.")
+            return []
+
+        current = self.take_snapshot(rank_list)
+        events, changed = self.diff(self.snapshot, current)
+
+        for address in self.snapshot:
+            if address not in current:
+                self.records.pop(address, None)
+                self.seen_trades.pop(address, None)
+
+        if self.consensus is not None:
+            self.consensus.expire()
+        failed = []
+        for address, wallet_events in zip(changed, self.follower.parallel_map(self.reanalyze, changed)):
+            if wallet_events is None:
+                failed.append(address)
+            else:
+                events.extend(wallet_events)
+
+        # A wallet whose refetch failed keeps its previous tracked fields, so the next poll sees it changed again
+        for address in failed:
+            before = self.snapshot.get(address)
+            if before is None:
+                del current[address]
+            else:
+                current[address] = dict(before, rank=current[address]['rank'])
+        self.snapshot = current
+        if self.price_watcher is not None:
+            self.price_watcher.sync_holders(self.records.values())
+        self.polls += 1
+        self.analyzed += len(changed) - len(failed)
+        self.logger.info(f"Poll {self.polls}: {len(current)} wallets, {len(changed) - len(failed)} re-analyzed, "
+                         f"{len(failed)} failed, {len(events)} events")
+
+        for event in events:
+            self.on_event(event)
+        return events
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        """
+        Poll until interrupted (or for a number of iterations), keeping a steady interval.
+
+        Args:
+            iterations: Number of polls before returning (forever when None).
+        """
+        remaining = iterations
+        while remaining is None or remaining > 0:
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.logger.error(f"Error polling trending wallets: {e}")
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the trending wallets and re-analyze only the ones that change.")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between polls")
+    parser.add_argument("--timeframe", default="1d", choices=["1d", "7d", "30d"])
+    parser.add_argument("--tag", default="smart_degen", choices=["pump_smart", "smart_degen", "reowned", "snipe_bot"])
+    parser.add_argument("--iterations", type=int, default=None, help="Stop after this many polls")
+    parser.add_argument("--workers", type=int, default=4, help="Wallets re-analyzed in parallel")
+    parser.add_argument("--consensus", type=int, default=3, help="Distinct wallets buying the same token that fire a signal (0 disables)")
+    parser.add_argument("--window", type=float, default=30.0, help="Consensus window in minutes")
+    parser.add_argument("--prices", action="store_true", help="Keep the prices of the tokens the wallets hold fresh in the background")
+    parser.add_argument("--min-price-interval", type=float, default=1.0, help="Shortest price refresh interval in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    follower = SmartMoneyFollower(max_workers=args.workers, cache_path=os.environ.get('GMGN_CACHE_PATH'))
+    consensus = ConsensusDetector(args.consensus, args.window) if args.consensus else None
+    price_watcher = None
+    if args.prices:
+        # Same sessions, request budget and resilience (one AIMD controller for the shared rate) as the follower,
+        # but prices are never served from the cache
+        price_client = gmgn(transport=follower.gmgn.transport, rateLimiter=follower.rate_limiter, cacheTtls={}, metrics=follower.metrics,
+                            resilience=follower.gmgn.resilience)
+        price_watcher = PriceWatcher(price_client, min_interval=args.min_price_interval,
+                                     on_price=lambda token_address, price, previous: logging.debug(f"{token_address}: {previous} -> {price}"))
+        price_watcher.start()
+    watcher = WalletWatcher(follower, interval=args.interval, timeframe=args.timeframe, wallet_tag=args.tag, consensus=consensus,
+                            price_watcher=price_watcher)
+    try:
+        watcher.run(iterations=args.iterations)
+    except KeyboardInterrupt:
+        print("\nWatch interrupted by user")
+    finally:
+        if price_watcher is not None:
+            price_watcher.stop()
+            logging.info(f"Price watch: {price_watcher.stats()}")
+        follower.gmgn.close()
+
+
+if __name__ == "__main__":
+    main()